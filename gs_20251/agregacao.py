@@ -0,0 +1,87 @@
+# Agregação da precipitação diária com arrays NumPy: cada dia recebe o índice do seu
+# grupo (mês, semana ou ano/mês) e as estatísticas saem de np.bincount, sem montar
+# DataFrame nem groupby. Dias sem dado (NaN) são ignorados, como no groupby().sum()
+# do pandas: um grupo só com NaN soma 0, mas aparece no resultado.
+import numpy as np  # Arrays e bincount
+
+# Estatísticas disponíveis
+ESTATISTICAS = ("soma", "maximo", "dias_chuvosos", "dias_validos")
+
+# Dia chuvoso: precipitação de pelo menos 1 mm (convenção da OMM)
+LIMIAR_DIA_CHUVOSO_MM = 1.0
+
+
+# Converte as datas (strings AAAA-MM-DD, datetime64 ou Series do pandas) em datetime64[D]
+def para_dias(datas):
+    return np.asarray(datas, dtype="datetime64[D]")
+
+
+# Converte os valores em float64, com None/NaN como NaN
+def para_valores(valores):
+    return np.asarray(valores, dtype="float64")
+
+
+# Agrega valores por índice de grupo (0..tamanho-1).
+# Retorna (grupos presentes, {estatística: array alinhado aos grupos presentes}).
+def agregar(indices, valores, tamanho, estatisticas=("soma",), limiar_chuva=LIMIAR_DIA_CHUVOSO_MM):
+    indices = np.asarray(indices, dtype=np.intp)
+    valores = para_valores(valores)
+
+    # Grupos que têm pelo menos um dia (com ou sem dado)
+    presentes = np.flatnonzero(np.bincount(indices, minlength=tamanho))
+
+    validos = ~np.isnan(valores)
+    indices_validos = indices[validos]
+    valores_validos = valores[validos]
+
+    resultado = {}
+    for estatistica in estatisticas:
+        if estatistica == "soma":
+            soma = np.bincount(indices_validos, weights=valores_validos, minlength=tamanho).astype("float64")
+            resultado["soma"] = soma[presentes]
+        elif estatistica == "maximo":
+            maximo = np.full(tamanho, -np.inf)
+            np.maximum.at(maximo, indices_validos, valores_validos)
+            maximo[np.isinf(maximo)] = np.nan  # Grupo sem nenhum dado válido
+            resultado["maximo"] = maximo[presentes]
+        elif estatistica == "dias_chuvosos":
+            chuvosos = np.bincount(indices_validos[valores_validos >= limiar_chuva], minlength=tamanho)
+            resultado["dias_chuvosos"] = chuvosos[presentes]
+        elif estatistica == "dias_validos":
+            resultado["dias_validos"] = np.bincount(indices_validos, minlength=tamanho)[presentes]
+        else:
+            raise ValueError(f"Estatística desconhecida: {estatistica}. Use: {', '.join(ESTATISTICAS)}")
+    return presentes, resultado
+
+
+# Agrega por mês do ano. Retorna (meses 1..12, estatísticas).
+def agregar_por_mes(datas, valores, estatisticas=("soma",)):
+    dias = para_dias(datas)
+    indices = dias.astype("datetime64[M]").astype(np.int64) % 12
+    meses, resultado = agregar(indices, valores, 12, estatisticas)
+    return meses + 1, resultado
+
+
+# Agrega por semana contada a partir do primeiro dia. Retorna (semanas 1.., estatísticas).
+def agregar_por_semana(datas, valores, estatisticas=("soma",)):
+    dias = para_dias(datas)
+    if dias.size == 0:
+        return np.array([], dtype=np.int64), {estatistica: np.array([]) for estatistica in estatisticas}
+    indices = (dias - dias.min()).astype(np.int64) // 7
+    semanas, resultado = agregar(indices, valores, int(indices.max()) + 1, estatisticas)
+    return semanas + 1, resultado
+
+
+# Agrega por (ano, mês). Retorna (anos, meses 1..12, estatísticas).
+def agregar_por_ano_mes(datas, valores, estatisticas=("soma",)):
+    dias = para_dias(datas)
+    if dias.size == 0:
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio, {estatistica: np.array([]) for estatistica in estatisticas}
+    # Meses desde 1970, contados a partir do primeiro mês do período
+    meses_absolutos = dias.astype("datetime64[M]").astype(np.int64)
+    primeiro = int(meses_absolutos.min())
+    grupos, resultado = agregar(meses_absolutos - primeiro, valores,
+                                int(meses_absolutos.max()) - primeiro + 1, estatisticas)
+    grupos = grupos + primeiro
+    return 1970 + grupos // 12, grupos % 12 + 1, resultado
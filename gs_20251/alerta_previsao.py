@@ -0,0 +1,147 @@
+# Alertas pela previsão de chuva de todos os usuários cadastrados. As previsões mais
+# recentes (chuva_semana, a partir de hoje) viram uma matriz CEPs x dias e os limites
+# (chuva de um dia e acumulado de 3 dias) são avaliados de uma vez com NumPy. Os CEPs
+# em alerta são cruzados com os usuários, primeiro quem precisa de resgate.
+#
+# Exemplos:
+#   python alerta_previsao.py
+#   python alerta_previsao.py --limiar-diario 40 --limiar-3-dias 80 --json
+import argparse                 # Para ler os parâmetros da linha de comando
+import json                     # Saída em JSON (uma linha por usuário)
+import sys                      # Para o código de saída do programa
+from datetime import date       # Primeiro dia da previsão
+
+import numpy as np              # Matriz de previsões
+
+import banco                    # Banco de dados único
+
+# Chuva em um dia que já é perigosa (mesmo nível da linha do gráfico diário)
+LIMIAR_DIARIO_MM = 50.0
+
+# Chuva acumulada em 3 dias seguidos que já é perigosa
+LIMIAR_3_DIAS_MM = 100.0
+
+# Dias da janela do acumulado
+DIAS_ACUMULADO = 3
+
+
+# Previsões a partir de `hoje` como matriz: (ceps, datas datetime64[D], matriz CEPs x dias).
+# Dias sem previsão ficam NaN.
+def carregar_previsoes(conn, hoje=None):
+    hoje = hoje or date.today()
+    linhas = conn.execute("SELECT cep, data, chuva FROM chuva_semana WHERE data >= ?", (hoje.isoformat(),)).fetchall()
+    if not linhas:
+        return np.array([], dtype=object), np.array([], dtype="datetime64[D]"), np.empty((0, 0))
+
+    ceps, datas, chuvas = zip(*linhas)
+    ceps, linha = np.unique(np.array(ceps, dtype=object), return_inverse=True)
+    coluna = (np.array(datas, dtype="datetime64[D]") - np.datetime64(hoje, "D")).astype(np.int64)
+    matriz = np.full((ceps.size, int(coluna.max()) + 1), np.nan)
+    matriz[linha, coluna] = np.array(chuvas, dtype="float64")  # None vira NaN
+    return ceps, np.datetime64(hoje, "D") + np.arange(matriz.shape[1]), matriz
+
+
+# Avalia os limites em todas as linhas da matriz de uma vez. Retorna arrays por CEP:
+# alerta, maior chuva diária e o dia dela, maior acumulado de 3 dias e o dia em que termina.
+def avaliar_limiares(matriz, limiar_diario=LIMIAR_DIARIO_MM, limiar_3_dias=LIMIAR_3_DIAS_MM):
+    if matriz.size == 0:
+        vazio = np.array([], dtype=np.int64)
+        return {'alerta': np.array([], dtype=bool), 'diario': np.array([], dtype=bool),
+                'acumulado': np.array([], dtype=bool), 'max_diario': np.array([]), 'dia_max_diario': vazio,
+                'max_3_dias': np.array([]), 'dia_max_3_dias': vazio}
+
+    chuva = np.nan_to_num(matriz, nan=0.0)
+    # Acumulado móvel de 3 dias pela soma acumulada (nos primeiros dias, o que houver)
+    acumulada = np.concatenate((np.zeros((chuva.shape[0], 1)), np.cumsum(chuva, axis=1)), axis=1)
+    fins = np.arange(1, chuva.shape[1] + 1)
+    acumulado_3_dias = acumulada[:, fins] - acumulada[:, np.maximum(fins - DIAS_ACUMULADO, 0)]
+
+    dia_max_diario = chuva.argmax(axis=1)
+    dia_max_3_dias = acumulado_3_dias.argmax(axis=1)
+    indices = np.arange(chuva.shape[0])
+    max_diario = chuva[indices, dia_max_diario]
+    max_3_dias = acumulado_3_dias[indices, dia_max_3_dias]
+
+    diario = max_diario >= limiar_diario
+    acumulado = max_3_dias >= limiar_3_dias
+    return {'alerta': diario | acumulado, 'diario': diario, 'acumulado': acumulado,
+            'max_diario': max_diario, 'dia_max_diario': dia_max_diario,
+            'max_3_dias': max_3_dias, 'dia_max_3_dias': dia_max_3_dias}
+
+
+# Usuários dos CEPs em alerta: primeiro quem precisa de resgate, depois pela maior chuva diária
+def usuarios_em_alerta(conn, limiar_diario=LIMIAR_DIARIO_MM, limiar_3_dias=LIMIAR_3_DIAS_MM, hoje=None):
+    ceps, datas, matriz = carregar_previsoes(conn, hoje)
+    resultado = avaliar_limiares(matriz, limiar_diario, limiar_3_dias)
+    em_alerta = np.flatnonzero(resultado['alerta'])
+    if em_alerta.size == 0:
+        return []
+
+    # Dados de cada CEP em alerta, levados ao banco em uma tabela temporária para o JOIN
+    por_cep = {}
+    for i in em_alerta.tolist():
+        motivos = [nome for nome, chave in (("diário", 'diario'), ("3 dias", 'acumulado')) if resultado[chave][i]]
+        por_cep[ceps[i]] = {
+            'max_diario_mm': round(float(resultado['max_diario'][i]), 1),
+            'dia_max_diario': str(datas[resultado['dia_max_diario'][i]]),
+            'max_3_dias_mm': round(float(resultado['max_3_dias'][i]), 1),
+            'fim_max_3_dias': str(datas[resultado['dia_max_3_dias'][i]]),
+            'motivos': motivos,
+        }
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS ceps_alerta_previsao (cep TEXT PRIMARY KEY, max_diario REAL)")
+    try:
+        conn.executemany("INSERT INTO ceps_alerta_previsao (cep, max_diario) VALUES (?, ?)",
+                         [(cep, dados['max_diario_mm']) for cep, dados in por_cep.items()])
+        linhas = conn.execute('''
+            SELECT u.id, u.nome_completo, u.cpf, u.tipo_deficiencia, u.cep, u.endereco_completo, u.necessita_resgate
+            FROM ceps_alerta_previsao a JOIN usuarios u ON u.cep = a.cep
+            ORDER BY u.necessita_resgate = 'sim' DESC, a.max_diario DESC, u.id
+        ''').fetchall()
+    finally:
+        conn.execute("DROP TABLE temp.ceps_alerta_previsao")
+        conn.commit()
+
+    return [
+        dict({'id': id_usuario, 'nome_completo': nome, 'cpf': cpf, 'tipo_deficiencia': deficiencia,
+              'cep': cep, 'endereco_completo': endereco, 'necessita_resgate': resgate}, **por_cep[cep])
+        for id_usuario, nome, cpf, deficiencia, cep, endereco, resgate in linhas
+    ]
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Usuários em CEPs com previsão de chuva perigosa.")
+    parser.add_argument("--limiar-diario", type=float, default=LIMIAR_DIARIO_MM,
+                        help=f"chuva em um dia (padrão: {LIMIAR_DIARIO_MM:g} mm)")
+    parser.add_argument("--limiar-3-dias", type=float, default=LIMIAR_3_DIAS_MM,
+                        help=f"chuva acumulada em 3 dias (padrão: {LIMIAR_3_DIAS_MM:g} mm)")
+    parser.add_argument("--json", action="store_true", help="um usuário por linha em JSON")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    conn = banco.conectar(args.banco)
+    try:
+        alertas = usuarios_em_alerta(conn, args.limiar_diario, args.limiar_3_dias)
+    finally:
+        conn.close()
+
+    if args.json:
+        for alerta in alertas:
+            print(json.dumps(alerta, ensure_ascii=False))
+    elif not alertas:
+        print("Nenhum usuário em CEP com previsão de chuva perigosa.")
+    else:
+        resgate = sum(1 for alerta in alertas if alerta['necessita_resgate'] == 'sim')
+        print(f"\n⚠️ {len(alertas)} usuário(s) com previsão de chuva perigosa ({resgate} precisam de resgate):\n")
+        for alerta in alertas:
+            print(f"{'RESGATE | ' if alerta['necessita_resgate'] == 'sim' else ''}{alerta['nome_completo']} | "
+                  f"CPF: {alerta['cpf']} | {alerta['endereco_completo']} (CEP {alerta['cep']}) | "
+                  f"{alerta['max_diario_mm']} mm em {alerta['dia_max_diario']} | "
+                  f"{alerta['max_3_dias_mm']} mm em 3 dias até {alerta['fim_max_3_dias']}")
+    # Código 2 quando há alerta (útil em scripts)
+    return 2 if alertas else 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
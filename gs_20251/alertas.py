@@ -0,0 +1,273 @@
+# Motor de alertas de alagamento: mantém, por CEP, contagens móveis dos relatos
+# recentes em memória e em uma tabela-resumo (contagem_alertas, criada pelas
+# migrações de banco.py), atualizadas a cada novo relato. Assim a verificação do limite não precisa varrer a tabela
+# relatorios_alagamento.
+# Relatos gravados por outros processos (linha de comando, importação, serviço) chegam
+# pela tabela-resumo: quando outra conexão grava no banco (PRAGMA data_version muda),
+# o motor lê na consulta seguinte só as linhas com número de alteração maior que o
+# último já lido.
+import threading                        # Para usar o motor a partir de várias threads
+import time                             # Intervalo entre as verificações de gravações externas
+from collections import deque           # Fila dos baldes de tempo de cada janela
+from datetime import datetime, timedelta  # Para calcular o início das janelas
+
+# Janelas de tempo aceitas na consulta de alertas: nome -> (horas, descrição)
+# (horas None = desde a meia-noite de hoje)
+JANELAS_ALERTA = {
+    'hoje': (None, 'hoje'),
+    '1h': (1, 'na última hora'),
+    '6h': (6, 'nas últimas 6 horas'),
+    '24h': (24, 'nas últimas 24 horas'),
+}
+
+# Quantidade de relatos que dispara o alerta
+LIMITE_ALERTA = 5
+
+# Os relatos são agrupados em baldes de 1 minuto (resolução das janelas)
+TAMANHO_BALDE = 60
+
+# Intervalo mínimo (s) entre as verificações de relatos gravados por outras conexões
+INTERVALO_SINCRONIA = 0.25
+
+# Prefixos de CEP somados para alertas de vizinhança: setor (3 dígitos),
+# subsetor (4 dígitos) e divisor de subsetor (5 dígitos)
+PREFIXOS_CEP = {
+    'setor': 3,
+    'subsetor': 4,
+    'divisor_subsetor': 5,
+}
+
+# Pesos usados para ordenar os CEPs em alerta pela gravidade dos relatos
+PESO_NIVEL = {'baixo': 1, 'medio': 2, 'médio': 2, 'alto': 3}
+PESO_INTENSIDADE = {'fraca': 1, 'media': 2, 'média': 2, 'forte': 3}
+
+
+# Função que calcula o início (segundos desde 1970) de uma janela de tempo
+def inicio_janela(janela, agora=None):
+    agora = agora or datetime.now()
+    horas = JANELAS_ALERTA[janela][0]
+    if horas is None:
+        return int(agora.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+    return int((agora - timedelta(hours=horas)).timestamp())
+
+
+# Próximo número de alteração da tabela-resumo (quem grava tem a trava de escrita do
+# SQLite, então os números crescem na ordem dos commits)
+PROXIMA_ALTERACAO = '(SELECT COALESCE(MAX(alteracao), 0) + 1 FROM contagem_alertas)'
+
+
+# Peso de um relato: nível da água x intensidade da chuva (de 1 a 9)
+def peso_relatorio(nivel_inundacao, intensidade_chuva):
+    return PESO_NIVEL.get(nivel_inundacao, 1) * PESO_INTENSIDADE.get(intensidade_chuva, 1)
+
+
+# Preenche a tabela-resumo com os relatos das últimas 24 horas que ainda não foram
+# contados (usado depois de importar relatos antigos para o banco). O início é alinhado
+# ao balde: o balde da borda é recontado inteiro, não só a parte dentro da janela.
+def semear_contagem(conn):
+    with conn:
+        conn.execute(f'''
+            INSERT INTO contagem_alertas (cep_local, balde, total, peso, alteracao)
+            SELECT cep_local, registrado_em / {TAMANHO_BALDE} * {TAMANHO_BALDE}, COUNT(*),
+                   SUM((CASE nivel_inundacao WHEN 'alto' THEN 3 WHEN 'medio' THEN 2 WHEN 'médio' THEN 2 ELSE 1 END) *
+                       (CASE intensidade_chuva WHEN 'forte' THEN 3 WHEN 'media' THEN 2 WHEN 'média' THEN 2 ELSE 1 END)),
+                   {PROXIMA_ALTERACAO}
+            FROM relatorios_alagamento
+            WHERE registrado_em >= ?
+            GROUP BY 1, 2
+            ON CONFLICT (cep_local, balde) DO UPDATE SET
+                total = excluded.total, peso = excluded.peso, alteracao = excluded.alteracao
+        ''', (inicio_janela('24h') // TAMANHO_BALDE * TAMANHO_BALDE,))
+
+
+# Grava um relato na tabela-resumo, dentro da transação de quem chamou (sem motor em
+# memória: usado por quem só grava, como o comando relatar da linha de comando)
+def gravar_contagem(conn, cep, registrado_em, nivel_inundacao, intensidade_chuva):
+    conn.execute(f'''
+        INSERT INTO contagem_alertas (cep_local, balde, total, peso, alteracao) VALUES (?, ?, 1, ?, {PROXIMA_ALTERACAO})
+        ON CONFLICT (cep_local, balde) DO UPDATE SET
+            total = total + 1, peso = peso + excluded.peso, alteracao = excluded.alteracao
+    ''', (cep, registrado_em // TAMANHO_BALDE * TAMANHO_BALDE, peso_relatorio(nivel_inundacao, intensidade_chuva)))
+
+
+# Soma móvel de uma janela para um CEP: fila de baldes + totais acumulados
+class _JanelaMovel:
+    def __init__(self):
+        self.baldes = deque()  # [balde, total, peso] em ordem de tempo
+        self.total = 0
+        self.peso = 0.0
+
+    # Soma o relato ao seu balde, mantendo a fila em ordem de tempo. Os relatos quase
+    # sempre chegam em ordem (O(1)); os atrasados (importações, data informada) são
+    # encaixados na posição certa para expirarem na hora certa.
+    def adicionar(self, balde, total, peso):
+        posicao = len(self.baldes)
+        while posicao and self.baldes[posicao - 1][0] > balde:
+            posicao -= 1
+        if posicao and self.baldes[posicao - 1][0] == balde:
+            self.baldes[posicao - 1][1] += total
+            self.baldes[posicao - 1][2] += peso
+        else:
+            self.baldes.insert(posicao, [balde, total, peso])
+        self.total += total
+        self.peso += peso
+
+    # Total e peso de um balde (zero se ele não estiver na fila)
+    def valor(self, balde):
+        for item in reversed(self.baldes):
+            if item[0] == balde:
+                return item[1], item[2]
+            if item[0] < balde:
+                break
+        return 0, 0.0
+
+    # Descarta os baldes anteriores ao início da janela (custo amortizado O(1))
+    def expirar(self, inicio):
+        while self.baldes and self.baldes[0][0] < inicio:
+            _, total, peso = self.baldes.popleft()
+            self.total -= total
+            self.peso -= peso
+
+
+class MotorAlertas:
+    def __init__(self, conn, limite=LIMITE_ALERTA):
+        self.conn = conn
+        self.limite = limite
+        self._contagens = {}  # cep -> {janela: _JanelaMovel}
+        self._prefixos = {}   # prefixo do CEP -> {janela: _JanelaMovel}
+        # Trava das contagens e da conexão do motor (consultas vindas de várias threads)
+        self.trava = threading.RLock()
+        # Muda a cada novo relato (usado para invalidar resultados guardados em cache)
+        self.versao = 0
+        self._verificado_em = time.monotonic()
+        # Lida antes da carga: uma gravação externa durante a carga é lida na sincronia seguinte
+        self._versao_banco = self._ler_versao_banco()
+        self._alteracao = 0  # Maior número de alteração da tabela-resumo já lido
+        self._carregar()
+
+    def _ler_versao_banco(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    # Carrega as contagens em memória a partir da tabela-resumo (últimas 24 horas). O número
+    # de alteração é lido antes: uma linha alterada durante a carga volta na sincronia seguinte.
+    def _carregar(self):
+        self._alteracao = self.conn.execute('SELECT COALESCE(MAX(alteracao), 0) FROM contagem_alertas').fetchone()[0]
+        linhas = self.conn.execute(
+            'SELECT cep_local, balde, total, peso FROM contagem_alertas WHERE balde >= ? ORDER BY balde',
+            (inicio_janela('24h') // TAMANHO_BALDE * TAMANHO_BALDE,)
+        )
+        for cep, balde, total, peso in linhas:
+            self._adicionar_memoria(cep, balde, total, peso)
+
+    # Se outra conexão gravou no banco desde a última verificação, lê só as linhas da
+    # tabela-resumo alteradas desde então (gravações em outras tabelas, como os caches,
+    # custam uma consulta ao índice). Reler uma linha já aplicada não muda nada.
+    def _sincronizar(self, forcar=False):
+        agora = time.monotonic()
+        if not forcar and agora - self._verificado_em < INTERVALO_SINCRONIA:
+            return
+        self._verificado_em = agora
+        versao_banco = self._ler_versao_banco()
+        if versao_banco == self._versao_banco:
+            return
+        self._versao_banco = versao_banco
+        inicio = inicio_janela('24h') // TAMANHO_BALDE * TAMANHO_BALDE
+        linhas = self.conn.execute(
+            'SELECT cep_local, balde, total, peso, alteracao FROM contagem_alertas WHERE alteracao > ?',
+            (self._alteracao,)
+        ).fetchall()
+        for cep, balde, total, peso, alteracao in linhas:
+            self._alteracao = max(self._alteracao, alteracao)
+            if balde >= inicio:
+                self._definir_memoria(cep, balde, total, peso)
+
+    # Põe no balde do CEP o total e o peso lidos da tabela-resumo; o CEP e os prefixos
+    # recebem a diferença para o que já estava em memória
+    def _definir_memoria(self, cep, balde, total, peso):
+        janelas = self._contagens.get(cep)
+        total_atual, peso_atual = janelas['24h'].valor(balde) if janelas else (0, 0.0)
+        if total != total_atual or peso != peso_atual:
+            self._adicionar_memoria(cep, balde, total - total_atual, peso - peso_atual)
+
+    def _adicionar_memoria(self, cep, balde, total, peso):
+        destinos = [(self._contagens, cep)]
+        destinos += [(self._prefixos, cep[:tamanho]) for tamanho in PREFIXOS_CEP.values()]
+        for contagens, chave in destinos:
+            janelas = contagens.get(chave)
+            if janelas is None:
+                janelas = contagens[chave] = {nome: _JanelaMovel() for nome in JANELAS_ALERTA}
+            for janela in janelas.values():
+                janela.adicionar(balde, total, peso)
+        self.versao += 1
+
+    # Total e peso de uma entrada de contagens na janela (expira os baldes antigos)
+    def _contar_em(self, contagens, chave, janela, agora):
+        janelas = contagens.get(chave)
+        if janelas is None:
+            return 0, 0.0
+        movel = janelas[janela]
+        movel.expirar(inicio_janela(janela, agora) // TAMANHO_BALDE * TAMANHO_BALDE)
+        return movel.total, movel.peso
+
+    # Atualiza as contagens com um novo relato. A gravação na tabela-resumo entra na
+    # transação de quem chamou (o commit é feito junto com o INSERT do relato).
+    def registrar(self, cep, registrado_em, nivel_inundacao, intensidade_chuva):
+        with self.trava:
+            gravar_contagem(self.conn, cep, registrado_em, nivel_inundacao, intensidade_chuva)
+            self._adicionar_memoria(cep, registrado_em // TAMANHO_BALDE * TAMANHO_BALDE, 1,
+                                    peso_relatorio(nivel_inundacao, intensidade_chuva))
+
+    # Lê já as contagens gravadas por outra conexão, sem esperar o intervalo de sincronia
+    # (ex.: logo depois do commit da thread escritora em servico_http.py)
+    def sincronizar(self):
+        with self.trava:
+            self._sincronizar(forcar=True)
+
+    # Retorna (total, peso) de um CEP na janela (o banco só é lido se outra conexão gravou)
+    def contar(self, cep, janela='hoje', agora=None):
+        with self.trava:
+            self._sincronizar()
+            return self._contar_em(self._contagens, cep, janela, agora)
+
+    # Retorna (total, peso) de todos os CEPs que começam com o prefixo (3, 4 ou 5 dígitos)
+    def contar_prefixo(self, prefixo, janela='hoje', agora=None):
+        with self.trava:
+            self._sincronizar()
+            return self._contar_em(self._prefixos, prefixo, janela, agora)
+
+    # CEPs com relatos nas últimas 24 horas (ou desde a meia-noite)
+    def ceps_ativos(self):
+        with self.trava:
+            self._sincronizar()
+            return list(self._contagens)
+
+    # Indica se o CEP atingiu o limite de relatos na janela
+    def em_alerta(self, cep, janela='hoje', agora=None):
+        return self.contar(cep, janela, agora)[0] >= self.limite
+
+    # Lista (cep, total, peso) de todos os CEPs acima do limite, do mais grave ao menos grave
+    def ceps_em_alerta(self, janela='hoje', agora=None):
+        resultado = []
+        with self.trava:
+            self._sincronizar()
+            for cep in list(self._contagens):
+                total, peso = self._contar_em(self._contagens, cep, janela, agora)
+                # CEPs sem relatos nas últimas 24 horas saem da memória
+                if (self._contar_em(self._contagens, cep, '24h', agora)[0] == 0 and
+                        self._contar_em(self._contagens, cep, 'hoje', agora)[0] == 0):
+                    del self._contagens[cep]
+                    continue
+                if total >= self.limite:
+                    resultado.append((cep, total, peso))
+            for prefixo in list(self._prefixos):
+                if (self._contar_em(self._prefixos, prefixo, '24h', agora)[0] == 0 and
+                        self._contar_em(self._prefixos, prefixo, 'hoje', agora)[0] == 0):
+                    del self._prefixos[prefixo]
+        resultado.sort(key=lambda item: (item[2], item[1]), reverse=True)
+        return resultado
+
+    # Apaga da tabela-resumo os baldes que já saíram de todas as janelas
+    def limpar_antigos(self):
+        limite = min(inicio_janela('24h'), inicio_janela('hoje'))
+        with self.conn:
+            self.conn.execute('DELETE FROM contagem_alertas WHERE balde < ?', (limite - TAMANHO_BALDE,))
@@ -0,0 +1,179 @@
+import calendar                        # Último dia de cada mês
+from concurrent.futures import ThreadPoolExecutor  # Lotes de locais em paralelo
+import numpy as np                     # Para devolver os dados como arrays (agregação vetorizada)
+from datetime import date, timedelta   # Para calcular os intervalos de datas
+
+import banco                           # Banco único (índice dos locais da série)
+import metricas                        # Tempo das etapas e dias gravados
+from open_meteo import arquivo_diario  # Arquivo histórico da Open-Meteo (vários locais por requisição)
+from serie_temporal import abrir_serie  # Série diária em disco (memmap)
+from resumos import atualizar_resumos, conferir_resumos, consultar_semanal, consultar_mensal
+
+# Casas decimais usadas para arredondar as coordenadas (0,01° ≈ 1 km, bem menor que a grade da API)
+CASAS_DECIMAIS = 2
+
+# O arquivo histórico da Open-Meteo demora alguns dias para consolidar os dados.
+# Dias recentes sem valor não são gravados, para serem buscados de novo depois.
+ATRASO_ARQUIVO_DIAS = 7
+
+# Lacunas separadas por menos que isso são buscadas em uma única requisição
+DISTANCIA_MINIMA_LACUNAS = 30
+
+
+# Arredonda as coordenadas para que CEPs vizinhos compartilhem os mesmos dados
+def arredondar_coordenadas(lat, lon):
+    return round(lat, CASAS_DECIMAIS), round(lon, CASAS_DECIMAIS)
+
+
+# Nome da série diária de precipitação em disco (arquivo <pasta das séries>/precipitacao_diaria.f32)
+NOME_SERIE_DIARIA = "precipitacao_diaria"
+
+
+# Série diária do banco atual (aberta uma vez por processo). Na primeira abertura,
+# os dias que ainda estiverem na antiga tabela precipitacao_diaria vão para a série.
+def serie_diaria():
+    return abrir_serie(NOME_SERIE_DIARIA, preparar=mover_tabela_para_serie)
+
+
+# Copia os dias da tabela precipitacao_diaria (armazém antigo) para a série e esvazia a tabela
+def mover_tabela_para_serie(serie):
+    conn = banco.conectar()
+    try:
+        if not conn.execute("SELECT 1 FROM precipitacao_diaria LIMIT 1").fetchone():
+            return 0
+        total = 0
+        locais = conn.execute("SELECT DISTINCT latitude, longitude FROM precipitacao_diaria").fetchall()
+        for lat, lon in locais:
+            linhas = conn.execute(
+                "SELECT data, precipitacao_mm FROM precipitacao_diaria WHERE latitude = ? AND longitude = ?",
+                (lat, lon)
+            ).fetchall()
+            datas = np.array([linha[0] for linha in linhas], dtype="datetime64[D]")
+            valores = np.array([linha[1] for linha in linhas], dtype="float64")  # None vira NaN
+            # Só os dias dentro do período da série
+            dentro = (datas >= np.datetime64(serie.inicio)) & (datas < np.datetime64(serie.inicio) + serie.dias)
+            serie.gravar(lat, lon, valores[dentro], datas=datas[dentro])
+            atualizar_resumos(serie, lat, lon, datas[dentro], conn)
+            total += len(linhas)
+        with conn:
+            conn.execute("DELETE FROM precipitacao_diaria")
+        print(f"Armazém: {total} dias de {len(locais)} locais movidos para {serie.caminho}")
+        return total
+    finally:
+        conn.close()
+
+
+# Calcula os intervalos [inicio, fim] que ainda não estão no armazém
+def intervalos_faltantes(serie, lat, lon, inicio, fim):
+    faltando = np.flatnonzero(serie.nao_buscados(lat, lon, inicio, fim))
+
+    lacunas = []
+    for deslocamento in faltando.tolist():
+        dia = inicio + timedelta(days=deslocamento)
+        # Junta com a lacuna anterior se estiverem próximas
+        if lacunas and (dia - lacunas[-1][1]).days <= DISTANCIA_MINIMA_LACUNAS:
+            lacunas[-1][1] = dia
+        else:
+            lacunas.append([dia, dia])
+    return [(a, b) for a, b in lacunas]
+
+
+# Baixa a precipitação diária de um intervalo na API de arquivo da Open-Meteo (um local)
+def baixar_intervalo(lat, lon, inicio, fim):
+    return arquivo_diario([(lat, lon)], inicio, fim)[0]
+
+
+# Grava os dias baixados, ignorando dias recentes que ainda não têm valor
+def guardar_dias(serie, lat, lon, datas, valores):
+    limite_recente = (date.today() - timedelta(days=ATRASO_ARQUIVO_DIAS)).isoformat()
+    dias = [(d, v) for d, v in zip(datas, valores) if v is not None or d < limite_recente]
+    if dias:
+        datas_gravadas = np.array([d for d, _ in dias], dtype="datetime64[D]")
+        with metricas.etapa("gravacao_serie"):
+            serie.gravar(lat, lon, np.array([v for _, v in dias], dtype="float64"), datas=datas_gravadas)
+        metricas.contar("dias_gravados", len(dias))
+        atualizar_resumos(serie, lat, lon, datas_gravadas)
+
+
+# Busca na API só os dias do período que ainda não estão no armazém.
+# Retorna (série, lat, lon) com as coordenadas arredondadas.
+def garantir_periodo(lat, lon, inicio, fim):
+    lat, lon = arredondar_coordenadas(lat, lon)
+    # O arquivo histórico não tem dias futuros
+    fim_busca = min(fim, date.today())
+
+    serie = serie_diaria()
+    if inicio <= fim_busca:
+        for lacuna_inicio, lacuna_fim in intervalos_faltantes(serie, lat, lon, inicio, fim_busca):
+            datas, valores = baixar_intervalo(lat, lon, lacuna_inicio, lacuna_fim)
+            guardar_dias(serie, lat, lon, datas, valores)
+    return serie, lat, lon
+
+
+# Busca na API, em lotes de vários locais, os dias de inicio..fim que faltam para cada local.
+# Locais com a mesma lacuna vão na mesma requisição. Retorna os locais cujo lote falhou.
+def garantir_locais(locais, inicio, fim, trabalhadores=1):
+    fim_busca = min(fim, date.today())
+    if inicio > fim_busca:
+        return []
+
+    serie = serie_diaria()
+    grupos = {}  # lacuna (inicio, fim) -> locais
+    for lat, lon in sorted({arredondar_coordenadas(lat, lon) for lat, lon in locais}):
+        for lacuna in intervalos_faltantes(serie, lat, lon, inicio, fim_busca):
+            grupos.setdefault(lacuna, []).append((lat, lon))
+
+    # Baixa e grava um grupo; retorna os locais que falharam
+    def buscar_grupo(lacuna, grupo):
+        try:
+            resultados = arquivo_diario(grupo, *lacuna)
+        except Exception as e:
+            print(f"Erro ao buscar {len(grupo)} locais de {lacuna[0]} a {lacuna[1]}: {str(e)}")
+            return grupo
+        for (lat, lon), (datas, valores) in zip(grupo, resultados):
+            guardar_dias(serie, lat, lon, datas, valores)
+        return []
+
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        futuros = [executor.submit(buscar_grupo, lacuna, grupo) for lacuna, grupo in grupos.items()]
+        return [local for futuro in futuros for local in futuro.result()]
+
+
+# Retorna (datas, valores) do período como arrays NumPy (datetime64[D] e float64, com
+# NaN nos dias sem dado), buscando na API só o que falta. Dias ainda não buscados
+# (futuros ou recentes sem valor) ficam de fora.
+def obter_precipitacao_arrays(lat, lon, inicio, fim):
+    serie, lat, lon = garantir_periodo(lat, lon, inicio, fim)
+
+    # Lê o período inteiro da série em disco
+    valores = serie.ler(lat, lon, inicio, fim)
+    if valores is None:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype="float64")
+    buscados = ~serie.nao_buscados(lat, lon, inicio, fim)
+    return serie.datas(inicio, fim)[buscados], valores[buscados].astype("float64")
+
+
+# Totais semanais de um mês, lidos da tabela de resumos: lista de (semana, mm)
+def obter_totais_semanais(lat, lon, ano, mes):
+    inicio, fim = date(ano, mes, 1), date(ano, mes, calendar.monthrange(ano, mes)[1])
+    serie, lat, lon = garantir_periodo(lat, lon, inicio, fim)
+    with metricas.etapa("consulta_sqlite"):
+        conn = banco.conectar()
+        try:
+            conferir_resumos(conn, serie, lat, lon, inicio, fim)
+            return consultar_semanal(conn, lat, lon, ano, mes)
+        finally:
+            conn.close()
+
+
+# Totais mensais de ano_inicio..ano_fim, lidos da tabela de resumos: lista de (ano, mês, mm)
+def obter_totais_mensais(lat, lon, ano_inicio, ano_fim):
+    inicio, fim = date(ano_inicio, 1, 1), date(ano_fim, 12, 31)
+    serie, lat, lon = garantir_periodo(lat, lon, inicio, fim)
+    with metricas.etapa("consulta_sqlite"):
+        conn = banco.conectar()
+        try:
+            conferir_resumos(conn, serie, lat, lon, inicio, fim)
+            return consultar_mensal(conn, lat, lon, ano_inicio, ano_fim)
+        finally:
+            conn.close()
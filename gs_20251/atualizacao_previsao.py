@@ -0,0 +1,144 @@
+# Atualização periódica da previsão de chuva (7 dias) de todos os CEPs cadastrados.
+# A grade da Open-Meteo é grossa: vários CEPs caem na mesma célula. Os CEPs são agrupados
+# por célula de TAMANHO_CELULA_PREVISAO graus, cada célula é buscada uma vez (no centro,
+# em lotes de vários locais por requisição) e o resultado é gravado em chuva_semana para
+# todos os CEPs dela. Células atualizadas há menos de um intervalo são puladas, a não
+# ser que tenham ganhado CEPs novos.
+#
+# Exemplos:
+#   python atualizacao_previsao.py --uma-vez
+#   python atualizacao_previsao.py --intervalo 60 --alertar
+import argparse                 # Para ler os parâmetros da linha de comando
+import math                     # Para calcular a célula
+import sys                      # Para o código de saída do programa
+import time                     # Para o agendamento
+
+import banco                    # Banco de dados único
+import metricas                 # Tempo da gravação das previsões
+from indice_espacial import indexar_pendentes  # Coordenadas dos usuários ainda sem lat/lon
+from open_meteo import previsao_diaria          # Previsão de vários locais por requisição
+from alerta_previsao import usuarios_em_alerta  # Limites de chuva da previsão x usuários
+
+# Lado da célula da previsão em graus (~11 km, próximo da resolução dos modelos da Open-Meteo)
+TAMANHO_CELULA_PREVISAO = 0.1
+
+# Intervalo padrão entre atualizações de uma célula (minutos)
+INTERVALO_PADRAO_MIN = 60
+
+# Rodadas por intervalo: CEPs novos esperam no máximo intervalo / RODADAS_POR_INTERVALO
+RODADAS_POR_INTERVALO = 4
+
+
+# Célula da previsão que contém a coordenada
+def celula_previsao(lat, lon):
+    return math.floor(lat / TAMANHO_CELULA_PREVISAO), math.floor(lon / TAMANHO_CELULA_PREVISAO)
+
+
+# Coordenada do centro da célula (ponto consultado na API)
+def centro_celula(celula_lat, celula_lon):
+    return (round((celula_lat + 0.5) * TAMANHO_CELULA_PREVISAO, 4),
+            round((celula_lon + 0.5) * TAMANHO_CELULA_PREVISAO, 4))
+
+
+# CEPs dos usuários com coordenadas, agrupados por célula: {célula: [ceps]}
+def agrupar_por_celula(conn):
+    celulas = {}
+    for cep, lat, lon in conn.execute(
+        "SELECT cep, MIN(latitude), MIN(longitude) FROM usuarios WHERE latitude IS NOT NULL GROUP BY cep"
+    ):
+        celulas.setdefault(celula_previsao(lat, lon), []).append(cep)
+    return celulas
+
+
+# Células que não precisam de atualização: buscadas há menos de `intervalo_s` e sem CEPs novos
+def celulas_em_dia(conn, celulas, intervalo_s, agora):
+    em_dia = set()
+    for celula_lat, celula_lon, ceps in conn.execute(
+        "SELECT celula_lat, celula_lon, ceps FROM previsao_celulas WHERE atualizado_em > ?",
+        (agora - intervalo_s,)
+    ):
+        celula = (celula_lat, celula_lon)
+        if celula in celulas and len(celulas[celula]) <= ceps:
+            em_dia.add(celula)
+    return em_dia
+
+
+# Grava a previsão da célula para todos os CEPs dela e marca a célula como atualizada
+def gravar_celula(conn, celula, ceps, datas, chuvas, agora):
+    with metricas.etapa("gravacao_sqlite"), conn:
+        conn.executemany(
+            'INSERT INTO chuva_semana (cep, data, chuva) VALUES (?, ?, ?) '
+            'ON CONFLICT (cep, data) DO UPDATE SET chuva = excluded.chuva',
+            [(cep, d, c) for cep in ceps for d, c in zip(datas, chuvas)]
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO previsao_celulas (celula_lat, celula_lon, atualizado_em, ceps) VALUES (?, ?, ?, ?)",
+            celula + (agora, len(ceps))
+        )
+    metricas.contar("linhas_gravadas", len(ceps) * len(datas))
+
+
+# Uma rodada: busca as células vencidas. Retorna um dicionário com as contagens.
+def executar_rodada(conn, intervalo_s, indexar=True, agora=None):
+    if indexar:
+        indexar_pendentes(conn)
+    agora = agora or time.time()
+    celulas = agrupar_por_celula(conn)
+    em_dia = celulas_em_dia(conn, celulas, intervalo_s, agora)
+
+    resultado = {'celulas': len(celulas), 'ceps': sum(len(ceps) for ceps in celulas.values()),
+                 'atualizadas': 0, 'puladas': len(em_dia), 'falhas': 0}
+    # Todas as células vencidas em lotes de vários locais por requisição
+    vencidas = [celula for celula in celulas if celula not in em_dia]
+    previsoes = previsao_diaria([centro_celula(*celula) for celula in vencidas])
+    for celula, dados in zip(vencidas, previsoes):
+        if not dados or 'daily' not in dados:
+            resultado['falhas'] += 1
+            continue
+        gravar_celula(conn, celula, celulas[celula], dados['daily']['time'], dados['daily']['precipitation_sum'], agora)
+        resultado['atualizadas'] += 1
+    return resultado
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza a previsão de chuva de todos os CEPs cadastrados.")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_PADRAO_MIN,
+                        help=f"minutos entre atualizações de cada célula (padrão: {INTERVALO_PADRAO_MIN})")
+    parser.add_argument("--uma-vez", action="store_true", help="faz uma rodada e sai")
+    parser.add_argument("--sem-indexar", action="store_true",
+                        help="não geocodifica usuários ainda sem coordenadas antes da rodada")
+    parser.add_argument("--alertar", action="store_true",
+                        help="avalia os alertas de previsão (alerta_previsao.py) depois de cada rodada com atualização")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    if args.intervalo <= 0:
+        print("Erro: o intervalo deve ser maior que zero.")
+        return 1
+    intervalo_s = args.intervalo * 60
+
+    conn = banco.conectar(args.banco)
+    try:
+        while True:
+            inicio = time.time()
+            resultado = executar_rodada(conn, intervalo_s, indexar=not args.sem_indexar)
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} | {resultado['ceps']} CEPs em {resultado['celulas']} células | "
+                  f"atualizadas: {resultado['atualizadas']} | em dia: {resultado['puladas']} | "
+                  f"falhas: {resultado['falhas']} | {time.time() - inicio:.1f}s")
+            if args.alertar and resultado['atualizadas']:
+                alertas = usuarios_em_alerta(conn)
+                resgate = sum(1 for alerta in alertas if alerta['necessita_resgate'] == 'sim')
+                print(f"Alertas de previsão: {len(alertas)} usuário(s), {resgate} precisam de resgate")
+            if args.uma_vez:
+                return 1 if resultado['falhas'] else 0
+            time.sleep(max(0.0, intervalo_s / RODADAS_POR_INTERVALO - (time.time() - inicio)))
+    except KeyboardInterrupt:
+        print("\nAtualização interrompida pelo usuário.")
+        return 0
+    finally:
+        conn.close()
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
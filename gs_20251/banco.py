@@ -0,0 +1,389 @@
+# Banco de dados único do ChuvaSegura: esquema versionado (migrações), fábrica de
+# conexões compartilhada e importação dos arquivos antigos (usuarios.db,
+# alagamentos.db, analise_diaria.db, analise_mensal.db, analise_anual.db, além dos
+# caches cache.db e precipitacao_diaria.db).
+#
+# Exemplos:
+#   python banco.py migrar
+#   python banco.py importar-legado --origem .
+import argparse   # Para ler os parâmetros da linha de comando
+import os         # Para o caminho do banco vindo do ambiente
+import sqlite3    # Banco de dados SQLite
+import sys        # Para o código de saída do programa
+import time       # Para registrar quando cada arquivo antigo foi importado
+
+# Arquivo do banco único (pode ser trocado pela variável de ambiente CHUVASEGURA_DB)
+CAMINHO_BANCO = os.environ.get("CHUVASEGURA_DB", "chuvasegura.db")
+
+# Tempo (s) de espera quando outra conexão está gravando
+TIMEOUT_BANCO = 30
+
+# Tentativas de ligar o modo WAL quando outro processo está criando o banco
+TENTATIVAS_WAL = 100
+
+# Migrações do esquema, em ordem. A versão aplicada fica em PRAGMA user_version.
+# Nunca altere uma migração já publicada: acrescente uma nova no fim da lista.
+MIGRACOES = [
+    (1, "esquema inicial", """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_completo TEXT,
+            cpf TEXT UNIQUE,
+            tipo_deficiencia TEXT,
+            cep TEXT,
+            endereco_completo TEXT,
+            necessita_resgate TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_usuarios_cep ON usuarios (cep);
+
+        CREATE TABLE IF NOT EXISTS relatorios_alagamento (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_reportante TEXT,
+            cpf_reportante TEXT,
+            cep_local TEXT,
+            endereco_alagado TEXT,
+            intensidade_chuva TEXT,
+            nivel_inundacao TEXT,
+            data_hora_registro TEXT,
+            registrado_em INTEGER              -- Segundos desde 1970
+        );
+        CREATE INDEX IF NOT EXISTS idx_relatorios_cep_tempo ON relatorios_alagamento (cep_local, registrado_em);
+        CREATE INDEX IF NOT EXISTS idx_relatorios_tempo ON relatorios_alagamento (registrado_em);
+
+        CREATE TABLE IF NOT EXISTS contagem_alertas (
+            cep_local TEXT,                    -- CEP do relato
+            balde INTEGER,                     -- Início do minuto (segundos desde 1970)
+            total INTEGER,                     -- Quantidade de relatos no minuto
+            peso REAL,                         -- Soma dos pesos dos relatos no minuto
+            PRIMARY KEY (cep_local, balde)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_contagem_alertas_balde ON contagem_alertas (balde);
+
+        CREATE TABLE IF NOT EXISTS chuva_semana (
+            cep TEXT,
+            data TEXT,
+            chuva REAL,
+            PRIMARY KEY (cep, data)
+        );
+
+        CREATE TABLE IF NOT EXISTS precipitacao_mensal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cep TEXT,
+            ano INTEGER,
+            mes INTEGER,
+            semana INTEGER,
+            precipitacao_mm REAL,
+            latitude REAL,
+            longitude REAL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_precipitacao_mensal_chave ON precipitacao_mensal (cep, ano, mes, semana);
+
+        CREATE TABLE IF NOT EXISTS precipitacao_anual (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cep TEXT,
+            ano INTEGER,
+            mes INTEGER,
+            precipitacao_mm REAL,
+            latitude REAL,
+            longitude REAL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_precipitacao_anual_chave ON precipitacao_anual (cep, ano, mes);
+
+        CREATE TABLE IF NOT EXISTS precipitacao_diaria (
+            latitude REAL,                     -- Latitude arredondada
+            longitude REAL,                    -- Longitude arredondada
+            data TEXT,                         -- Dia (AAAA-MM-DD)
+            precipitacao_mm REAL,              -- NULL = sem dado na API
+            PRIMARY KEY (latitude, longitude, data)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS importacoes_legado (
+            arquivo TEXT PRIMARY KEY,          -- Nome do arquivo antigo já importado
+            importado_em REAL
+        );
+    """),
+    (2, "coordenadas e célula da grade espacial de usuários e relatos", """
+        ALTER TABLE usuarios ADD COLUMN latitude REAL;
+        ALTER TABLE usuarios ADD COLUMN longitude REAL;
+        ALTER TABLE usuarios ADD COLUMN celula_lat INTEGER;
+        ALTER TABLE usuarios ADD COLUMN celula_lon INTEGER;
+        -- Índice parcial: o despacho só procura quem precisa de resgate
+        CREATE INDEX idx_usuarios_resgate_celula ON usuarios (celula_lat, celula_lon)
+            WHERE necessita_resgate = 'sim';
+
+        ALTER TABLE relatorios_alagamento ADD COLUMN latitude REAL;
+        ALTER TABLE relatorios_alagamento ADD COLUMN longitude REAL;
+        ALTER TABLE relatorios_alagamento ADD COLUMN celula_lat INTEGER;
+        ALTER TABLE relatorios_alagamento ADD COLUMN celula_lon INTEGER;
+        CREATE INDEX idx_relatorios_celula_tempo ON relatorios_alagamento (celula_lat, celula_lon, registrado_em);
+    """),
+    (3, "índices por período das tabelas dos gráficos", """
+        -- Consultas por período sem CEP, já na ordem (período, CEP); com CEP, a chave única atende
+        CREATE INDEX idx_chuva_semana_data ON chuva_semana (data, cep);
+        CREATE INDEX idx_precipitacao_mensal_periodo ON precipitacao_mensal (ano, mes, semana, cep);
+        CREATE INDEX idx_precipitacao_anual_periodo ON precipitacao_anual (ano, mes, cep);
+    """),
+    (4, "índice dos locais das séries temporais em disco", """
+        CREATE TABLE serie_locais (
+            serie TEXT,                        -- Nome da série (arquivo <serie>.f32)
+            latitude REAL,                     -- Latitude arredondada
+            longitude REAL,                    -- Longitude arredondada
+            linha INTEGER,                     -- Linha do local no arquivo
+            PRIMARY KEY (serie, latitude, longitude),
+            UNIQUE (serie, linha)
+        ) WITHOUT ROWID;
+    """),
+    (5, "resumos por semana, mês e ano e climatologia mensal", """
+        CREATE TABLE resumo_semanal (
+            latitude REAL,
+            longitude REAL,
+            ano INTEGER,
+            mes INTEGER,
+            semana INTEGER,                    -- Semana do mês (1 = dias 1 a 7, ..., 5 = dias 29 a 31)
+            soma REAL,
+            maximo REAL,                       -- Maior valor diário
+            dias_chuvosos INTEGER,
+            dias_validos INTEGER,
+            PRIMARY KEY (latitude, longitude, ano, mes, semana)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE resumo_mensal (
+            latitude REAL,
+            longitude REAL,
+            ano INTEGER,
+            mes INTEGER,
+            soma REAL,
+            maximo REAL,
+            dias_chuvosos INTEGER,
+            dias_validos INTEGER,
+            dias INTEGER,                      -- Dias já buscados (com ou sem dado)
+            completo INTEGER,                  -- 1 se todos os dias do mês foram buscados
+            PRIMARY KEY (latitude, longitude, ano, mes)
+        ) WITHOUT ROWID;
+        CREATE INDEX idx_resumo_mensal_climatologia ON resumo_mensal (latitude, longitude, mes) WHERE completo = 1;
+
+        CREATE TABLE resumo_anual (
+            latitude REAL,
+            longitude REAL,
+            ano INTEGER,
+            soma REAL,
+            maximo REAL,
+            dias_chuvosos INTEGER,
+            dias_validos INTEGER,
+            dias INTEGER,
+            PRIMARY KEY (latitude, longitude, ano)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE climatologia_mensal (
+            latitude REAL,
+            longitude REAL,
+            mes INTEGER,                       -- Mês do calendário (1 a 12)
+            anos INTEGER,                      -- Meses completos usados
+            media REAL,
+            p10 REAL,
+            p50 REAL,
+            p90 REAL,
+            PRIMARY KEY (latitude, longitude, mes)
+        ) WITHOUT ROWID;
+    """),
+    (6, "controle da atualização da previsão por célula", """
+        CREATE TABLE previsao_celulas (
+            celula_lat INTEGER,                -- Célula da previsão (atualizacao_previsao.py)
+            celula_lon INTEGER,
+            atualizado_em REAL,                -- Segundos desde 1970 da última busca bem-sucedida
+            ceps INTEGER,                      -- CEPs da célula naquela busca
+            PRIMARY KEY (celula_lat, celula_lon)
+        ) WITHOUT ROWID;
+    """),
+    (7, "número de alteração das contagens de alerta", """
+        -- Maior número = alteração mais recente; o motor de alertas lê só as linhas alteradas
+        ALTER TABLE contagem_alertas ADD COLUMN alteracao INTEGER NOT NULL DEFAULT 0;
+        CREATE INDEX idx_contagem_alertas_alteracao ON contagem_alertas (alteracao);
+    """),
+    (8, "tabelas dos caches de endereço e de geocodificação", """
+        -- IF NOT EXISTS: bancos antigos já têm as tabelas, criadas no primeiro uso do cache
+        CREATE TABLE IF NOT EXISTS cache_endereco (
+            chave TEXT PRIMARY KEY,            -- CEP
+            valor TEXT,                        -- Endereço em JSON (null = CEP inexistente)
+            expira_em REAL                     -- Segundos desde 1970
+        );
+        CREATE TABLE IF NOT EXISTS cache_geocodificacao (
+            chave TEXT PRIMARY KEY,            -- CEP
+            valor TEXT,                        -- [latitude, longitude] em JSON (null = não encontrado)
+            expira_em REAL
+        );
+    """),
+]
+
+
+# Divide um script SQL em comandos (sqlite3.complete_statement sabe onde cada um termina)
+def _comandos(script):
+    comandos, atual = [], ""
+    for parte in script.split(";"):
+        atual += parte + ";"
+        if sqlite3.complete_statement(atual):
+            if atual.strip(" \t\r\n;"):
+                comandos.append(atual.strip())
+            atual = ""
+    return comandos
+
+
+# Aplica as migrações que ainda não foram aplicadas neste banco. Vários processos podem
+# abrir um banco novo ao mesmo tempo: cada migração roda com a trava de escrita
+# (BEGIN IMMEDIATE) e a versão é lida de novo dentro dela, então quem chega depois
+# só encontra a migração pronta e segue.
+def migrar(conn):
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= MIGRACOES[-1][0]:
+        return  # Caminho comum: banco já atualizado, sem travar nada
+    if conn.in_transaction:
+        conn.commit()
+    for numero, descricao, sql in MIGRACOES:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= numero:
+                conn.execute("COMMIT")
+                continue
+            # Cada migração é atômica: esquema + número da versão na mesma transação
+            for comando in _comandos(sql):
+                conn.execute(comando)
+            conn.execute(f"PRAGMA user_version = {numero}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Na saída de erros: a saída normal pode ser JSON (ex.: alerta_previsao.py --json)
+        print(f"Banco migrado para a versão {numero}: {descricao}", file=sys.stderr)
+
+
+# Fábrica de conexões usada por todos os módulos (WAL, espera por travas e esquema atualizado)
+def conectar(caminho=None, check_same_thread=True):
+    conn = sqlite3.connect(caminho or CAMINHO_BANCO, timeout=TIMEOUT_BANCO,
+                           check_same_thread=check_same_thread)
+    # Em um banco novo, dois processos podem trocar para WAL ao mesmo tempo; um deles
+    # recebe "database is locked" na hora (o SQLite não espera nesse impasse)
+    for tentativa in range(TENTATIVAS_WAL):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            break
+        except sqlite3.OperationalError:
+            if tentativa == TENTATIVAS_WAL - 1:
+                raise
+            time.sleep(0.05)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    migrar(conn)
+    return conn
+
+
+# Colunas de uma tabela de um banco anexado (lista vazia se a tabela não existir)
+def _colunas(conn, esquema, tabela):
+    return [linha[1] for linha in conn.execute(f"PRAGMA {esquema}.table_info({tabela})")]
+
+
+# Cópia de cada arquivo antigo: tabela de origem -> comandos de importação
+# (CEPs sem hífen e, nas tabelas sem chave única, só a linha mais recente de cada chave)
+IMPORTACOES_LEGADO = {
+    "usuarios.db": ["""
+        INSERT OR IGNORE INTO usuarios (nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, necessita_resgate)
+        SELECT nome_completo, cpf, tipo_deficiencia, REPLACE(cep, '-', ''), endereco_completo, necessita_resgate
+        FROM legado.usuarios ORDER BY id
+    """],
+    "alagamentos.db": ["""
+        INSERT INTO relatorios_alagamento (nome_reportante, cpf_reportante, cep_local, endereco_alagado,
+            intensidade_chuva, nivel_inundacao, data_hora_registro, registrado_em)
+        SELECT nome_reportante, cpf_reportante, REPLACE(cep_local, '-', ''), endereco_alagado,
+            intensidade_chuva, nivel_inundacao, data_hora_registro,
+            CAST(strftime('%s', data_hora_registro, 'utc') AS INTEGER)
+        FROM legado.relatorios_alagamento ORDER BY id
+    """],
+    "analise_diaria.db": ["""
+        INSERT OR REPLACE INTO chuva_semana (cep, data, chuva)
+        SELECT REPLACE(cep, '-', ''), data, chuva FROM legado.chuva_semana ORDER BY rowid
+    """],
+    "analise_mensal.db": ["""
+        INSERT OR REPLACE INTO precipitacao_mensal (cep, ano, mes, semana, precipitacao_mm, latitude, longitude)
+        SELECT REPLACE(cep, '-', ''), ano, mes, semana, precipitacao_mm, latitude, longitude
+        FROM legado.precipitacao_mensal ORDER BY id
+    """],
+    "analise_anual.db": ["""
+        INSERT OR REPLACE INTO precipitacao_anual (cep, ano, mes, precipitacao_mm, latitude, longitude)
+        SELECT REPLACE(cep, '-', ''), ano, mes, precipitacao_mm, latitude, longitude
+        FROM legado.precipitacao_anual ORDER BY id
+    """],
+    "precipitacao_diaria.db": ["""
+        INSERT OR IGNORE INTO precipitacao_diaria (latitude, longitude, data, precipitacao_mm)
+        SELECT latitude, longitude, data, precipitacao_mm FROM legado.precipitacao_diaria
+    """],
+}
+
+# Tabelas de cache (criadas pela migração 8) copiadas do antigo cache.db
+TABELAS_CACHE_LEGADO = ["cache_geocodificacao", "cache_endereco"]
+
+
+# Importa os arquivos antigos encontrados em `origem` (cada arquivo só uma vez)
+def importar_legado(origem=".", conn=None):
+    conn = conn or conectar()
+    importados = []
+
+    arquivos = list(IMPORTACOES_LEGADO) + ["cache.db"]
+    for arquivo in arquivos:
+        caminho = os.path.join(origem, arquivo)
+        if not os.path.exists(caminho):
+            continue
+        if conn.execute("SELECT 1 FROM importacoes_legado WHERE arquivo = ?", (arquivo,)).fetchone():
+            print(f"{arquivo}: já importado, ignorado.")
+            continue
+
+        conn.execute("ATTACH DATABASE ? AS legado", (caminho,))
+        try:
+            with conn:
+                if arquivo == "cache.db":
+                    for tabela in TABELAS_CACHE_LEGADO:
+                        if not _colunas(conn, "legado", tabela):
+                            continue
+                        conn.execute(f"INSERT OR IGNORE INTO {tabela} SELECT chave, valor, expira_em FROM legado.{tabela}")
+                else:
+                    for comando in IMPORTACOES_LEGADO[arquivo]:
+                        conn.execute(comando)
+                conn.execute("INSERT INTO importacoes_legado (arquivo, importado_em) VALUES (?, ?)",
+                             (arquivo, time.time()))
+        except sqlite3.OperationalError as erro:
+            # Arquivo sem a tabela esperada (ex.: banco vazio): registra e segue
+            print(f"{arquivo}: não importado ({erro}).")
+        else:
+            importados.append(arquivo)
+            print(f"{arquivo}: importado.")
+        finally:
+            conn.execute("DETACH DATABASE legado")
+
+    # Relatos recentes importados passam a contar nos alertas
+    if "alagamentos.db" in importados:
+        from alertas import semear_contagem
+        semear_contagem(conn)
+
+    return importados
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de dados único do ChuvaSegura.")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {CAMINHO_BANCO})")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    subcomandos.add_parser("migrar", help="cria o banco ou aplica as migrações pendentes")
+    legado = subcomandos.add_parser("importar-legado", help="importa os arquivos .db antigos")
+    legado.add_argument("--origem", default=".", help="pasta dos arquivos antigos (padrão: atual)")
+    args = parser.parse_args(argv)
+
+    conn = conectar(args.banco)
+    try:
+        if args.comando == "importar-legado":
+            importar_legado(args.origem, conn)
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+        print(f"Banco {args.banco or CAMINHO_BANCO} na versão {versao}.")
+    finally:
+        conn.close()
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
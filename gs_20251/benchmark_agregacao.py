@@ -0,0 +1,101 @@
+# Micro-benchmark da agregação: caminho antigo (DataFrame + coluna nova + groupby)
+# contra as funções atuais do projeto (agregar_por_meses, agregar_por_semanas e
+# agregacao.agregar_por_ano_mes), que usam arrays NumPy, com dados sintéticos.
+# Também confere que os dois caminhos dão o mesmo resultado.
+#
+# Exemplo:
+#   python benchmark_agregacao.py --repeticoes 2000
+import argparse                 # Para ler os parâmetros da linha de comando
+import sys                      # Para o código de saída do programa
+import time                     # Para medir o tempo
+
+import numpy as np              # Dados sintéticos
+import pandas as pd             # Caminho antigo
+
+from agregacao import agregar_por_mes, agregar_por_ano_mes
+from gráfico_anual import agregar_por_meses      # Caminho atual do gráfico anual
+from gráfico_mensal import agregar_por_semanas   # Caminho atual do gráfico mensal
+
+
+# Caminhos antigos com pandas (como eram em gráfico_anual.py, gráfico_mensal.py e lote_anual.py)
+def meses_pandas(df):
+    df["month"] = df["date"].dt.month
+    return df.groupby("month")["precipitation"].sum().reset_index()
+
+
+def semanas_pandas(df):
+    primeira_data = df["date"].min()
+    df["week_num"] = ((df["date"] - primeira_data).dt.days // 7) + 1
+    return df.groupby("week_num")["precipitation"].sum().reset_index()
+
+
+def ano_mes_pandas(df):
+    return df.groupby([df["date"].dt.year, df["date"].dt.month])["precipitation"].sum()
+
+
+# Série diária sintética: chuva em ~40% dos dias e alguns dias sem dado (NaN)
+def gerar_dados(inicio, dias, semente=0):
+    gerador = np.random.default_rng(semente)
+    datas = np.arange(np.datetime64(inicio), np.datetime64(inicio) + dias, dtype="datetime64[D]")
+    valores = np.where(gerador.random(dias) < 0.4, gerador.gamma(0.8, 12.0, dias), 0.0)
+    valores[gerador.random(dias) < 0.02] = np.nan
+    return datas, valores
+
+
+# DataFrame diário no formato que as funções dos gráficos recebem
+def montar_df(datas, valores):
+    return pd.DataFrame({"date": datas.astype("datetime64[ns]"), "precipitation": valores})
+
+
+# Tempo médio (µs) de uma chamada
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Compara a agregação com pandas e com NumPy (bincount).")
+    parser.add_argument("--repeticoes", type=int, default=1000, help="chamadas por caso (padrão: 1000)")
+    args = parser.parse_args(argv)
+
+    datas_ano, valores_ano = gerar_dados("2023-01-01", 365)
+    datas_mes, valores_mes = gerar_dados("2023-03-01", 31, semente=1)
+    datas_lote, valores_lote = gerar_dados("1990-01-01", 34 * 365, semente=2)
+
+    # Casos: (nome, datas, valores, caminho antigo, caminho atual); os dois devolvem as somas.
+    # Os caminhos dos gráficos recebem o DataFrame montado a partir dos dados, como no programa.
+    casos = [
+        ("anual (por mês, 365 dias)", datas_ano, valores_ano,
+         lambda d, v: meses_pandas(montar_df(d, v))["precipitation"],
+         lambda d, v: agregar_por_meses(montar_df(d, v))["precipitation"]),
+        ("mensal (por semana, 31 dias)", datas_mes, valores_mes,
+         lambda d, v: semanas_pandas(montar_df(d, v))["precipitation"],
+         lambda d, v: agregar_por_semanas(montar_df(d, v))["precipitation"]),
+        ("lote (ano/mês, 34 anos)", datas_lote, valores_lote,
+         lambda d, v: ano_mes_pandas(montar_df(d, v)),
+         lambda d, v: agregar_por_ano_mes(d, v)[2]["soma"]),
+    ]
+
+    print(f"{'caso':<32}{'pandas (µs)':>14}{'numpy (µs)':>14}{'ganho':>8}")
+    for nome, datas, valores, antigo, atual in casos:
+        if not np.allclose(np.asarray(antigo(datas, valores), dtype="float64"),
+                           np.asarray(atual(datas, valores), dtype="float64")):
+            print(f"Erro: resultados diferentes no caso {nome}")
+            return 1
+
+        tempo_antigo = cronometrar(lambda: antigo(datas, valores), args.repeticoes)
+        tempo_novo = cronometrar(lambda: atual(datas, valores), args.repeticoes)
+        print(f"{nome:<32}{tempo_antigo:>14.1f}{tempo_novo:>14.1f}{tempo_antigo / tempo_novo:>7.1f}x")
+
+    # Estatísticas extras (uma chamada) só para mostrar o formato
+    meses, estatisticas = agregar_por_mes(datas_ano, valores_ano, ("soma", "maximo", "dias_chuvosos"))
+    print(f"\nExemplo (2023): meses {meses.tolist()}")
+    print(f"dias chuvosos: {estatisticas['dias_chuvosos'].tolist()}")
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,78 @@
+# Mede o tempo de inicialização dos comandos do ChuvaSegura (processo novo a cada vez,
+# como num script de shell). Usa um banco temporário e não acessa a rede.
+#
+# Exemplos:
+#   python benchmark_inicializacao.py
+#   python benchmark_inicializacao.py --repeticoes 20 --detalhar alerta
+import argparse                 # Para ler os parâmetros da linha de comando
+import os                       # Para o ambiente dos processos filhos
+import statistics               # Mediana dos tempos
+import subprocess               # Para rodar cada comando em um processo novo
+import sys                      # Caminho do interpretador Python
+import tempfile                 # Pasta do banco temporário
+import time                     # Para medir o tempo
+
+# Pasta deste arquivo (onde estão os módulos do projeto)
+PASTA = os.path.dirname(os.path.abspath(__file__))
+
+# Comandos medidos: nome -> argumentos do Python
+COMANDOS = {
+    "python (referência)": ["-c", "pass"],
+    "ajuda": ["chuvasegura.py", "--help"],
+    "alerta": ["chuvasegura.py", "alerta", "01001000"],
+    "consultar": ["chuvasegura.py", "consultar", "anual", "--limite", "1", "--formato", "jsonl"],
+    "importar tudo (antes)": ["-c", "import cadastro_report, consulta_bc_graficos, graficos_diário, "
+                                    "gráfico_mensal, gráfico_anual, matplotlib.pyplot, geopy"],
+}
+
+
+# Roda o comando várias vezes e retorna os tempos em ms
+def medir(argumentos, repeticoes, ambiente):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable] + argumentos, cwd=PASTA, env=ambiente,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+# Mostra os módulos que mais pesam na importação de um comando (python -X importtime)
+def detalhar(argumentos, ambiente, quantidade=15):
+    resultado = subprocess.run([sys.executable, "-X", "importtime"] + argumentos, cwd=PASTA, env=ambiente,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        partes = linha.split("|")
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            linhas.append((int(partes[1]), partes[2].rstrip()))
+    linhas.sort(reverse=True)
+    print(f"\nImportações mais caras (acumulado, ms):")
+    for acumulado, modulo in linhas[:quantidade]:
+        print(f"{acumulado / 1000:8.1f} {modulo}")
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de inicialização dos comandos do ChuvaSegura.")
+    parser.add_argument("--repeticoes", type=int, default=10, help="execuções por comando (padrão: 10)")
+    parser.add_argument("--detalhar", choices=list(COMANDOS), help="mostra as importações mais caras do comando")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        ambiente = dict(os.environ, CHUVASEGURA_DB=os.path.join(pasta_temporaria, "benchmark.db"))
+        # Cria e migra o banco antes, para não medir a migração
+        subprocess.run([sys.executable, "banco.py", "migrar"], cwd=PASTA, env=ambiente, stdout=subprocess.DEVNULL)
+
+        print(f"{'comando':<24}{'mediana (ms)':>14}{'mínimo (ms)':>14}")
+        for nome, argumentos in COMANDOS.items():
+            tempos = medir(argumentos, args.repeticoes, ambiente)
+            print(f"{nome:<24}{statistics.median(tempos):>14.1f}{min(tempos):>14.1f}")
+
+        if args.detalhar:
+            detalhar(COMANDOS[args.detalhar], ambiente)
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,384 @@
+# Benchmark de ponta a ponta sem rede: sobe a ViaCEP, o Nominatim e a Open-Meteo falsos
+# (servidores_falsos.py, com latência configurável), gera dados sintéticos
+# (dados_sinteticos.py) em um banco temporário e mede:
+#   - apis:      latência das consultas de CEP, geocodificação e previsão em lote;
+#   - ingestao:  vazão da ingestão de chuva diária (décadas), horária e de relatos (CSV);
+#   - agregacao: consulta dos resumos, reconstrução dos resumos e agregação NumPy;
+#   - alertas:   motor de alertas, CEPs em alerta, alertas de previsão e despacho;
+#   - graficos:  tempo de desenho e gravação dos gráficos diário, mensal e anual.
+# Os resultados são comparados com uma base (JSON); a primeira execução grava a base.
+# Sai com código 1 se alguma métrica piorar mais que a tolerância.
+#
+# Exemplos:
+#   python benchmark_offline.py
+#   python benchmark_offline.py --rapido --cenarios alertas graficos
+#   python benchmark_offline.py --latencia 200 --cauda 0.05 --cauda-ms 2000 --base base_tempestade.json
+#   python benchmark_offline.py --atualizar-base
+import argparse                 # Para ler os parâmetros da linha de comando
+import contextlib               # Para esconder as mensagens dos módulos durante as medições
+import csv                      # Arquivo de relatos para a importação
+import io                       # Saída capturada
+import json                     # Base e resultados
+import os                       # Caminhos e ambiente
+import platform                 # Máquina em que a base foi gravada
+import shutil                   # Remoção da pasta temporária
+import sys                      # Para o código de saída do programa
+import tempfile                 # Pasta do banco temporário
+import time                     # Para medir o tempo
+from datetime import date, datetime
+
+import numpy as np              # Percentis
+
+# Pasta deste arquivo (onde fica a base padrão)
+PASTA = os.path.dirname(os.path.abspath(__file__))
+
+# Arquivo padrão da base (fora do git, no .gitignore: cada máquina grava a sua)
+BASE_PADRAO = os.path.join(PASTA, "benchmark_base.json")
+
+# Cenários, na ordem em que rodam (os seguintes usam os dados dos anteriores)
+CENARIOS = ("apis", "ingestao", "agregacao", "alertas", "graficos")
+
+# Piora tolerada em relação à base (0.25 = 25%)
+TOLERANCIA_PADRAO = 0.25
+
+# Tamanhos dos dados: normal e rápido (--rapido)
+TAMANHOS = {
+    'normal': {'ceps': 2000, 'usuarios': 20000, 'relatos': 20000, 'locais': 20, 'anos': 30,
+               'consultas_api': 50, 'graficos': 10, 'repeticoes': 10000},
+    'rapido': {'ceps': 200, 'usuarios': 2000, 'relatos': 2000, 'locais': 4, 'anos': 5,
+               'consultas_api': 10, 'graficos': 3, 'repeticoes': 1000},
+}
+
+
+# Resultados de uma execução: nome -> {valor, unidade, maior_melhor}
+class Resultados:
+    def __init__(self):
+        self.metricas = {}
+
+    def registrar(self, nome, valor, unidade, maior_melhor=False):
+        self.metricas[nome] = {'valor': round(float(valor), 4), 'unidade': unidade, 'maior_melhor': maior_melhor}
+
+    # Percentis 50 e 95 de uma lista de tempos
+    def registrar_tempos(self, nome, tempos, unidade="ms"):
+        self.registrar(f"{nome}_p50_{unidade}", np.percentile(tempos, 50), unidade)
+        self.registrar(f"{nome}_p95_{unidade}", np.percentile(tempos, 95), unidade)
+
+
+# Tempo (ms) de cada chamada de `funcao(item)` para os itens dados
+def cronometrar(funcao, itens, escala=1000):
+    tempos = []
+    for item in itens:
+        inicio = time.perf_counter()
+        funcao(item)
+        tempos.append((time.perf_counter() - inicio) * escala)
+    return tempos
+
+
+# Roda um bloco escondendo as mensagens dos módulos (mostradas só se der erro)
+@contextlib.contextmanager
+def silencioso():
+    saida = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(saida), contextlib.redirect_stderr(saida):
+            yield
+    except Exception:
+        print(saida.getvalue(), end="")
+        raise
+
+
+# Período das décadas de chuva: os `anos` anos completos antes do ano atual
+def periodo_chuva(anos):
+    ultimo = date.today().year - 1
+    return date(ultimo - anos + 1, 1, 1), date(ultimo, 12, 31)
+
+
+# Latência das APIs (consultas novas, sem cache)
+def cenario_apis(contexto, resultados):
+    import cadastro_report
+    from geocodificacao import obter_lat_lon_por_cep
+    from open_meteo import previsao_diaria
+    from dados_sinteticos import gerar_ceps, coordenadas_cep
+
+    ceps = gerar_ceps(contexto['tamanhos']['consultas_api'], semente=101)
+    with silencioso():
+        resultados.registrar_tempos("apis.viacep", cronometrar(cadastro_report.consultar_endereco, ceps))
+        resultados.registrar_tempos("apis.nominatim", cronometrar(obter_lat_lon_por_cep, ceps))
+        # Previsão de todos os CEPs do cenário em lotes (vários locais por requisição)
+        locais = [coordenadas_cep(cep) for cep in contexto['ceps']]
+        inicio = time.perf_counter()
+        previsao_diaria(locais)
+    resultados.registrar("apis.previsao_lote_ms", (time.perf_counter() - inicio) * 1000, "ms")
+
+
+# Ingestão: décadas de chuva diária dos locais, um ano de chuva horária e os relatos (CSV)
+def cenario_ingestao(contexto, resultados):
+    import cadastro_report
+    import importacao
+    from armazem_precipitacao import garantir_locais
+    from precipitacao_horaria import obter_maximos_horarios
+    from dados_sinteticos import endereco_cep, NIVEIS, INTENSIDADES
+
+    inicio_chuva, fim_chuva = periodo_chuva(contexto['tamanhos']['anos'])
+    dias = (fim_chuva - inicio_chuva).days + 1
+    with silencioso():
+        inicio = time.perf_counter()
+        falhas = garantir_locais(contexto['locais'], inicio_chuva, fim_chuva, trabalhadores=4)
+        duracao = time.perf_counter() - inicio
+    if falhas:
+        raise RuntimeError(f"{len(falhas)} locais falharam na ingestão")
+    resultados.registrar("ingestao.chuva_diaria_dias_por_s", len(contexto['locais']) * dias / duracao,
+                         "dias/s", maior_melhor=True)
+
+    lat, lon = contexto['locais'][0]
+    with silencioso():
+        inicio = time.perf_counter()
+        obter_maximos_horarios(lat, lon, date(fim_chuva.year, 1, 1), fim_chuva)
+    resultados.registrar("ingestao.chuva_horaria_ano_ms", (time.perf_counter() - inicio) * 1000, "ms")
+
+    # Relatos em CSV, pela importação em massa (validação + gravação em lotes). Os endereços
+    # já ficam no cache: a latência da ViaCEP é medida no cenário apis.
+    for cep in contexto['ceps']:
+        endereco = endereco_cep(cep)
+        cadastro_report.cache_endereco.guardar(
+            cep, f"{endereco['logradouro']}, {endereco['bairro']}, {endereco['localidade']} - {endereco['uf']}")
+    caminho = os.path.join(contexto['pasta'], "relatos.csv")
+    gerador = np.random.default_rng(7)
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["nome_reportante", "cpf_reportante", "cep_local", "intensidade_chuva",
+                           "nivel_inundacao", "data_hora_registro"])
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for i in range(contexto['tamanhos']['relatos']):
+            cep = contexto['ceps'][gerador.integers(len(contexto['ceps']))]
+            escritor.writerow([f"Reportante {i}", f"{i:011d}", cep, INTENSIDADES[i % 3], NIVEIS[i % 3], agora])
+    with silencioso():
+        inicio = time.perf_counter()
+        gravadas, _, recusadas = importacao.importar("relatorios", caminho, "csv",
+                                                     os.path.join(contexto['pasta'], "rejeitados.csv"))
+        duracao = time.perf_counter() - inicio
+    if recusadas:
+        raise RuntimeError(f"{recusadas} relatos recusados na importação")
+    resultados.registrar("ingestao.relatos_por_s", gravadas / duracao, "relatos/s", maior_melhor=True)
+
+
+# Agregação: totais mensais das décadas (resumos), reconstrução dos resumos e agregação NumPy
+def cenario_agregacao(contexto, resultados):
+    import resumos
+    from agregacao import agregar_por_ano_mes
+    from armazem_precipitacao import obter_totais_mensais, obter_precipitacao_arrays, serie_diaria
+
+    inicio_chuva, fim_chuva = periodo_chuva(contexto['tamanhos']['anos'])
+    with silencioso():
+        tempos = cronometrar(lambda local: obter_totais_mensais(local[0], local[1], inicio_chuva.year, fim_chuva.year),
+                             contexto['locais'])
+        resultados.registrar_tempos("agregacao.totais_mensais", tempos)
+
+        inicio = time.perf_counter()
+        locais = resumos.reconstruir(serie_diaria())
+        resultados.registrar("agregacao.reconstruir_resumos_ms_por_local",
+                             (time.perf_counter() - inicio) * 1000 / max(locais, 1), "ms")
+
+        datas, valores = obter_precipitacao_arrays(*contexto['locais'][0], inicio_chuva, fim_chuva)
+    tempos = cronometrar(lambda _: agregar_por_ano_mes(datas, valores), range(200))
+    resultados.registrar_tempos("agregacao.numpy_ano_mes", tempos)
+
+
+# Alertas: usuários, relatos e previsões sintéticos; motor, CEPs em alerta, previsão e despacho
+def cenario_alertas(contexto, resultados):
+    import banco
+    import despacho
+    from alertas import MotorAlertas
+    from alerta_previsao import usuarios_em_alerta
+    from dados_sinteticos import gerar_usuarios, gerar_relatos, gerar_previsoes
+
+    tamanhos = contexto['tamanhos']
+    conn = banco.conectar()
+    try:
+        with silencioso():
+            gerar_usuarios(conn, tamanhos['usuarios'], contexto['ceps'], semente=3)
+            gerar_relatos(conn, tamanhos['relatos'], contexto['ceps'], semente=4)
+            gerar_previsoes(conn, contexto['ceps'])
+
+            inicio = time.perf_counter()
+            motor = MotorAlertas(conn)
+            resultados.registrar("alertas.carregar_motor_ms", (time.perf_counter() - inicio) * 1000, "ms")
+
+            gerador = np.random.default_rng(5)
+            ceps = [contexto['ceps'][i] for i in gerador.integers(0, len(contexto['ceps']), tamanhos['repeticoes'])]
+            resultados.registrar_tempos("alertas.contar", cronometrar(lambda cep: motor.contar(cep, '6h'), ceps,
+                                                                      escala=1e6), unidade="us")
+            resultados.registrar_tempos("alertas.ceps_em_alerta",
+                                        cronometrar(lambda _: motor.ceps_em_alerta('hoje'), range(20)))
+            resultados.registrar_tempos("alertas.previsao", cronometrar(lambda _: usuarios_em_alerta(conn), range(5)))
+            # Uma chamada antes: os CEPs de relatos sem coordenadas são geocodificados só na primeira
+            despacho.usuarios_para_resgate(conn, 5.0, 'hoje', motor)
+            resultados.registrar_tempos("alertas.despacho",
+                                        cronometrar(lambda _: despacho.usuarios_para_resgate(conn, 5.0, 'hoje', motor),
+                                                    range(5)))
+    finally:
+        conn.close()
+
+
+# Gráficos: desenho e gravação em PNG (backend Agg, sem janela)
+def cenario_graficos(contexto, resultados):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from graficos_diário import buscar_chuva, desenhar_previsao
+    from gráfico_mensal import obter_totais_do_mes, desenhar_grafico_semanal
+    from gráfico_anual import obter_totais_do_ano, desenhar_grafico_mensal
+
+    _, fim_chuva = periodo_chuva(contexto['tamanhos']['anos'])
+    locais = (contexto['locais'] * contexto['tamanhos']['graficos'])[:contexto['tamanhos']['graficos']]
+    pasta = os.path.join(contexto['pasta'], "graficos")
+    os.makedirs(pasta, exist_ok=True)
+
+    with silencioso():
+        dados = [(buscar_chuva(lat, lon), obter_totais_do_mes(lat, lon, fim_chuva.year, 1),
+                  obter_totais_do_ano(lat, lon, fim_chuva.year)) for lat, lon in locais]
+
+    # Desenha e salva uma figura; o tempo inclui o savefig, onde o matplotlib desenha de fato
+    def salvar(desenhar, tamanho, nome):
+        fig = Figure(figsize=tamanho) if tamanho else Figure()
+        desenhar(fig.subplots())
+        fig.savefig(os.path.join(pasta, f"{nome}.png"))
+
+    indices = range(len(dados))
+    resultados.registrar_tempos("graficos.diario", cronometrar(
+        lambda i: salvar(lambda ax: desenhar_previsao(ax, dados[i][0]['daily']['time'],
+                                                      dados[i][0]['daily']['precipitation_sum'], "01001000"),
+                         (10, 5), f"diario_{i}"), indices))
+    resultados.registrar_tempos("graficos.mensal", cronometrar(
+        lambda i: salvar(lambda ax: desenhar_grafico_semanal(ax, dados[i][1], 1, fim_chuva.year, "01001000"),
+                         None, f"mensal_{i}"), indices))
+    resultados.registrar_tempos("graficos.anual", cronometrar(
+        lambda i: salvar(lambda ax: desenhar_grafico_mensal(ax, dados[i][2], fim_chuva.year, "01001000"),
+                         None, f"anual_{i}"), indices))
+
+
+FUNCOES_CENARIOS = {
+    "apis": cenario_apis,
+    "ingestao": cenario_ingestao,
+    "agregacao": cenario_agregacao,
+    "alertas": cenario_alertas,
+    "graficos": cenario_graficos,
+}
+
+
+# Compara com a base: lista de (métrica, base, atual, variação, situação).
+# Variação positiva = pior (mais lento ou menos vazão).
+def comparar(base, atual, tolerancia):
+    linhas = []
+    for nome, dados in atual.items():
+        anterior = base.get(nome)
+        if anterior is None or anterior['valor'] == 0 or dados['valor'] == 0:
+            linhas.append((nome, None, dados['valor'], None, "nova"))
+            continue
+        if dados['maior_melhor']:
+            variacao = anterior['valor'] / dados['valor'] - 1
+        else:
+            variacao = dados['valor'] / anterior['valor'] - 1
+        situacao = "PIOROU" if variacao > tolerancia else ("melhorou" if variacao < -tolerancia else "ok")
+        linhas.append((nome, anterior['valor'], dados['valor'], variacao, situacao))
+    return linhas
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sem rede (APIs falsas e dados sintéticos) com base de comparação.")
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=list(CENARIOS),
+                        help="cenários a rodar (padrão: todos)")
+    parser.add_argument("--rapido", action="store_true", help="dados menores (para conferir se tudo roda)")
+    parser.add_argument("--latencia", type=float, default=20.0, help="latência das APIs falsas em ms (padrão: 20)")
+    parser.add_argument("--variacao", type=float, default=10.0, help="variação aleatória da latência em ms (padrão: 10)")
+    parser.add_argument("--cauda", type=float, default=0.0, help="fração das respostas lentas (padrão: 0)")
+    parser.add_argument("--cauda-ms", type=float, default=0.0, help="atraso extra das respostas lentas em ms")
+    parser.add_argument("--taxa-erro", type=float, default=0.0,
+                        help="fração das respostas com erro 503 (o cliente HTTP repete; padrão: 0)")
+    parser.add_argument("--base", default=BASE_PADRAO, help="arquivo da base (padrão: benchmark_base.json)")
+    parser.add_argument("--atualizar-base", action="store_true", help="grava esta execução como a nova base")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help=f"piora tolerada, fração (padrão: {TOLERANCIA_PADRAO})")
+    parser.add_argument("--saida", help="grava também os resultados desta execução neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    # Banco e séries em uma pasta temporária (definido antes de importar os módulos do projeto)
+    pasta = tempfile.mkdtemp(prefix="chuvasegura_benchmark_")
+    os.environ["CHUVASEGURA_DB"] = os.path.join(pasta, "benchmark.db")
+    import banco
+    banco.CAMINHO_BANCO = os.environ["CHUVASEGURA_DB"]
+    from servidores_falsos import ServidoresFalsos, Comportamento
+    from dados_sinteticos import gerar_ceps, coordenadas_cep
+
+    tamanhos = TAMANHOS['rapido' if args.rapido else 'normal']
+    parametros = dict(tamanhos, latencia_ms=args.latencia, variacao_ms=args.variacao,
+                      cauda=args.cauda, cauda_ms=args.cauda_ms, taxa_erro=args.taxa_erro)
+    ceps = gerar_ceps(tamanhos['ceps'])
+    contexto = {
+        'pasta': pasta,
+        'tamanhos': tamanhos,
+        'ceps': ceps,
+        # Locais da chuva: coordenadas dos primeiros CEPs (distintos depois de arredondar)
+        'locais': list(dict.fromkeys(coordenadas_cep(cep) for cep in ceps))[:tamanhos['locais']],
+    }
+    # Os cenários que leem a chuva precisam da ingestão antes
+    cenarios = [c for c in CENARIOS if c in args.cenarios or
+                (c == "ingestao" and {"agregacao", "graficos"} & set(args.cenarios))]
+
+    resultados = Resultados()
+    comportamento = Comportamento(args.latencia, args.variacao, args.cauda, args.cauda_ms, args.taxa_erro)
+    try:
+        with ServidoresFalsos(comportamento) as servidores:
+            with silencioso():
+                banco.conectar().close()  # Cria e migra o banco antes das medições
+            servidores.apontar_modulos()
+            for cenario in cenarios:
+                inicio = time.perf_counter()
+                FUNCOES_CENARIOS[cenario](contexto, resultados)
+                print(f"{cenario:<12} {time.perf_counter() - inicio:6.1f}s")
+            requisicoes = servidores.requisicoes()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)  # Banco, séries e gráficos temporários
+    print(f"Requisições às APIs falsas: {requisicoes}")
+
+    execucao = {
+        'gerado_em': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'maquina': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        'parametros': parametros,
+        'metricas': resultados.metricas,
+    }
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(execucao, arquivo, ensure_ascii=False, indent=2)
+
+    base = None
+    if os.path.exists(args.base) and not args.atualizar_base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        if base.get('parametros') != parametros:
+            print(f"\nAviso: a base {args.base} foi gravada com outros parâmetros; sem comparação.")
+            base = None
+
+    pioraram = 0
+    print(f"\n{'métrica':<44}{'base':>12}{'atual':>12}{'variação':>10}  situação")
+    for nome, anterior, atual, variacao, situacao in comparar(base['metricas'] if base else {},
+                                                              resultados.metricas, args.tolerancia):
+        unidade = resultados.metricas[nome]['unidade']
+        texto_base = f"{anterior:>12.3f}" if anterior is not None else f"{'-':>12}"
+        texto_variacao = f"{variacao:>+9.0%}" if variacao is not None else f"{'-':>9}"
+        print(f"{nome:<44}{texto_base}{atual:>12.3f} {texto_variacao}  {situacao if base else unidade}")
+        pioraram += situacao == "PIOROU"
+
+    if base is None and (args.atualizar_base or not os.path.exists(args.base)):
+        with open(args.base, "w", encoding="utf-8") as arquivo:
+            json.dump(execucao, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nBase gravada em {args.base}")
+    elif pioraram:
+        print(f"\n{pioraram} métrica(s) pioraram mais de {args.tolerancia:.0%} em relação à base ({base['gerado_em']}).")
+        return 1
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,85 @@
+import json                          # Para serializar os valores guardados no cache
+import threading                     # Para proteger o cache quando usado por várias threads
+import time                          # Para controlar a validade (TTL) das entradas
+from collections import OrderedDict  # Para implementar o cache LRU em memória
+
+import banco                         # Banco único onde as tabelas de cache são gravadas
+import metricas                      # Contadores de acertos e faltas
+
+
+# Cache em dois níveis: um LRU em memória (rápido, por processo) e uma tabela
+# no banco SQLite (persistente entre execuções). Valores None representam "resultado
+# negativo" (ex.: CEP inexistente) e usam uma validade menor que a normal.
+class CachePersistente:
+    def __init__(self, tabela, caminho_banco=None, ttl=30 * 24 * 3600,
+                 ttl_negativo=24 * 3600, tamanho_memoria=4096):
+        self.tabela = tabela                    # Nome da tabela no banco (criada em banco.MIGRACOES)
+        self.caminho_banco = caminho_banco      # Arquivo SQLite (None = banco padrão)
+        self.ttl = ttl                          # Validade (s) de um resultado positivo
+        self.ttl_negativo = ttl_negativo        # Validade (s) de um resultado negativo
+        self.tamanho_memoria = tamanho_memoria  # Máximo de entradas no LRU
+        self._memoria = OrderedDict()           # chave -> (valor, expira_em)
+        self._trava = threading.Lock()
+        self._conn = None                       # Conexão aberta só no primeiro uso
+        self._metrica_acertos = f"{tabela}_acertos"  # Nomes dos contadores (montados uma vez)
+        self._metrica_faltas = f"{tabela}_faltas"
+
+    # Abre a conexão na primeira vez que o cache é usado (a tabela é criada pelas migrações)
+    def _conexao(self):
+        if self._conn is None:
+            self._conn = banco.conectar(self.caminho_banco, check_same_thread=False)
+        return self._conn
+
+    # Guarda a entrada no LRU, descartando a menos usada se passar do limite
+    def _lembrar(self, chave, valor, expira_em):
+        self._memoria[chave] = (valor, expira_em)
+        self._memoria.move_to_end(chave)
+        if len(self._memoria) > self.tamanho_memoria:
+            self._memoria.popitem(last=False)
+
+    # Retorna (encontrado, valor). encontrado=False quando não há entrada válida
+    def obter(self, chave):
+        agora = time.time()
+        with self._trava:
+            # 1º nível: memória
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                valor, expira_em = entrada
+                if expira_em > agora:
+                    self._memoria.move_to_end(chave)
+                    metricas.contar(self._metrica_acertos)
+                    return True, valor
+                del self._memoria[chave]
+
+            # 2º nível: banco SQLite
+            linha = self._conexao().execute(
+                f"SELECT valor, expira_em FROM {self.tabela} WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None or linha[1] <= agora:
+                metricas.contar(self._metrica_faltas)
+                return False, None
+
+            valor = json.loads(linha[0])
+            self._lembrar(chave, valor, linha[1])
+            metricas.contar(self._metrica_acertos)
+            return True, valor
+
+    # Grava o valor nos dois níveis (None = resultado negativo)
+    def guardar(self, chave, valor):
+        ttl = self.ttl_negativo if valor is None else self.ttl
+        expira_em = time.time() + ttl
+        with self._trava:
+            self._lembrar(chave, valor, expira_em)
+            conn = self._conexao()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.tabela} (chave, valor, expira_em) VALUES (?, ?, ?)",
+                (chave, json.dumps(valor), expira_em)
+            )
+            conn.commit()
+
+    # Remove do banco as entradas vencidas (manutenção opcional)
+    def limpar_expirados(self):
+        with self._trava:
+            conn = self._conexao()
+            conn.execute(f"DELETE FROM {self.tabela} WHERE expira_em <= ?", (time.time(),))
+            conn.commit()
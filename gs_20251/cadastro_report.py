@@ -1,235 +1,390 @@
-#Importação das bibliotecas necessárias
-import requests  #Para fazer requisições HTTP à API ViaCEP
-import sqlite3   #Para trabalhar com banco de dados SQLite
-from datetime import datetime  #Para manipular datas e horas
-
-#Conexão com o banco de dados de usuários (cria se não existir)
-conexao_usuarios = sqlite3.connect('usuarios.db')
-#Cria um cursor para executar operações no banco de dados de usuários
-operador_usuarios = conexao_usuarios.cursor()
-
-#Conexão com o banco de dados de alagamentos (cria se não existir)
-conexao_alagamentos = sqlite3.connect('alagamentos.db')
-#Cria um cursor para executar operações no banco de dados de alagamentos
-operador_alagamentos = conexao_alagamentos.cursor()
-
-#Cria a tabela de usuários se ela não existir
-operador_usuarios.execute('''
-CREATE TABLE IF NOT EXISTS usuarios (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,  
-    nome_completo TEXT,                   
-    cpf TEXT UNIQUE,                      
-    tipo_deficiencia TEXT,                
-    cep TEXT,                             
-    endereco_completo TEXT,              
-    necessita_resgate TEXT                
-)
-''')
-
-#Cria a tabela de relatórios de alagamento se não existir
-operador_alagamentos.execute('''
-CREATE TABLE IF NOT EXISTS relatorios_alagamento (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,  
-    nome_reportante TEXT,                 
-    cpf_reportante TEXT,                  
-    cep_local TEXT,                       
-    endereco_alagado TEXT,                
-    intensidade_chuva TEXT,               
-    nivel_inundacao TEXT,                 
-    data_hora_registro TEXT               
-)
-''')
-
-#Confirma as alterações nos bancos de dados
-conexao_usuarios.commit()
-conexao_alagamentos.commit()
-
-#Função para validar se um CPF tem 11 dígitos numéricos
-def validar_cpf(numero_cpf):
-    return len(numero_cpf) == 11 and numero_cpf.isdigit()  # Retorna True se válido
-
-#Função para consultar endereço via API ViaCEP
-def consultar_endereco(cep):
-    try:
-        #Faz requisição GET para a API ViaCEP
-        resposta_api = requests.get(f"https://viacep.com.br/ws/{cep}/json/")
-        #Converte a resposta JSON em um dicionário Python
-        dados_cep = resposta_api.json()
-        
-        #Verifica se a API retornou erro
-        if "erro" in dados_cep:
-            print("CEP não encontrado.")
-            return None
-        
-        #Formata o endereço completo a partir dos dados
-        return f"{dados_cep['logradouro']}, {dados_cep['bairro']}, {dados_cep['localidade']} - {dados_cep['uf']}"
-    except Exception as erro:
-        print("Erro ao buscar endereço:", erro)
-        return None
-
-#Função para registrar um novo usuário
-def registrar_usuario():
-    try:
-        #Solicita e armazena o nome completo
-        nome_completo = input("Digite o nome completo: ").strip()
-
-        #Solicita CPF e valida repetidamente até ser válido
-        cpf = input("Digite o CPF (somente números): ").strip()
-        while not validar_cpf(cpf):
-            print("CPF inválido. Tente novamente.")
-            cpf = input("Digite o CPF (somente números): ").strip()
-
-        #Pergunta sobre deficiência e valida resposta
-        resposta_deficiencia = input("Você possui alguma deficiência? (sim/não): ").strip().lower()
-        while resposta_deficiencia not in ['sim', 'não', 'nao']:
-            resposta_deficiencia = input("Responda com 'sim' ou 'não': ").strip().lower()
-
-        #Se tiver deficiência, pergunta detalhes
-        if resposta_deficiencia == 'sim':
-            tipo_deficiencia = input("Qual o tipo de deficiência? ").strip()
-            necessita_resgate = input("Precisa de suporte da Defesa Civil? (sim/não): ").strip().lower()
-            while necessita_resgate not in ['sim', 'não', 'nao']:
-                necessita_resgate = input("Responda com 'sim' ou 'não': ").strip().lower()
-        else:
-            tipo_deficiencia = "Nenhuma"
-            necessita_resgate = "não"
-
-        #Solicita CEP e valida até encontrar endereço
-        cep = input("Digite o CEP (somente números): ").strip()
-        endereco_completo = consultar_endereco(cep)
-        while not endereco_completo:
-            cep = input("CEP inválido. Digite novamente: ").strip()
-            endereco_completo = consultar_endereco(cep)
-
-        #Insere os dados na tabela de usuários
-        operador_usuarios.execute('''
-            INSERT OR IGNORE INTO usuarios (nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, necessita_resgate)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, necessita_resgate))
-        
-        #Confirma a inserção no banco de dados
-        conexao_usuarios.commit()
-
-        print("\nUsuário cadastrado com sucesso!\n")
-    except Exception as erro:
-        print("Erro no cadastro:", erro)
-
-#Função para registrar um novo alagamento
-def registrar_alagamento():
-    try:
-        #Solicita dados do reportante
-        nome_reportante = input("Digite seu nome completo: ").strip()
-
-        #Valida CPF do reportante
-        cpf_reportante = input("Digite seu CPF (somente números): ").strip()
-        while not validar_cpf(cpf_reportante):
-            print("CPF inválido. Tente novamente.")
-            cpf_reportante = input("Digite seu CPF (somente números): ").strip()
-
-        #Valida CEP do local
-        cep_local = input("Digite o CEP da área alagada (somente números): ").strip()
-        endereco_alagado = consultar_endereco(cep_local)
-        while not endereco_alagado:
-            cep_local = input("CEP inválido. Digite novamente: ").strip()
-            endereco_alagado = consultar_endereco(cep_local)
-
-        #Opções válidas para intensidade da chuva
-        opcoes_chuva = ['fraca', 'media', 'média', 'forte']
-        intensidade_chuva = input("Nível da chuva (fraca, média, forte): ").strip().lower()
-        while intensidade_chuva not in opcoes_chuva:
-            intensidade_chuva = input("Informe um nível válido: fraca, média ou forte: ").strip().lower()
-
-        #Opções válidas para nível de inundação
-        opcoes_inundacao = ['alto', 'medio', 'médio', 'baixo']
-        nivel_inundacao = input("Nível da água (alto, médio, baixo): ").strip().lower()
-        while nivel_inundacao not in opcoes_inundacao:
-            nivel_inundacao = input("Informe um nível válido: alto, médio ou baixo: ").strip().lower()
-
-        #Obtém data e hora atuais formatadas
-        data_hora_registro = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        #Insere o relatório no banco de dados
-        operador_alagamentos.execute('''
-            INSERT INTO relatorios_alagamento (nome_reportante, cpf_reportante, cep_local, 
-            endereco_alagado, intensidade_chuva, nivel_inundacao, data_hora_registro)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (nome_reportante, cpf_reportante, cep_local, endereco_alagado, 
-              intensidade_chuva, nivel_inundacao, data_hora_registro))
-        
-        #Confirma a inserção
-        conexao_alagamentos.commit()
-
-        print("\nRelatório de alagamento enviado com sucesso!\n")
-    except Exception as erro:
-        print("Erro no relatório:", erro)
-
-#Função para verificar relatórios por CEP
-def verificar_relatorios_cep():
-    try:
-        #Solicita CEP para consulta
-        cep_consulta = input("Digite o CEP para consulta (somente números): ").strip()
-        #Valida se CEP tem 8 dígitos
-        if not cep_consulta.isdigit() or len(cep_consulta) != 8:
-            print("CEP inválido. Deve conter 8 números.")
-            return
-
-        #Obtém a data atual no formato YYYY-MM-DD
-        data_atual = datetime.now().strftime("%Y-%m-%d")
-
-        #Conta quantos relatórios existem para este CEP hoje
-        operador_alagamentos.execute('''
-            SELECT COUNT(*) FROM relatorios_alagamento
-            WHERE cep_local = ? AND data_hora_registro LIKE ?
-        ''', (cep_consulta, f"{data_atual}%"))
-
-        #Obtém o resultado da contagem
-        total_relatorios = operador_alagamentos.fetchone()[0]
-
-        #Exibe alerta se houver muitos relatórios
-        if total_relatorios >= 5:
-            print("\n🚨 Alerta: Área com múltiplos relatos de alagamento hoje! Cuidado! 🚨\n")
-        else:
-            print("\nPoucos relatos nesta região hoje, mas mantenha atenção.\n")
-
-    except Exception as erro:
-        print("Erro na consulta:", erro)
-
-#Loop principal do programa (menu interativo)
-while True:
-    print("\nMENU PRINCIPAL")
-    print("1 - Cadastrar novo usuário")
-    print("2 - Registrar ocorrência de alagamento")
-    print("3 - Verificar relatórios por CEP")
-    print("4 - Encerrar programa")
-
-    #Captura a opção do usuário
-    opcao = input("Escolha uma opção: ").strip()
-
-    #Executa a função correspondente à opção escolhida
-    if opcao == '1':
-        registrar_usuario()
-    elif opcao == '2':
-        registrar_alagamento()
-    elif opcao == '3':
-        verificar_relatorios_cep()
-    elif opcao == '4':
-        print("Encerrando o sistema...")
-        break  # Sai do loop e encerra o programa
-    else:
-        print("Opção inválida. Tente novamente.")
-
-#Exibe todos os usuários cadastrados
-print("\nUsuários cadastrados:")
-operador_usuarios.execute('SELECT * FROM usuarios')
-for usuario in operador_usuarios.fetchall():
-    print(usuario)
-
-#Exibe todos os relatórios de alagamento
-print("\nRelatórios de alagamento:")
-operador_alagamentos.execute('SELECT * FROM relatorios_alagamento')
-for relatorio in operador_alagamentos.fetchall():
-    print(relatorio)
-
-#Fecha as conexões com os bancos de dados
-conexao_usuarios.close()
-conexao_alagamentos.close()
+#Importação das bibliotecas necessárias
+import cliente_http  #Cliente HTTP compartilhado (keep-alive, tentativas e disjuntor) para a API ViaCEP
+import os        #Para ler a configuração do ambiente
+from datetime import datetime  #Para manipular datas e horas
+import banco     #Banco de dados único (conexões e migrações)
+from cache_persistente import CachePersistente  #Cache LRU em memória + SQLite
+from alertas import MotorAlertas, JANELAS_ALERTA, LIMITE_ALERTA, gravar_contagem  #Contagens móveis de relatos por CEP
+from vizinhanca import AlertasVizinhanca  #Soma dos relatos de CEPs vizinhos (prefixo e raio)
+from geocodificacao import normalizar_cep  #CEP sem hífen nem espaços (como fica gravado no banco)
+
+#Cache persistente CEP -> endereço (endereços valem 30 dias, CEPs inexistentes 1 dia)
+cache_endereco = CachePersistente("cache_endereco", ttl=30 * 24 * 3600, ttl_negativo=24 * 3600)
+
+#Endereço base da API ViaCEP (pode ser trocado por um servidor local, ex.: em testes)
+URL_VIACEP = os.environ.get("VIACEP_URL", "https://viacep.com.br/ws")
+
+#Opções válidas das respostas do cadastro e do relatório
+OPCOES_SIM_NAO = ['sim', 'não', 'nao']
+OPCOES_CHUVA = ['fraca', 'media', 'média', 'forte']
+OPCOES_INUNDACAO = ['alto', 'medio', 'médio', 'baixo']
+
+#Conexão, cursor e motores de alertas do menu (preenchidos por abrir_banco)
+conexao = None
+operador = None
+motor_alertas = None
+alertas_vizinhanca = None
+
+#Abre o banco único (usuários e relatos) e prepara o motor de alertas
+def abrir_banco(caminho=None):
+    global conexao, operador, motor_alertas, alertas_vizinhanca
+
+    #Conexão com o banco (criado e migrado se preciso) e seu cursor
+    conexao = banco.conectar(caminho)
+    operador = conexao.cursor()
+
+    #Motor de alertas: contagens por CEP em memória + tabela-resumo contagem_alertas
+    motor_alertas = MotorAlertas(conexao)
+
+    #Alertas de vizinhança: usa as coordenadas dos relatos já indexados neste banco
+    alertas_vizinhanca = AlertasVizinhanca(motor_alertas, conexao)
+
+#Função para validar se um CPF tem 11 dígitos numéricos
+def validar_cpf(numero_cpf):
+    return len(numero_cpf) == 11 and numero_cpf.isdigit()  # Retorna True se válido
+
+#Função para consultar endereço via API ViaCEP (com cache)
+def consultar_endereco(cep):
+    #Consulta o cache antes de ir à API
+    encontrado, endereco = cache_endereco.obter(cep)
+    if encontrado:
+        if endereco is None:
+            print("CEP não encontrado.")
+        return endereco
+
+    try:
+        #Faz requisição GET para a API ViaCEP (timeout de 10 segundos; a latência fica no endpoint "viacep")
+        resposta_api = cliente_http.get(f"{URL_VIACEP}/{cep}/json/", endpoint="viacep", timeout=10)
+        #Converte a resposta JSON em um dicionário Python
+        dados_cep = resposta_api.json()
+        
+        #Verifica se a API retornou erro e guarda o resultado negativo
+        if "erro" in dados_cep:
+            cache_endereco.guardar(cep, None)
+            print("CEP não encontrado.")
+            return None
+        
+        #Formata o endereço completo a partir dos dados e guarda no cache
+        endereco = f"{dados_cep['logradouro']}, {dados_cep['bairro']}, {dados_cep['localidade']} - {dados_cep['uf']}"
+        cache_endereco.guardar(cep, endereco)
+        return endereco
+    except Exception as erro:
+        #Erros de rede não vão para o cache, a próxima tentativa consulta a API de novo
+        print("Erro ao buscar endereço:", erro)
+        return None
+
+#Erro de validação dos dados de cadastro/relato (usado pelo serviço HTTP e pela importação)
+class ErroValidacao(Exception):
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+#Busca o endereço do CEP (com cache) ou levanta erro de validação
+def endereco_do_cep(cep, enderecos=None):
+    if not cep.isdigit() or len(cep) != 8:
+        raise ErroValidacao(f"CEP inválido: {cep}. Deve conter 8 números.")
+    #Dicionário local evita repetir a consulta para o mesmo CEP dentro de um lote
+    if enderecos is not None and cep in enderecos:
+        endereco = enderecos[cep]
+    else:
+        endereco = consultar_endereco(cep)
+        if enderecos is not None:
+            enderecos[cep] = endereco
+    if not endereco:
+        raise ErroValidacao(f"CEP não encontrado: {cep}", status=422)
+    return endereco
+
+#Valida o cadastro com as mesmas regras do menu interativo
+#(campo ausente, vazio no CSV ou null no JSON conta como não informado, nunca como o texto 'None')
+def validar_usuario(dados, enderecos=None):
+    nome_completo = str(dados.get('nome_completo') or '').strip()
+    cpf = str(dados.get('cpf') or '').strip()
+    cep = normalizar_cep(str(dados.get('cep') or ''))
+    tipo_deficiencia = str(dados.get('tipo_deficiencia') or 'Nenhuma').strip()
+    necessita_resgate = str(dados.get('necessita_resgate') or 'não').strip().lower()
+
+    if not nome_completo:
+        raise ErroValidacao("Informe o nome completo.")
+    if not validar_cpf(cpf):
+        raise ErroValidacao("CPF inválido.")
+    if necessita_resgate not in OPCOES_SIM_NAO:
+        raise ErroValidacao("necessita_resgate deve ser 'sim' ou 'não'.")
+
+    return {
+        'nome_completo': nome_completo,
+        'cpf': cpf,
+        'tipo_deficiencia': tipo_deficiencia,
+        'cep': cep,
+        'endereco_completo': endereco_do_cep(cep, enderecos),
+        'necessita_resgate': necessita_resgate,
+    }
+
+#Valida um relato com as mesmas regras do menu interativo
+def validar_relatorio(dados, enderecos=None):
+    nome_reportante = str(dados.get('nome_reportante') or '').strip()
+    cpf_reportante = str(dados.get('cpf_reportante') or '').strip()
+    cep_local = normalizar_cep(str(dados.get('cep_local') or ''))
+    intensidade_chuva = str(dados.get('intensidade_chuva') or '').strip().lower()
+    nivel_inundacao = str(dados.get('nivel_inundacao') or '').strip().lower()
+
+    if not nome_reportante:
+        raise ErroValidacao("Informe o nome do reportante.")
+    if not validar_cpf(cpf_reportante):
+        raise ErroValidacao("CPF inválido.")
+    if intensidade_chuva not in OPCOES_CHUVA:
+        raise ErroValidacao("intensidade_chuva deve ser fraca, média ou forte.")
+    if nivel_inundacao not in OPCOES_INUNDACAO:
+        raise ErroValidacao("nivel_inundacao deve ser alto, médio ou baixo.")
+
+    #Data/hora do relato: a informada (importações) ou a atual
+    data_hora_registro = str(dados.get('data_hora_registro') or '').strip()
+    if data_hora_registro:
+        try:
+            agora = datetime.strptime(data_hora_registro, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            raise ErroValidacao("data_hora_registro deve estar no formato AAAA-MM-DD HH:MM:SS.")
+        #Relato no futuro ficaria nas contagens de alerta até a data chegar
+        if agora > datetime.now():
+            raise ErroValidacao("data_hora_registro não pode estar no futuro.")
+    else:
+        agora = datetime.now()
+
+    return {
+        'nome_reportante': nome_reportante,
+        'cpf_reportante': cpf_reportante,
+        'cep_local': cep_local,
+        'endereco_alagado': endereco_do_cep(cep_local, enderecos),
+        'intensidade_chuva': intensidade_chuva,
+        'nivel_inundacao': nivel_inundacao,
+        'data_hora_registro': agora.strftime("%Y-%m-%d %H:%M:%S"),
+        'registrado_em': int(agora.timestamp()),
+    }
+
+#Grava um usuário já validado; retorna o id, ou None se o CPF já estava cadastrado
+def inserir_usuario(conn, dados):
+    cursor = conn.execute('''
+        INSERT OR IGNORE INTO usuarios (nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, necessita_resgate)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (dados['nome_completo'], dados['cpf'], dados['tipo_deficiencia'], dados['cep'],
+          dados['endereco_completo'], dados['necessita_resgate']))
+    return cursor.lastrowid if cursor.rowcount else None
+
+#Grava um relato já validado e atualiza as contagens de alerta (mesma transação; o commit fica com quem chamou).
+#Sem motor (motor=None), grava só a linha da tabela-resumo: os motores abertos a leem depois.
+def inserir_relatorio(conn, motor, dados):
+    cursor = conn.execute('''
+        INSERT INTO relatorios_alagamento (nome_reportante, cpf_reportante, cep_local,
+        endereco_alagado, intensidade_chuva, nivel_inundacao, data_hora_registro, registrado_em)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (dados['nome_reportante'], dados['cpf_reportante'], dados['cep_local'],
+          dados['endereco_alagado'], dados['intensidade_chuva'], dados['nivel_inundacao'],
+          dados['data_hora_registro'], dados['registrado_em']))
+    if motor is None:
+        gravar_contagem(conn, dados['cep_local'], dados['registrado_em'],
+                        dados['nivel_inundacao'], dados['intensidade_chuva'])
+    else:
+        motor.registrar(dados['cep_local'], dados['registrado_em'],
+                        dados['nivel_inundacao'], dados['intensidade_chuva'])
+    return cursor.lastrowid
+
+#Função para registrar um novo usuário
+def registrar_usuario():
+    try:
+        #Solicita e armazena o nome completo
+        nome_completo = input("Digite o nome completo: ").strip()
+
+        #Solicita CPF e valida repetidamente até ser válido
+        cpf = input("Digite o CPF (somente números): ").strip()
+        while not validar_cpf(cpf):
+            print("CPF inválido. Tente novamente.")
+            cpf = input("Digite o CPF (somente números): ").strip()
+
+        #Pergunta sobre deficiência e valida resposta
+        resposta_deficiencia = input("Você possui alguma deficiência? (sim/não): ").strip().lower()
+        while resposta_deficiencia not in OPCOES_SIM_NAO:
+            resposta_deficiencia = input("Responda com 'sim' ou 'não': ").strip().lower()
+
+        #Se tiver deficiência, pergunta detalhes
+        if resposta_deficiencia == 'sim':
+            tipo_deficiencia = input("Qual o tipo de deficiência? ").strip()
+            necessita_resgate = input("Precisa de suporte da Defesa Civil? (sim/não): ").strip().lower()
+            while necessita_resgate not in OPCOES_SIM_NAO:
+                necessita_resgate = input("Responda com 'sim' ou 'não': ").strip().lower()
+        else:
+            tipo_deficiencia = "Nenhuma"
+            necessita_resgate = "não"
+
+        #Solicita CEP e valida até encontrar endereço (o CEP é gravado sem hífen)
+        cep = normalizar_cep(input("Digite o CEP (somente números): "))
+        while not consultar_endereco(cep):
+            cep = normalizar_cep(input("CEP inválido. Digite novamente: "))
+
+        #Valida e grava pelo mesmo caminho da linha de comando, do serviço e da importação
+        usuario = validar_usuario({
+            'nome_completo': nome_completo, 'cpf': cpf, 'tipo_deficiencia': tipo_deficiencia,
+            'cep': cep, 'necessita_resgate': necessita_resgate,
+        })
+        with conexao:
+            id_usuario = inserir_usuario(conexao, usuario)
+
+        if id_usuario is None:
+            print("\nCPF já cadastrado.\n")
+        else:
+            print("\nUsuário cadastrado com sucesso!\n")
+    except Exception as erro:
+        print("Erro no cadastro:", erro)
+
+#Função para registrar um novo alagamento
+def registrar_alagamento():
+    try:
+        #Solicita dados do reportante
+        nome_reportante = input("Digite seu nome completo: ").strip()
+
+        #Valida CPF do reportante
+        cpf_reportante = input("Digite seu CPF (somente números): ").strip()
+        while not validar_cpf(cpf_reportante):
+            print("CPF inválido. Tente novamente.")
+            cpf_reportante = input("Digite seu CPF (somente números): ").strip()
+
+        #Valida CEP do local (gravado sem hífen)
+        cep_local = normalizar_cep(input("Digite o CEP da área alagada (somente números): "))
+        while not consultar_endereco(cep_local):
+            cep_local = normalizar_cep(input("CEP inválido. Digite novamente: "))
+
+        #Intensidade da chuva (opções válidas em OPCOES_CHUVA)
+        intensidade_chuva = input("Nível da chuva (fraca, média, forte): ").strip().lower()
+        while intensidade_chuva not in OPCOES_CHUVA:
+            intensidade_chuva = input("Informe um nível válido: fraca, média ou forte: ").strip().lower()
+
+        #Nível de inundação (opções válidas em OPCOES_INUNDACAO)
+        nivel_inundacao = input("Nível da água (alto, médio, baixo): ").strip().lower()
+        while nivel_inundacao not in OPCOES_INUNDACAO:
+            nivel_inundacao = input("Informe um nível válido: alto, médio ou baixo: ").strip().lower()
+
+        #Valida (data e hora atuais) e grava o relato e as contagens de alerta do CEP na mesma transação
+        relatorio = validar_relatorio({
+            'nome_reportante': nome_reportante, 'cpf_reportante': cpf_reportante, 'cep_local': cep_local,
+            'intensidade_chuva': intensidade_chuva, 'nivel_inundacao': nivel_inundacao,
+        })
+        with conexao:
+            inserir_relatorio(conexao, motor_alertas, relatorio)
+
+        print("\nRelatório de alagamento enviado com sucesso!\n")
+    except Exception as erro:
+        print("Erro no relatório:", erro)
+
+#Função que conta os relatórios de um CEP dentro de uma janela de tempo
+#(lida do motor de alertas em memória, sem varrer a tabela de relatórios)
+def contar_relatorios_cep(cep, janela='hoje'):
+    return motor_alertas.contar(cep, janela)[0]
+
+#Função para verificar relatórios por CEP
+def verificar_relatorios_cep():
+    try:
+        #Solicita CEP para consulta
+        cep_consulta = input("Digite o CEP para consulta (somente números): ").strip()
+        #Valida se CEP tem 8 dígitos
+        if not cep_consulta.isdigit() or len(cep_consulta) != 8:
+            print("CEP inválido. Deve conter 8 números.")
+            return
+
+        #Solicita a janela de tempo (padrão: hoje)
+        janela = input("Período (hoje, 1h, 6h, 24h) [hoje]: ").strip().lower() or 'hoje'
+        while janela not in JANELAS_ALERTA:
+            janela = input("Informe um período válido: hoje, 1h, 6h ou 24h: ").strip().lower() or 'hoje'
+        descricao = JANELAS_ALERTA[janela][1]
+
+        #Conta quantos relatórios existem para este CEP na janela
+        total_relatorios = contar_relatorios_cep(cep_consulta, janela)
+
+        #Exibe alerta se houver muitos relatórios
+        if total_relatorios >= LIMITE_ALERTA:
+            print(f"\n🚨 Alerta: Área com múltiplos relatos de alagamento {descricao}! Cuidado! 🚨\n")
+        else:
+            print(f"\nPoucos relatos neste CEP {descricao}, mas mantenha atenção.\n")
+
+        #Soma os relatos dos CEPs vizinhos (mesmo prefixo e raio de alguns km)
+        vizinhos = alertas_vizinhanca.consultar(cep_consulta, janela=janela)
+        niveis = vizinhos['niveis']
+        print(f"Relatos no setor {niveis['setor']['prefixo']}: {niveis['setor']['relatos']} | "
+              f"subsetor {niveis['subsetor']['prefixo']}: {niveis['subsetor']['relatos']} | "
+              f"divisor {niveis['divisor_subsetor']['prefixo']}: {niveis['divisor_subsetor']['relatos']}")
+        if 'raio' in niveis:
+            print(f"Relatos a até {niveis['raio']['raio_km']:g} km: {niveis['raio']['relatos']} "
+                  f"em {len(niveis['raio']['ceps'])} CEP(s)")
+        if vizinhos['alerta'] and total_relatorios < LIMITE_ALERTA:
+            print(f"\n🚨 Alerta: Vários relatos de alagamento em CEPs vizinhos {descricao}! Cuidado! 🚨\n")
+
+    except Exception as erro:
+        print("Erro na consulta:", erro)
+
+#Função para listar todos os CEPs acima do limite de relatos
+def listar_ceps_em_alerta():
+    try:
+        #Solicita a janela de tempo (padrão: hoje)
+        janela = input("Período (hoje, 1h, 6h, 24h) [hoje]: ").strip().lower() or 'hoje'
+        while janela not in JANELAS_ALERTA:
+            janela = input("Informe um período válido: hoje, 1h, 6h ou 24h: ").strip().lower() or 'hoje'
+
+        #Lista já ordenada pela gravidade (nível da água x intensidade da chuva)
+        em_alerta = motor_alertas.ceps_em_alerta(janela)
+        if not em_alerta:
+            print(f"\nNenhum CEP com {LIMITE_ALERTA} ou mais relatos {JANELAS_ALERTA[janela][1]}.\n")
+            return
+
+        print(f"\n🚨 CEPs em alerta {JANELAS_ALERTA[janela][1]}:")
+        for cep, total, peso in em_alerta:
+            print(f"CEP: {cep} | Relatos: {total} | Gravidade: {peso:.0f}")
+    except Exception as erro:
+        print("Erro na consulta:", erro)
+
+#Função principal: abre o banco e executa o menu interativo
+def principal():
+    abrir_banco()
+
+    #Loop principal do programa (menu interativo)
+    while True:
+        print("\nMENU PRINCIPAL")
+        print("1 - Cadastrar novo usuário")
+        print("2 - Registrar ocorrência de alagamento")
+        print("3 - Verificar relatórios por CEP")
+        print("4 - Listar CEPs em alerta")
+        print("5 - Encerrar programa")
+
+        #Captura a opção do usuário
+        opcao = input("Escolha uma opção: ").strip()
+
+        #Executa a função correspondente à opção escolhida
+        if opcao == '1':
+            registrar_usuario()
+        elif opcao == '2':
+            registrar_alagamento()
+        elif opcao == '3':
+            verificar_relatorios_cep()
+        elif opcao == '4':
+            listar_ceps_em_alerta()
+        elif opcao == '5':
+            print("Encerrando o sistema...")
+            break  # Sai do loop e encerra o programa
+        else:
+            print("Opção inválida. Tente novamente.")
+
+    #Exibe todos os usuários cadastrados
+    print("\nUsuários cadastrados:")
+    operador.execute('SELECT * FROM usuarios')
+    for usuario in operador.fetchall():
+        print(usuario)
+
+    #Exibe todos os relatórios de alagamento
+    print("\nRelatórios de alagamento:")
+    operador.execute('SELECT * FROM relatorios_alagamento')
+    for relatorio in operador.fetchall():
+        print(relatorio)
+
+    #Fecha a conexão com o banco de dados
+    conexao.close()
+
+
+#Executa o menu só se o arquivo for rodado diretamente (permite importar as funções)
+if __name__ == "__main__":
+    principal()
@@ -0,0 +1,329 @@
+# Comando único do ChuvaSegura, para uso em scripts (sem menus interativos).
+# Cada subcomando só importa o que usa: uma consulta de alerta não carrega pandas,
+# matplotlib, geopy nem requests.
+#
+# Exemplos:
+#   python chuvasegura.py cadastrar --nome "Maria Silva" --cpf 12345678901 --cep 01001000 --resgate sim
+#   python chuvasegura.py relatar --nome "João" --cpf 12345678901 --cep 01001000 --chuva forte --nivel alto
+#   python chuvasegura.py alerta 01001000 --janela 6h --raio 2
+#   python chuvasegura.py diario 01001000 --pasta graficos
+#   python chuvasegura.py mensal 01001000 2024 3 --formatos png svg
+#   python chuvasegura.py anual 01001000 2023
+#   python chuvasegura.py consultar mensal --cep 01001000 --formato csv
+#   python chuvasegura.py --metricas metricas.jsonl --perfil anual.prof anual 01001000 2023
+#
+# Os subcomandos também aceitam os nomes em inglês (register, report, alert, daily,
+# monthly, annual, query).
+import argparse                 # Para ler os parâmetros da linha de comando
+import json                     # Saída em JSON do alerta
+import os                       # Para montar o caminho dos gráficos
+import sys                      # Para o código de saída do programa
+
+from alertas import JANELAS_ALERTA  # Janelas aceitas (módulo leve, só biblioteca padrão)
+import metricas                     # Métricas das etapas e perfil (módulo leve, só biblioteca padrão)
+
+
+# Cadastra um usuário (mesmas regras do menu e do serviço HTTP)
+def comando_cadastrar(args):
+    import banco
+    from cadastro_report import ErroValidacao, validar_usuario, inserir_usuario
+
+    try:
+        usuario = validar_usuario({
+            'nome_completo': args.nome, 'cpf': args.cpf, 'cep': args.cep,
+            'tipo_deficiencia': args.deficiencia, 'necessita_resgate': args.resgate,
+        })
+    except ErroValidacao as erro:
+        print("Erro no cadastro:", erro)
+        return 1
+
+    conn = banco.conectar()
+    try:
+        with conn:
+            id_usuario = inserir_usuario(conn, usuario)
+    finally:
+        conn.close()
+
+    if id_usuario is None:
+        print("Erro no cadastro: CPF já cadastrado.")
+        return 1
+    print(f"Usuário cadastrado com sucesso! (id {id_usuario})")
+    return 0
+
+
+# Registra um relato de alagamento e atualiza as contagens de alerta
+def comando_relatar(args):
+    import banco
+    from cadastro_report import ErroValidacao, validar_relatorio, inserir_relatorio
+
+    try:
+        relatorio = validar_relatorio({
+            'nome_reportante': args.nome, 'cpf_reportante': args.cpf, 'cep_local': args.cep,
+            'intensidade_chuva': args.chuva, 'nivel_inundacao': args.nivel,
+            'data_hora_registro': args.data_hora,
+        })
+    except ErroValidacao as erro:
+        print("Erro no relatório:", erro)
+        return 1
+
+    conn = banco.conectar()
+    try:
+        with conn:
+            # Só a linha da tabela-resumo: carregar o motor (24 horas de baldes) não é preciso
+            id_relatorio = inserir_relatorio(conn, None, relatorio)
+    finally:
+        conn.close()
+
+    print(f"Relatório de alagamento enviado com sucesso! (id {id_relatorio})")
+    return 0
+
+
+# Verifica o alerta de um CEP (e, com --raio, dos CEPs vizinhos).
+# Código de saída 2 quando há alerta, para uso em scripts.
+def comando_alerta(args):
+    import banco
+    from alertas import MotorAlertas
+    from geocodificacao import normalizar_cep
+
+    cep = normalizar_cep(args.cep)
+    conn = banco.conectar()
+    try:
+        motor = MotorAlertas(conn)
+        total, peso = motor.contar(cep, args.janela)
+        resposta = {'cep': cep, 'janela': args.janela, 'total': total, 'peso': peso,
+                    'alerta': total >= motor.limite}
+        if args.raio is not None:
+            from vizinhanca import AlertasVizinhanca
+            resposta['vizinhanca'] = AlertasVizinhanca(motor, conn).consultar(cep, args.raio, args.janela)
+    finally:
+        conn.close()
+
+    alerta = resposta['alerta'] or resposta.get('vizinhanca', {}).get('alerta', False)
+    if args.json:
+        print(json.dumps(resposta, ensure_ascii=False))
+    else:
+        descricao = JANELAS_ALERTA[args.janela][1]
+        print(f"CEP {cep}: {total} relato(s) {descricao} | Gravidade: {peso:.0f}")
+        if 'vizinhanca' in resposta and 'raio' in resposta['vizinhanca']['niveis']:
+            raio = resposta['vizinhanca']['niveis']['raio']
+            print(f"A até {raio['raio_km']:g} km: {raio['relatos']} relato(s) em {len(raio['ceps'])} CEP(s)")
+        if alerta:
+            print(f"🚨 Alerta: Área com múltiplos relatos de alagamento {descricao}! Cuidado! 🚨")
+    return 2 if alerta else 0
+
+
+# Coordenadas do CEP ou None (com a mensagem de erro do modo interativo)
+def _coordenadas(cep):
+    from geocodificacao import obter_lat_lon_por_cep
+    lat, lon = obter_lat_lon_por_cep(cep)
+    if lat is None or lon is None:
+        print("Não foi possível obter latitude e longitude para o CEP informado.")
+        return None
+    return lat, lon
+
+
+# Previsão de chuva dos próximos 7 dias: salva no banco e gera o gráfico
+def comando_diario(args):
+    import graficos_diário
+    from geocodificacao import normalizar_cep
+
+    # CEP sem hífen: é a chave de chuva_semana cruzada com usuarios.cep nos alertas de previsão
+    cep = normalizar_cep(args.cep)
+    coordenadas = _coordenadas(cep)
+    if coordenadas is None:
+        return 1
+    dados = graficos_diário.buscar_chuva(*coordenadas)
+    if not dados:
+        return 1
+
+    graficos_diário.salvar_em_sqlite(cep, dados['daily']['time'], dados['daily']['precipitation_sum'])
+    if not args.sem_grafico:
+        os.makedirs(args.pasta, exist_ok=True)
+        for formato in args.formatos:
+            graficos_diário.gerar_grafico(dados, cep, args.pasta, formato)
+    return 0
+
+
+# Precipitação semanal de um mês: salva no banco e gera o gráfico
+def comando_mensal(args):
+    import banco
+    import gráfico_mensal
+
+    coordenadas = _coordenadas(args.cep)
+    if coordenadas is None:
+        return 1
+    lat, lon = coordenadas
+    df_semanal = gráfico_mensal.obter_totais_do_mes(lat, lon, args.ano, args.mes)
+    if df_semanal.empty:
+        print("Sem dados para plotar.")
+        return 1
+
+    conn = banco.conectar()
+    try:
+        gráfico_mensal.salvar_dados_sqlite(conn, args.cep, args.ano, args.mes, lat, lon, df_semanal)
+    finally:
+        conn.close()
+
+    if not args.sem_grafico:
+        from matplotlib.figure import Figure  # Figura própria, sem janela
+        fig = Figure()
+        gráfico_mensal.desenhar_grafico_semanal(fig.subplots(), df_semanal, args.mes, args.ano, args.cep)
+        _salvar(fig, args, f"{args.ano}-{args.mes:02d}")
+    return 0
+
+
+# Precipitação mensal de um ano: salva no banco e gera o gráfico
+def comando_anual(args):
+    import banco
+    import gráfico_anual
+
+    coordenadas = _coordenadas(args.cep)
+    if coordenadas is None:
+        return 1
+    lat, lon = coordenadas
+    df_mensal = gráfico_anual.obter_totais_do_ano(lat, lon, args.ano)
+    if df_mensal.empty:
+        print("\nNão foi possível gerar gráfico: dados vazios.")
+        return 1
+
+    conn = banco.conectar()
+    try:
+        gráfico_anual.salvar_dados_sqlite_anual(conn, args.cep, args.ano, lat, lon, df_mensal)
+    finally:
+        conn.close()
+
+    if not args.sem_grafico:
+        from matplotlib.figure import Figure  # Figura própria, sem janela
+        fig = Figure()
+        gráfico_anual.desenhar_grafico_mensal(fig.subplots(), df_mensal, args.ano, args.cep)
+        _salvar(fig, args, str(args.ano))
+    return 0
+
+
+# Salva o gráfico na pasta de saída, em cada formato pedido
+def _salvar(fig, args, periodo):
+    from geocodificacao import normalizar_cep
+    os.makedirs(args.pasta, exist_ok=True)
+    for formato in args.formatos:
+        arquivo = os.path.join(args.pasta, f"{normalizar_cep(args.cep)}_{periodo}.{formato}")
+        with metricas.etapa("grafico"):  # É no savefig que o matplotlib desenha
+            fig.savefig(arquivo)
+        print(f"Gráfico salvo como {arquivo}")
+
+
+# Repassa os argumentos para a consulta das tabelas dos gráficos
+def comando_consultar(args):
+    import consulta_bc_graficos
+    argumentos = list(args.argumentos)
+    if args.banco:
+        argumentos += ["--banco", args.banco]
+    return consulta_bc_graficos.principal(argumentos)
+
+
+# Raio da vizinhança em km (o mesmo limite do serviço HTTP); fora dele, erro do argparse
+def _raio_km(texto):
+    try:
+        raio = float(texto)
+    except ValueError:
+        raio = -1
+    if not 0 < raio <= 50:
+        raise argparse.ArgumentTypeError("raio deve ser um número de km entre 0 e 50")
+    return raio
+
+
+# Ano dentro do período das séries diárias em disco; fora dele, erro do argparse
+def _ano(texto):
+    from serie_temporal import INICIO_PADRAO, FIM_PADRAO  # Só os subcomandos de gráfico usam
+    try:
+        ano = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ano inválido: {texto}")
+    if not INICIO_PADRAO.year <= ano < FIM_PADRAO.year:
+        raise argparse.ArgumentTypeError(f"ano deve estar entre {INICIO_PADRAO.year} e {FIM_PADRAO.year - 1}")
+    return ano
+
+
+# Opções dos gráficos (pasta, formatos e --sem-grafico)
+def _opcoes_grafico(subparser):
+    subparser.add_argument("--pasta", default=".", help="pasta dos gráficos (padrão: atual)")
+    subparser.add_argument("--formatos", nargs="+", choices=["png", "svg"], default=["png"],
+                           help="formatos dos gráficos (padrão: png)")
+    subparser.add_argument("--sem-grafico", action="store_true", help="só busca e salva os dados")
+
+
+def montar_parser():
+    parser = argparse.ArgumentParser(prog="chuvasegura", description="ChuvaSegura: cadastro, relatos, alertas e gráficos de chuva.")
+    parser.add_argument("--banco", help="arquivo do banco (padrão: chuvasegura.db ou CHUVASEGURA_DB)")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="grava o tempo das etapas e os contadores (.prom = Prometheus, senão JSON lines)")
+    parser.add_argument("--perfil", metavar="ARQUIVO", help="roda o subcomando sob o cProfile e salva o resultado")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    cadastrar = subcomandos.add_parser("cadastrar", aliases=["register"], help="cadastra um usuário")
+    cadastrar.add_argument("--nome", required=True, help="nome completo")
+    cadastrar.add_argument("--cpf", required=True, help="CPF (somente números)")
+    cadastrar.add_argument("--cep", required=True, help="CEP (somente números)")
+    cadastrar.add_argument("--deficiencia", default="Nenhuma", help="tipo de deficiência (padrão: Nenhuma)")
+    cadastrar.add_argument("--resgate", choices=["sim", "não", "nao"], default="não",
+                           help="precisa de suporte da Defesa Civil (padrão: não)")
+    cadastrar.set_defaults(funcao=comando_cadastrar)
+
+    relatar = subcomandos.add_parser("relatar", aliases=["report"], help="registra um relato de alagamento")
+    relatar.add_argument("--nome", required=True, help="nome do reportante")
+    relatar.add_argument("--cpf", required=True, help="CPF do reportante (somente números)")
+    relatar.add_argument("--cep", required=True, help="CEP da área alagada (somente números)")
+    relatar.add_argument("--chuva", required=True, help="intensidade da chuva (fraca, média, forte)")
+    relatar.add_argument("--nivel", required=True, help="nível da água (alto, médio, baixo)")
+    relatar.add_argument("--data-hora", help="data/hora do relato (AAAA-MM-DD HH:MM:SS; padrão: agora)")
+    relatar.set_defaults(funcao=comando_relatar)
+
+    alerta = subcomandos.add_parser("alerta", aliases=["alert"],
+                                    help="verifica o alerta de um CEP (sai com código 2 se houver alerta)")
+    alerta.add_argument("cep", help="CEP a verificar")
+    alerta.add_argument("--janela", choices=list(JANELAS_ALERTA), default="hoje", help="janela de tempo (padrão: hoje)")
+    alerta.add_argument("--raio", type=_raio_km, help="inclui os CEPs vizinhos a até RAIO km (até 50)")
+    alerta.add_argument("--json", action="store_true", help="resposta em JSON")
+    alerta.set_defaults(funcao=comando_alerta)
+
+    diario = subcomandos.add_parser("diario", aliases=["daily"], help="previsão de chuva dos próximos 7 dias")
+    diario.add_argument("cep", help="CEP")
+    _opcoes_grafico(diario)
+    diario.set_defaults(funcao=comando_diario)
+
+    mensal = subcomandos.add_parser("mensal", aliases=["monthly"], help="precipitação semanal de um mês")
+    mensal.add_argument("cep", help="CEP")
+    mensal.add_argument("ano", type=_ano, help="ano (ex: 2023)")
+    mensal.add_argument("mes", type=int, choices=range(1, 13), metavar="mes", help="mês (1 a 12)")
+    _opcoes_grafico(mensal)
+    mensal.set_defaults(funcao=comando_mensal)
+
+    anual = subcomandos.add_parser("anual", aliases=["annual"], help="precipitação mensal de um ano")
+    anual.add_argument("cep", help="CEP")
+    anual.add_argument("ano", type=_ano, help="ano (ex: 2023)")
+    _opcoes_grafico(anual)
+    anual.set_defaults(funcao=comando_anual)
+
+    consultar = subcomandos.add_parser("consultar", aliases=["query"], add_help=False,
+                                       help="consulta as tabelas dos gráficos (veja: consultar --help)")
+    consultar.add_argument("argumentos", nargs=argparse.REMAINDER)
+    consultar.set_defaults(funcao=comando_consultar)
+
+    return parser
+
+
+def principal(argv=None):
+    args = montar_parser().parse_args(argv)
+    if args.banco:
+        # Todos os módulos abrem o banco por banco.conectar(), que usa este caminho
+        import banco
+        banco.CAMINHO_BANCO = args.banco
+    if args.metricas:
+        metricas.ativar(args.metricas)
+    if args.perfil:
+        metricas.ativar_perfil(args.perfil)
+    return args.funcao(args)
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,354 @@
+# Cliente HTTP único das APIs externas (ViaCEP, Nominatim e Open-Meteo). Cada processo
+# tem uma sessão com conexões keep-alive reaproveitadas e, por host:
+#   - limite de requisições simultâneas;
+#   - timeout de conexão curto e prazo total por chamada (tentativas + esperas);
+#   - novas tentativas com espera exponencial aleatória (jitter) em falhas de rede,
+#     timeouts, 429 e 5xx (respeitando o Retry-After);
+#   - disjuntor: depois de FALHAS_PARA_ABRIR falhas seguidas, as chamadas ao host falham
+#     na hora por TEMPO_ABERTO segundos (uma requisição de teste reabre o caminho).
+# A latência de cada requisição vai para o histograma do endpoint (host + caminho).
+#
+# Exemplos:
+#   python cliente_http.py "https://viacep.com.br/ws/01001000/json/" --vezes 5
+#   python cliente_http.py "https://api.open-meteo.com/v1/forecast?latitude=-23.55&longitude=-46.63&daily=precipitation_sum"
+import argparse                          # Para ler os parâmetros da linha de comando
+import bisect                            # Faixa do histograma de cada latência
+import os                                # Uma sessão por processo
+import random                            # Jitter das esperas entre tentativas
+import sys                               # Para o código de saída do programa
+import threading                         # Limites e contadores seguros entre threads
+import time                              # Medição das latências e esperas
+from urllib.parse import urlsplit        # Host e caminho de cada URL
+
+import requests                          # Sessões HTTP
+from requests.adapters import HTTPAdapter  # Tamanho do pool de conexões
+
+import metricas                          # Contadores de requisições e bytes baixados
+
+# Timeout para abrir a conexão (s): falhar cedo e tentar de novo costuma ser mais rápido
+# do que esperar um servidor sobrecarregado aceitar a conexão
+TIMEOUT_CONEXAO = 5
+
+# Timeout de leitura padrão (s), quando quem chama não informa
+TIMEOUT_LEITURA = 30
+
+# Tentativas por chamada (a primeira e as repetições)
+TENTATIVAS_PADRAO = 3
+
+# Espera entre tentativas: aleatória entre 0 e BACKOFF_BASE * 2^tentativa, até BACKOFF_MAXIMO (s)
+BACKOFF_BASE = 0.5
+BACKOFF_MAXIMO = 8.0
+
+# Prazo total de uma chamada (s), somando todas as tentativas e esperas
+PRAZO_TOTAL = 60.0
+
+# Requisições simultâneas por host (e conexões guardadas no pool de cada host)
+CONEXOES_POR_HOST = 4
+
+# Limites próprios de alguns hosts (o Nominatim pede uma requisição por vez)
+LIMITES_HOST = {"nominatim.openstreetmap.org": 1}
+
+# Status HTTP que valem nova tentativa (e contam como falha no disjuntor)
+STATUS_REPETIR = frozenset((429, 500, 502, 503, 504))
+
+# Falhas seguidas que abrem o disjuntor do host e tempo (s) que ele fica aberto
+FALHAS_PARA_ABRIR = 5
+TEMPO_ABERTO = 30.0
+
+# Limites superiores (ms) das faixas dos histogramas de latência
+LIMITES_HISTOGRAMA_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+# Erro de chamada recusada porque o disjuntor do host está aberto
+# (é uma RequestException: quem já trata erros de rede não precisa mudar)
+class CircuitoAberto(requests.exceptions.ConnectionError):
+    pass
+
+
+# Histograma de latências (ms) de um endpoint, com faixas fixas
+class Histograma:
+    def __init__(self, limites=LIMITES_HISTOGRAMA_MS):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)  # A última faixa é "acima do maior limite"
+        self.total = 0
+        self.soma_ms = 0.0
+        self.erros = 0
+        self._trava = threading.Lock()
+
+    def registrar(self, ms, erro=False):
+        with self._trava:
+            self.contagens[bisect.bisect_left(self.limites, ms)] += 1
+            self.total += 1
+            self.soma_ms += ms
+            self.erros += bool(erro)
+
+    # Percentil aproximado (0-100): limite superior da faixa em que ele cai
+    def percentil(self, p):
+        with self._trava:
+            if self.total == 0:
+                return None
+            alvo = p / 100 * self.total
+            acumulado = 0
+            for limite, contagem in zip(self.limites, self.contagens):
+                acumulado += contagem
+                if acumulado >= alvo:
+                    return float(limite)
+            return float("inf")
+
+    def resumo(self):
+        return {
+            'requisicoes': self.total,
+            'erros': self.erros,
+            'media_ms': round(self.soma_ms / self.total, 1) if self.total else None,
+            'p50_ms': self.percentil(50),
+            'p95_ms': self.percentil(95),
+            'p99_ms': self.percentil(99),
+        }
+
+
+# Disjuntor de um host: fechado (normal), aberto (recusa tudo) e meio-aberto (uma requisição de teste)
+class Disjuntor:
+    def __init__(self, falhas_para_abrir=FALHAS_PARA_ABRIR, tempo_aberto=TEMPO_ABERTO):
+        self.falhas_para_abrir = falhas_para_abrir
+        self.tempo_aberto = tempo_aberto
+        self.falhas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+        self._trava = threading.Lock()
+
+    # True se a requisição pode seguir
+    def permitir(self):
+        with self._trava:
+            if self.falhas < self.falhas_para_abrir:
+                return True
+            if time.monotonic() < self._aberto_ate or self._testando:
+                return False
+            self._testando = True  # Meio-aberto: só esta requisição testa o host
+            return True
+
+    def sucesso(self):
+        with self._trava:
+            self.falhas = 0
+            self._testando = False
+
+    # Fim da requisição de teste sem contar falha (erro de quem chamou, não do host)
+    def liberar(self):
+        with self._trava:
+            self._testando = False
+
+    def falha(self):
+        with self._trava:
+            self.falhas += 1
+            self._testando = False
+            if self.falhas >= self.falhas_para_abrir:
+                self._aberto_ate = time.monotonic() + self.tempo_aberto
+
+    def estado(self):
+        with self._trava:
+            if self.falhas < self.falhas_para_abrir:
+                return "fechado"
+            return "aberto" if time.monotonic() < self._aberto_ate else "meio-aberto"
+
+
+class ClienteHTTP:
+    def __init__(self, conexoes_por_host=CONEXOES_POR_HOST, limites_host=None, tentativas=TENTATIVAS_PADRAO,
+                 prazo_total=PRAZO_TOTAL, falhas_para_abrir=FALHAS_PARA_ABRIR, tempo_aberto=TEMPO_ABERTO):
+        self.conexoes_por_host = conexoes_por_host
+        self.limites_host = dict(LIMITES_HOST if limites_host is None else limites_host)
+        self.tentativas = tentativas
+        self.prazo_total = prazo_total
+        self.falhas_para_abrir = falhas_para_abrir
+        self.tempo_aberto = tempo_aberto
+
+        # Sessão com um pool de conexões keep-alive por host
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=16, pool_maxsize=conexoes_por_host)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+        self._semaforos = {}    # host -> limite de requisições simultâneas
+        self._disjuntores = {}  # host -> Disjuntor
+        self._histogramas = {}  # endpoint -> Histograma
+        self._trava = threading.Lock()
+
+    # Estruturas por host/endpoint, criadas no primeiro uso
+    def _do_host(self, host):
+        with self._trava:
+            if host not in self._disjuntores:
+                limite = self.limites_host.get(host, self.conexoes_por_host)
+                self._semaforos[host] = threading.BoundedSemaphore(limite)
+                self._disjuntores[host] = Disjuntor(self.falhas_para_abrir, self.tempo_aberto)
+            return self._semaforos[host], self._disjuntores[host]
+
+    def histograma(self, endpoint):
+        with self._trava:
+            if endpoint not in self._histogramas:
+                self._histogramas[endpoint] = Histograma()
+            return self._histogramas[endpoint]
+
+    # Espera antes da próxima tentativa: Retry-After (se houver) ou exponencial com jitter
+    def _espera(self, tentativa, resposta):
+        if resposta is not None:
+            retry_after = resposta.headers.get("Retry-After", "") if resposta.headers else ""
+            if retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAXIMO)
+        return random.uniform(0, min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** tentativa))
+
+    # GET com limites, novas tentativas e disjuntor. `timeout` é o de leitura (s) ou uma tupla
+    # (conexão, leitura). Devolve a resposta (a última, se todas as tentativas deram 429/5xx) ou
+    # levanta a exceção da última falha de rede. Com stream=True, o limite do host vale até
+    # chegarem os cabeçalhos; quem chama fecha a resposta.
+    def get(self, url, endpoint=None, timeout=None, tentativas=None, stream=False, headers=None):
+        partes = urlsplit(url)
+        host = partes.netloc  # Host e porta: serviços em portas diferentes têm limites próprios
+        histograma = self.histograma(endpoint or f"{partes.netloc}{partes.path}")
+        semaforo, disjuntor = self._do_host(host)
+        if isinstance(timeout, tuple):
+            conexao, leitura = timeout
+        else:
+            leitura = timeout or TIMEOUT_LEITURA
+            conexao = min(TIMEOUT_CONEXAO, leitura)
+        tentativas = tentativas or self.tentativas
+        prazo = time.monotonic() + self.prazo_total
+
+        for tentativa in range(tentativas):
+            if not disjuntor.permitir():
+                metricas.contar("http_recusadas_disjuntor")
+                raise CircuitoAberto(f"{host}: muitas falhas seguidas, novas chamadas suspensas por até "
+                                     f"{disjuntor.tempo_aberto:g}s")
+            resposta, erro = None, None
+            try:
+                with semaforo:
+                    # O timeout de leitura nunca passa do que resta do prazo total
+                    restante = max(0.1, prazo - time.monotonic())
+                    inicio = time.perf_counter()
+                    try:
+                        resposta = self.sessao.get(url, timeout=(min(conexao, restante), min(leitura, restante)),
+                                                   stream=stream, headers=headers)
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                        erro = e
+                    ms = (time.perf_counter() - inicio) * 1000
+            except BaseException as e:
+                # Sem nova tentativa, mas o disjuntor nunca fica preso no teste meio-aberto: erros do
+                # host (redirecionamentos demais, resposta truncada) contam como falha; URL inválida
+                # (os ValueError do requests) e Ctrl+C só liberam o teste
+                if isinstance(e, requests.exceptions.RequestException) and not isinstance(e, ValueError):
+                    disjuntor.falha()
+                else:
+                    disjuntor.liberar()
+                raise
+            metricas.contar("http_requisicoes")
+
+            if erro is None and resposta.status_code not in STATUS_REPETIR:
+                disjuntor.sucesso()
+                histograma.registrar(ms, erro=resposta.status_code >= 400)
+                if metricas.ativo():
+                    # Em stream o corpo ainda não foi lido: vale o Content-Length, se houver
+                    tamanho = resposta.headers.get("Content-Length", 0) if stream else len(resposta.content)
+                    metricas.contar("bytes_baixados", int(tamanho))
+                return resposta
+
+            disjuntor.falha()
+            histograma.registrar(ms, erro=True)
+            espera = self._espera(tentativa, resposta)
+            if tentativa + 1 >= tentativas or time.monotonic() + espera >= prazo:
+                break
+            if resposta is not None:
+                resposta.close()  # Devolve a conexão ao pool antes de esperar
+            metricas.contar("http_repeticoes")
+            time.sleep(espera)
+
+        if erro is not None:
+            raise erro
+        return resposta
+
+    # Resumo das latências por endpoint e estado do disjuntor de cada host
+    def estatisticas(self):
+        with self._trava:
+            histogramas = dict(self._histogramas)
+            disjuntores = dict(self._disjuntores)
+        return {
+            'endpoints': {endpoint: h.resumo() for endpoint, h in sorted(histogramas.items())},
+            'hosts': {host: d.estado() for host, d in sorted(disjuntores.items())},
+        }
+
+
+# Um cliente por processo (as conexões abertas não podem ser herdadas por processos filhos)
+_clientes = {}
+
+
+def obter_cliente():
+    pid = os.getpid()
+    if pid not in _clientes:
+        _clientes.clear()
+        _clientes[pid] = ClienteHTTP()
+    return _clientes[pid]
+
+
+# Atalho: GET pelo cliente do processo
+def get(url, **opcoes):
+    return obter_cliente().get(url, **opcoes)
+
+
+# Fábrica de adaptador do geopy que faz as requisições pelo cliente do processo
+# (uso: Nominatim(..., adapter_factory=adaptador_geopy)). O geopy só é importado aqui.
+def adaptador_geopy(proxies=None, ssl_context=None):
+    from geopy.adapters import BaseSyncAdapter, AdapterHTTPError
+    from geopy.exc import GeocoderTimedOut, GeocoderUnavailable, GeocoderParseError
+
+    class AdaptadorClienteHTTP(BaseSyncAdapter):
+        def _requisitar(self, url, timeout, headers):
+            try:
+                resposta = get(url, timeout=timeout, headers=headers)
+            except requests.exceptions.Timeout:
+                raise GeocoderTimedOut("Service timed out")
+            except requests.exceptions.RequestException as e:
+                raise GeocoderUnavailable(str(e))
+            if resposta.status_code >= 400:
+                raise AdapterHTTPError(f"Non-successful status code {resposta.status_code}",
+                                       status_code=resposta.status_code, headers=resposta.headers,
+                                       text=resposta.text)
+            return resposta
+
+        def get_text(self, url, *, timeout, headers):
+            return self._requisitar(url, timeout, headers).text
+
+        def get_json(self, url, *, timeout, headers):
+            resposta = self._requisitar(url, timeout, headers)
+            try:
+                return resposta.json()
+            except ValueError:
+                raise GeocoderParseError(f"Resposta inválida do serviço:\n{resposta.text}")
+
+    return AdaptadorClienteHTTP(proxies=proxies, ssl_context=ssl_context)
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Faz GETs pelo cliente HTTP e mostra as latências.")
+    parser.add_argument("url")
+    parser.add_argument("--vezes", type=int, default=1, help="quantidade de requisições (padrão: 1)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_LEITURA,
+                        help=f"timeout de leitura em segundos (padrão: {TIMEOUT_LEITURA})")
+    args = parser.parse_args(argv)
+
+    falhas = 0
+    for _ in range(args.vezes):
+        try:
+            resposta = get(args.url, timeout=args.timeout)
+            print(f"HTTP {resposta.status_code} | {len(resposta.content)} bytes")
+        except requests.exceptions.RequestException as e:
+            falhas += 1
+            print(f"Erro: {str(e)}")
+
+    estatisticas = obter_cliente().estatisticas()
+    for endpoint, resumo in estatisticas['endpoints'].items():
+        print(f"\n{endpoint}")
+        print(" | ".join(f"{chave}: {valor}" for chave, valor in resumo.items()))
+    for host, estado in estatisticas['hosts'].items():
+        print(f"disjuntor {host}: {estado}")
+    return 1 if falhas else 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -1,62 +1,239 @@
-#Para consultar que as infos do banco de dados estão sendo salvas corretamente
-import sqlite3
-
-def consultar_dados_graficodiario():
-    conn = sqlite3.connect('analise_diaria.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM chuva_semana')
-    resultados = cursor.fetchall()
-    
-    if resultados:
-        print("\n Dados da análise diária, separados por semanas:")
-        for linha in resultados:
-            cep, data, chuva = linha
-            print(f"CEP: {cep} | Data: {data} | Chuva (mm): {chuva}")
-    else:
-        print("Nenhum dado encontrado no banco de dados diário.")
-    
-    conn.close()
-
-import sqlite3
-
-def consultar_dados_graficomensal():
-    conn = sqlite3.connect("analise_mensal.db")
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM precipitacao_mensal")
-    resultados = cursor.fetchall()
-
-    if resultados:
-        print("\nDados da análise mensal separados por semana:\n")
-        for linha in resultados:
-            id_, cep, ano, mes, semana, precipitacao_mm, lat, lon = linha
-            print(f"ID: {id_:03d} | CEP: {cep} | Ano: {ano} | Mês: {mes:02d} | Semana: {semana} | "
-                  f"Precipitação: {precipitacao_mm:.2f} mm | Latitude: {lat:.4f} | Longitude: {lon:.4f}")
-    else:
-        print("Nenhum dado encontrado no banco.")
-
-    conn.close()
-
-
-def consultar_dados_graficoanual():
-    conn = sqlite3.connect('analise_anual.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM precipitacao_anual')
-    resultados = cursor.fetchall()
-    
-    if resultados:
-        print("\n Dados da análise anual (média mensal de precipitação):")
-        for linha in resultados:
-            id_, cep, ano, mes, precipitacao, lat, lon = linha
-            print(f"ID: {id_} | CEP: {cep} | Ano: {ano} | Mês: {mes} | Precipitação (mm): {precipitacao:.2f} | Lat: {lat} | Lon: {lon}")
-    else:
-        print("Nenhum dado encontrado no banco de dados anual.")
-    
-    conn.close()
-
-# Chamada das funções com título explicativo
-consultar_dados_graficodiario()
-consultar_dados_graficomensal()
-consultar_dados_graficoanual()
+#Para consultar que as infos do banco de dados estão sendo salvas corretamente
+#
+#Consulta as tabelas dos gráficos com filtros (CEP e período ano/mês), ordenação e
+#paginação. As linhas são lidas em blocos (fetchmany) e escritas uma a uma, então a
+#memória não cresce com o tamanho da tabela.
+#
+#Exemplos:
+#   python consulta_bc_graficos.py
+#   python consulta_bc_graficos.py mensal --cep 01001000 --de 2023-01 --ate 2023-12
+#   python consulta_bc_graficos.py anual --ordem precipitacao --limite 20 --formato csv
+#   python consulta_bc_graficos.py diario --formato jsonl --saida chuva.jsonl
+import argparse  # Para ler os parâmetros da linha de comando
+import csv       # Saída em CSV
+import json      # Saída em JSONL
+import sys       # Saída padrão e código de saída do programa
+
+import banco  # Banco de dados único (conexões e migrações)
+from geocodificacao import normalizar_cep  # Para aceitar CEP com ou sem hífen
+
+# Linhas lidas do banco por vez
+TAMANHO_BLOCO = 1000
+
+# Tabelas consultáveis: colunas e ordenações aceitas. As ordenações por CEP e por
+# período seguem os índices do banco (chave única por CEP e índices por período).
+CONSULTAS = {
+    'diario': {
+        'tabela': 'chuva_semana',
+        'colunas': ('cep', 'data', 'chuva'),
+        'ordens': {
+            'cep': 'cep, data',
+            'periodo': 'data, cep',
+            'precipitacao': 'chuva DESC, cep, data',
+        },
+    },
+    'mensal': {
+        'tabela': 'precipitacao_mensal',
+        'colunas': ('id', 'cep', 'ano', 'mes', 'semana', 'precipitacao_mm', 'latitude', 'longitude'),
+        'ordens': {
+            'cep': 'cep, ano, mes, semana',
+            'periodo': 'ano, mes, semana, cep',
+            'precipitacao': 'precipitacao_mm DESC, cep, ano, mes, semana',
+        },
+    },
+    'anual': {
+        'tabela': 'precipitacao_anual',
+        'colunas': ('id', 'cep', 'ano', 'mes', 'precipitacao_mm', 'latitude', 'longitude'),
+        'ordens': {
+            'cep': 'cep, ano, mes',
+            'periodo': 'ano, mes, cep',
+            'precipitacao': 'precipitacao_mm DESC, cep, ano, mes',
+        },
+    },
+}
+
+
+#Converte 'AAAA' ou 'AAAA-MM' em (ano, mês); sem mês vale o primeiro (início) ou o último (fim)
+def ler_periodo(texto, fim=False):
+    partes = texto.split('-')
+    try:
+        ano = int(partes[0])
+        mes = int(partes[1]) if len(partes) > 1 else (12 if fim else 1)
+    except ValueError:
+        raise ValueError(f"Período inválido: {texto}. Use AAAA ou AAAA-MM.")
+    if len(partes) > 2 or not 1 <= mes <= 12:
+        raise ValueError(f"Período inválido: {texto}. Use AAAA ou AAAA-MM.")
+    return ano, mes
+
+
+#Monta o WHERE dos filtros. O filtro por ano vem separado do filtro por (ano, mês)
+#para que o banco use a faixa de anos no índice.
+def montar_filtros(tipo, cep=None, inicio=None, fim=None):
+    condicoes, parametros = [], []
+    if cep:
+        condicoes.append('cep = ?')
+        parametros.append(normalizar_cep(cep))
+
+    if tipo == 'diario':
+        #data é texto AAAA-MM-DD: a faixa vira comparação de texto (usa o índice por data)
+        if inicio:
+            condicoes.append('data >= ?')
+            parametros.append(f"{inicio[0]:04d}-{inicio[1]:02d}-01")
+        if fim:
+            ano, mes = (fim[0] + 1, 1) if fim[1] == 12 else (fim[0], fim[1] + 1)
+            condicoes.append('data < ?')
+            parametros.append(f"{ano:04d}-{mes:02d}-01")
+    else:
+        if inicio:
+            condicoes.append('ano >= ? AND ano * 100 + mes >= ?')
+            parametros += [inicio[0], inicio[0] * 100 + inicio[1]]
+        if fim:
+            condicoes.append('ano <= ? AND ano * 100 + mes <= ?')
+            parametros += [fim[0], fim[0] * 100 + fim[1]]
+
+    where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, parametros
+
+
+#Gera as linhas (tuplas) da consulta, lidas do banco em blocos de tamanho_bloco
+def consultar(conn, tipo, cep=None, inicio=None, fim=None, ordem='cep', limite=None,
+              deslocamento=0, tamanho_bloco=TAMANHO_BLOCO):
+    consulta = CONSULTAS[tipo]
+    where, parametros = montar_filtros(tipo, cep, inicio, fim)
+    sql = (f"SELECT {', '.join(consulta['colunas'])} FROM {consulta['tabela']}{where} "
+           f"ORDER BY {consulta['ordens'][ordem]}")
+    if limite is not None or deslocamento:
+        sql += " LIMIT ? OFFSET ?"
+        parametros += [-1 if limite is None else limite, deslocamento]
+
+    cursor = conn.execute(sql, parametros)
+    try:
+        while True:
+            bloco = cursor.fetchmany(tamanho_bloco)
+            if not bloco:
+                break
+            yield from bloco
+    finally:
+        cursor.close()
+
+
+#Formato de texto de cada tabela (o mesmo das consultas originais)
+def formatar_texto(tipo, linha):
+    if tipo == 'diario':
+        cep, data, chuva = linha
+        return f"CEP: {cep} | Data: {data} | Chuva (mm): {chuva}"
+    if tipo == 'mensal':
+        id_, cep, ano, mes, semana, precipitacao_mm, lat, lon = linha
+        return (f"ID: {id_:03d} | CEP: {cep} | Ano: {ano} | Mês: {mes:02d} | Semana: {semana} | "
+                f"Precipitação: {precipitacao_mm:.2f} mm | Latitude: {lat:.4f} | Longitude: {lon:.4f}")
+    id_, cep, ano, mes, precipitacao, lat, lon = linha
+    return f"ID: {id_} | CEP: {cep} | Ano: {ano} | Mês: {mes} | Precipitação (mm): {precipitacao:.2f} | Lat: {lat} | Lon: {lon}"
+
+
+#Escreve as linhas no formato pedido (texto, csv ou jsonl) e retorna quantas foram escritas
+def escrever(tipo, linhas, formato='texto', saida=None):
+    saida = saida or sys.stdout
+    colunas = CONSULTAS[tipo]['colunas']
+    total = 0
+    if formato == 'csv':
+        escritor = csv.writer(saida)
+        escritor.writerow(colunas)
+        for linha in linhas:
+            escritor.writerow(linha)
+            total += 1
+    elif formato == 'jsonl':
+        for linha in linhas:
+            saida.write(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + "\n")
+            total += 1
+    else:
+        for linha in linhas:
+            saida.write(formatar_texto(tipo, linha) + "\n")
+            total += 1
+    return total
+
+
+#Mostra em texto uma tabela inteira (ou filtrada), com título, como as consultas originais
+def mostrar(tipo, titulo, mensagem_vazio, caminho_banco=None, **filtros):
+    conn = banco.conectar(caminho_banco)
+    linhas = consultar(conn, tipo, **filtros)
+    try:
+        primeira = next(linhas, None)
+        if primeira is None:
+            print(mensagem_vazio)
+            return
+        print(titulo)
+        escrever(tipo, [primeira], 'texto')
+        escrever(tipo, linhas, 'texto')
+    finally:
+        linhas.close()
+        conn.close()
+
+def consultar_dados_graficodiario(caminho_banco=None, **filtros):
+    mostrar('diario', "\n Dados da análise diária, separados por semanas:",
+            "Nenhum dado encontrado no banco de dados diário.", caminho_banco, **filtros)
+
+def consultar_dados_graficomensal(caminho_banco=None, **filtros):
+    mostrar('mensal', "\nDados da análise mensal separados por semana:\n",
+            "Nenhum dado encontrado no banco.", caminho_banco, **filtros)
+
+
+def consultar_dados_graficoanual(caminho_banco=None, **filtros):
+    mostrar('anual', "\n Dados da análise anual (média mensal de precipitação):",
+            "Nenhum dado encontrado no banco de dados anual.", caminho_banco, **filtros)
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta os dados salvos pelos gráficos de chuva.")
+    parser.add_argument("tipo", nargs="?", choices=["todos"] + list(CONSULTAS), default="todos",
+                        help="tabela a consultar (padrão: as três, em texto)")
+    parser.add_argument("--cep", help="filtra por CEP")
+    parser.add_argument("--de", help="período inicial (AAAA ou AAAA-MM)")
+    parser.add_argument("--ate", help="período final (AAAA ou AAAA-MM)")
+    parser.add_argument("--ordem", choices=["cep", "periodo", "precipitacao"], default="cep",
+                        help="ordenação (padrão: cep)")
+    parser.add_argument("--limite", type=int, help="máximo de linhas")
+    parser.add_argument("--pagina", type=int, default=1, help="página de --limite linhas (padrão: 1)")
+    parser.add_argument("--formato", choices=["texto", "csv", "jsonl"], default="texto", help="formato da saída")
+    parser.add_argument("--saida", help="arquivo de saída (padrão: tela)")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    try:
+        inicio = ler_periodo(args.de) if args.de else None
+        fim = ler_periodo(args.ate, fim=True) if args.ate else None
+    except ValueError as erro:
+        parser.error(str(erro))
+    if args.pagina < 1 or (args.limite is not None and args.limite < 1):
+        parser.error("--limite e --pagina devem ser maiores que zero.")
+    if args.pagina > 1 and args.limite is None:
+        parser.error("--pagina precisa de --limite.")
+    deslocamento = (args.pagina - 1) * (args.limite or 0)
+
+    filtros = {'cep': args.cep, 'inicio': inicio, 'fim': fim, 'ordem': args.ordem,
+               'limite': args.limite, 'deslocamento': deslocamento}
+
+    #Sem tipo: as três tabelas em texto, como antes
+    if args.tipo == "todos":
+        consultar_dados_graficodiario(args.banco, **filtros)
+        consultar_dados_graficomensal(args.banco, **filtros)
+        consultar_dados_graficoanual(args.banco, **filtros)
+        return 0
+
+    saida = open(args.saida, "w", encoding="utf-8", newline="") if args.saida else sys.stdout
+    conn = banco.conectar(args.banco)
+    linhas = consultar(conn, args.tipo, **filtros)
+    try:
+        total = escrever(args.tipo, linhas, args.formato, saida)
+    finally:
+        linhas.close()
+        conn.close()
+        if args.saida:
+            saida.close()
+    if args.saida:
+        print(f"{total} linha(s) gravada(s) em {args.saida}.")
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,219 @@
+# Dados sintéticos para benchmarks e testes sem rede: usuários, relatos de alagamento,
+# previsões e décadas de chuva diária/horária. Tudo é determinístico (mesma semente,
+# mesmos dados), e a chuva de um local/dia não depende do período pedido: os servidores
+# falsos (servidores_falsos.py) devolvem sempre o mesmo valor para o mesmo dia.
+#
+# Exemplos:
+#   python dados_sinteticos.py --usuarios 20000 --relatos 50000 --banco sintetico.db
+#   python dados_sinteticos.py --ceps 500 --previsao --banco sintetico.db
+import argparse                 # Para ler os parâmetros da linha de comando
+import sys                      # Para o código de saída do programa
+import time                     # Horário dos relatos
+from datetime import date, datetime, timedelta
+
+import numpy as np              # Geradores aleatórios e séries
+
+import banco                    # Banco de dados único
+from alertas import semear_contagem  # Contagens de alerta dos relatos gerados
+from indice_espacial import celula   # Célula da grade de cada coordenada
+
+# Faixa dos CEPs gerados (Grande São Paulo: 01000-000 a 09999-999)
+CEP_INICIAL = 1000000
+CEP_FINAL = 9999999
+
+# CEPs que não existem (para os caminhos de "CEP não encontrado")
+PREFIXO_CEP_INEXISTENTE = "99"
+
+# Opções dos relatos (as mesmas aceitas pelo cadastro)
+INTENSIDADES = ("fraca", "média", "forte")
+NIVEIS = ("baixo", "médio", "alto")
+DEFICIENCIAS = ("Nenhuma", "Visual", "Auditiva", "Física", "Intelectual")
+
+
+# Lista de `quantidade` CEPs distintos (8 dígitos), espalhados pela faixa
+def gerar_ceps(quantidade, semente=0):
+    gerador = np.random.default_rng(semente)
+    numeros = gerador.choice(CEP_FINAL - CEP_INICIAL, size=quantidade, replace=False) + CEP_INICIAL
+    return [f"{numero:08d}" for numero in numeros.tolist()]
+
+
+# Coordenadas de um CEP: fixas para o CEP e próximas para CEPs de prefixo igual
+# (os 5 primeiros dígitos definem a região, os 3 últimos um deslocamento pequeno)
+def coordenadas_cep(cep):
+    regiao, sufixo = int(cep[:5]), int(cep[5:8])
+    lat = -23.30 - (regiao % 97) * 0.006 - (sufixo % 10) * 0.0004
+    lon = -46.40 - (regiao // 97 % 97) * 0.006 - (sufixo // 10 % 10) * 0.0004
+    return round(lat, 6), round(lon, 6)
+
+
+# Endereço no formato da ViaCEP (dicionário) de um CEP sintético
+def endereco_cep(cep):
+    regiao = int(cep[:5])
+    return {
+        "cep": f"{cep[:5]}-{cep[5:]}",
+        "logradouro": f"Rua Sintética {int(cep[5:]) + 1}",
+        "complemento": "",
+        "bairro": f"Bairro {regiao % 500:03d}",
+        "localidade": "São Paulo",
+        "uf": "SP",
+        "ibge": "3550308",
+        "gia": "1004",
+        "ddd": "11",
+        "siafi": "7107",
+    }
+
+
+# Semente de um local (coordenadas arredondadas como no armazém) e ano
+def _semente_local(lat, lon, ano):
+    return (int(round(lat * 100)) % 100_000 + 100_000, int(round(lon * 100)) % 100_000 + 100_000, ano)
+
+
+# Chuva diária (mm) de um ano inteiro em um local: ~35% dos dias com chuva, mais chuva
+# e dias chuvosos no verão (dez-mar) e cauda longa (gama), como nas séries de São Paulo
+def _chuva_do_ano(lat, lon, ano):
+    gerador = np.random.default_rng(_semente_local(lat, lon, ano))
+    dia_do_ano = np.arange(366)
+    estacao = np.cos(2 * np.pi * (dia_do_ano - 15) / 365.25)  # 1 em meados de janeiro, -1 em julho
+    probabilidade = 0.35 + 0.2 * estacao
+    chuvoso = gerador.random(366) < probabilidade
+    return np.where(chuvoso, gerador.gamma(0.75, 9.0 + 6.0 * estacao), 0.0).round(1)
+
+
+# Chuva diária (mm) de inicio..inicio+dias-1 em um local (float64)
+def chuva_diaria(lat, lon, inicio, dias):
+    valores = np.empty(dias)
+    dia = inicio
+    feitos = 0
+    while feitos < dias:
+        deslocamento = (dia - date(dia.year, 1, 1)).days
+        quantidade = min(dias - feitos, (date(dia.year, 12, 31) - dia).days + 1)
+        valores[feitos:feitos + quantidade] = _chuva_do_ano(lat, lon, dia.year)[deslocamento:deslocamento + quantidade]
+        feitos += quantidade
+        dia += timedelta(days=quantidade)
+    return valores
+
+
+# Chuva horária (mm) de inicio..inicio+dias-1 (24 valores por dia): o total de cada dia
+# concentrado em poucas horas, de preferência à tarde (chuva de verão)
+def chuva_horaria(lat, lon, inicio, dias):
+    totais = chuva_diaria(lat, lon, inicio, dias)
+    horas = np.empty((dias, 24))
+    perfil = 1.0 + np.exp(-((np.arange(24) - 16) ** 2) / 8.0) * 4  # Pico às 16h
+    for i in range(dias):
+        dia = inicio + timedelta(days=i)
+        gerador = np.random.default_rng(_semente_local(lat, lon, dia.toordinal()))
+        pesos = gerador.gamma(0.2, 1.0, 24) * perfil
+        horas[i] = pesos / pesos.sum() * totais[i] if pesos.sum() > 0 else 0.0
+    return horas.reshape(-1).round(2)
+
+
+# Cadastra `quantidade` usuários nos CEPs dados (já com coordenadas e célula, como
+# depois de indice_espacial.indexar_pendentes). ~20% precisam de resgate.
+def gerar_usuarios(conn, quantidade, ceps, semente=0, indexados=True):
+    gerador = np.random.default_rng(semente)
+    escolhidos = gerador.integers(0, len(ceps), quantidade)
+    resgate = gerador.random(quantidade) < 0.2
+    deficiencias = gerador.integers(0, len(DEFICIENCIAS), quantidade)
+    primeiro_cpf = conn.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    linhas = []
+    for i in range(quantidade):
+        cep = ceps[escolhidos[i]]
+        endereco = endereco_cep(cep)
+        lat, lon = coordenadas_cep(cep) if indexados else (None, None)
+        celula_lat, celula_lon = celula(lat, lon) if indexados else (None, None)
+        linhas.append((f"Usuário Sintético {primeiro_cpf + i}", f"{primeiro_cpf + i:011d}",
+                       DEFICIENCIAS[deficiencias[i]], cep,
+                       f"{endereco['logradouro']}, {endereco['bairro']}, {endereco['localidade']} - {endereco['uf']}",
+                       "sim" if resgate[i] else "não", lat, lon, celula_lat, celula_lon))
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO usuarios (nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, "
+            "necessita_resgate, latitude, longitude, celula_lat, celula_lon) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            linhas)
+    return len(linhas)
+
+
+# Registra `quantidade` relatos nas últimas `horas` horas. Poucos CEPs recebem a maior
+# parte dos relatos (distribuição de Zipf), como num ponto de alagamento real.
+# As contagens de alerta são preenchidas no fim (alertas.semear_contagem).
+def gerar_relatos(conn, quantidade, ceps, horas=24, semente=0, agora=None):
+    gerador = np.random.default_rng(semente)
+    agora = int(agora or time.time())
+    posicoes = (gerador.zipf(1.3, quantidade) - 1) % len(ceps)
+    instantes = agora - gerador.integers(0, horas * 3600, quantidade)
+    intensidades = gerador.choice(len(INTENSIDADES), quantidade, p=(0.2, 0.3, 0.5))
+    niveis = gerador.choice(len(NIVEIS), quantidade, p=(0.4, 0.35, 0.25))
+
+    linhas = []
+    for i in range(quantidade):
+        cep = ceps[posicoes[i]]
+        endereco = endereco_cep(cep)
+        lat, lon = coordenadas_cep(cep)
+        celula_lat, celula_lon = celula(lat, lon)
+        registrado_em = int(instantes[i])
+        linhas.append((f"Reportante {i}", f"{i:011d}", cep,
+                       f"{endereco['logradouro']}, {endereco['bairro']}, {endereco['localidade']} - {endereco['uf']}",
+                       INTENSIDADES[intensidades[i]], NIVEIS[niveis[i]],
+                       datetime.fromtimestamp(registrado_em).strftime("%Y-%m-%d %H:%M:%S"), registrado_em,
+                       lat, lon, celula_lat, celula_lon))
+    with conn:
+        conn.executemany(
+            "INSERT INTO relatorios_alagamento (nome_reportante, cpf_reportante, cep_local, endereco_alagado, "
+            "intensidade_chuva, nivel_inundacao, data_hora_registro, registrado_em, latitude, longitude, "
+            "celula_lat, celula_lon) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            linhas)
+    semear_contagem(conn)
+    return len(linhas)
+
+
+# Grava em chuva_semana a previsão de `dias` dias a partir de hoje para os CEPs dados
+def gerar_previsoes(conn, ceps, dias=7, hoje=None):
+    hoje = hoje or date.today()
+    datas = [(hoje + timedelta(days=i)).isoformat() for i in range(dias)]
+    linhas = []
+    for cep in ceps:
+        lat, lon = coordenadas_cep(cep)
+        # A previsão usa a chuva sintética dos próximos dias (com a mesma cauda longa)
+        for data, chuva in zip(datas, chuva_diaria(lat, lon, hoje, dias).tolist()):
+            linhas.append((cep, data, chuva))
+    with conn:
+        conn.executemany(
+            "INSERT INTO chuva_semana (cep, data, chuva) VALUES (?, ?, ?) "
+            "ON CONFLICT (cep, data) DO UPDATE SET chuva = excluded.chuva", linhas)
+    return len(linhas)
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Preenche um banco com dados sintéticos (usuários, relatos, previsões).")
+    parser.add_argument("--ceps", type=int, default=1000, help="CEPs distintos (padrão: 1000)")
+    parser.add_argument("--usuarios", type=int, default=0, help="usuários a cadastrar")
+    parser.add_argument("--relatos", type=int, default=0, help="relatos das últimas 24 horas a registrar")
+    parser.add_argument("--previsao", action="store_true", help="grava a previsão de 7 dias de todos os CEPs")
+    parser.add_argument("--semente", type=int, default=0, help="semente dos geradores (padrão: 0)")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    if args.ceps <= 0:
+        print("Erro: a quantidade de CEPs deve ser maior que zero.")
+        return 1
+
+    ceps = gerar_ceps(args.ceps, args.semente)
+    conn = banco.conectar(args.banco)
+    try:
+        inicio = time.perf_counter()
+        if args.usuarios:
+            print(f"Usuários cadastrados: {gerar_usuarios(conn, args.usuarios, ceps, args.semente)}")
+        if args.relatos:
+            print(f"Relatos registrados: {gerar_relatos(conn, args.relatos, ceps, semente=args.semente)}")
+        if args.previsao:
+            print(f"Dias de previsão gravados: {gerar_previsoes(conn, ceps)}")
+        print(f"Concluído em {time.perf_counter() - inicio:.1f}s")
+    finally:
+        conn.close()
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,97 @@
+# Despacho de resgate: lista os usuários que precisam de resgate (necessita_resgate = 'sim')
+# a até N km dos CEPs que estão acima do limite de relatos de alagamento, do mais
+# próximo ao mais distante. A busca usa o índice espacial em grade (indice_espacial.py).
+#
+# Exemplos:
+#   python despacho.py --raio 5
+#   python despacho.py --raio 10 --janela 6h --sem-indexar
+import argparse                 # Para ler os parâmetros da linha de comando
+import sys                      # Para o código de saída do programa
+
+import banco                    # Banco de dados único
+from alertas import MotorAlertas, JANELAS_ALERTA  # CEPs acima do limite de relatos
+from geocodificacao import obter_lat_lon_por_cep  # Coordenadas do CEP em alerta (com cache)
+from indice_espacial import faixa_celulas, distancia_km, indexar_pendentes  # Grade espacial
+
+# Raio padrão da busca em km
+RAIO_PADRAO_KM = 5.0
+
+
+# Coordenadas de um CEP: primeiro dos relatos já indexados, depois pela geocodificação (cache)
+def coordenadas_do_cep(conn, cep):
+    linha = conn.execute(
+        "SELECT latitude, longitude FROM relatorios_alagamento "
+        "WHERE cep_local = ? AND latitude IS NOT NULL LIMIT 1", (cep,)
+    ).fetchone()
+    if linha:
+        return linha
+    return obter_lat_lon_por_cep(cep)
+
+
+# Retorna a lista de usuários a resgatar, cada um com o CEP em alerta mais próximo
+def usuarios_para_resgate(conn, raio_km=RAIO_PADRAO_KM, janela='hoje', motor=None):
+    motor = motor or MotorAlertas(conn)
+    encontrados = {}  # id do usuário -> registro (fica o CEP em alerta mais próximo)
+
+    for cep_alerta, total, peso in motor.ceps_em_alerta(janela):
+        lat, lon = coordenadas_do_cep(conn, cep_alerta)
+        if lat is None or lon is None:
+            continue
+
+        # Só as células que cobrem o círculo (índice parcial de quem precisa de resgate)
+        lat_min, lat_max, lon_min, lon_max = faixa_celulas(lat, lon, raio_km)
+        candidatos = conn.execute('''
+            SELECT id, nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, latitude, longitude
+            FROM usuarios
+            WHERE necessita_resgate = 'sim'
+              AND celula_lat BETWEEN ? AND ? AND celula_lon BETWEEN ? AND ?
+        ''', (lat_min, lat_max, lon_min, lon_max))
+
+        for id_usuario, nome, cpf, deficiencia, cep, endereco, lat_u, lon_u in candidatos:
+            distancia = distancia_km(lat, lon, lat_u, lon_u)
+            if distancia > raio_km:
+                continue
+            atual = encontrados.get(id_usuario)
+            if atual is None or distancia < atual['distancia_km']:
+                encontrados[id_usuario] = {
+                    'id': id_usuario, 'nome_completo': nome, 'cpf': cpf,
+                    'tipo_deficiencia': deficiencia, 'cep': cep, 'endereco_completo': endereco,
+                    'distancia_km': distancia, 'cep_alerta': cep_alerta,
+                    'relatos': total, 'gravidade': peso,
+                }
+
+    return sorted(encontrados.values(), key=lambda usuario: usuario['distancia_km'])
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Usuários que precisam de resgate perto de CEPs em alerta.")
+    parser.add_argument("--raio", type=float, default=RAIO_PADRAO_KM, help=f"raio em km (padrão: {RAIO_PADRAO_KM})")
+    parser.add_argument("--janela", choices=list(JANELAS_ALERTA), default="hoje", help="janela de tempo dos relatos")
+    parser.add_argument("--sem-indexar", action="store_true",
+                        help="não geocodifica usuários/relatos ainda sem coordenadas antes da busca")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    conn = banco.conectar(args.banco)
+    try:
+        if not args.sem_indexar:
+            indexar_pendentes(conn)
+        resgates = usuarios_para_resgate(conn, args.raio, args.janela)
+    finally:
+        conn.close()
+
+    if not resgates:
+        print("Nenhum usuário que precisa de resgate perto de áreas em alerta.")
+        return 0
+
+    print(f"\n🚨 {len(resgates)} usuário(s) para resgate a até {args.raio:g} km de áreas em alerta:\n")
+    for usuario in resgates:
+        print(f"{usuario['distancia_km']:6.2f} km | {usuario['nome_completo']} | CPF: {usuario['cpf']} | "
+              f"Deficiência: {usuario['tipo_deficiencia']} | {usuario['endereco_completo']} (CEP {usuario['cep']}) | "
+              f"Área em alerta: CEP {usuario['cep_alerta']} ({usuario['relatos']} relatos)")
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
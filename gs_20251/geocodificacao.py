@@ -0,0 +1,99 @@
+import threading                        # Para o limitador de taxa ser seguro entre threads
+import time                             # Para espaçar as consultas ao Nominatim
+from cache_persistente import CachePersistente  # Cache LRU em memória + SQLite
+import metricas                         # Tempo da etapa de geocodificação
+
+# Cache compartilhado por todos os módulos de gráficos.
+# CEPs encontrados valem 30 dias; CEPs não encontrados são lembrados por 1 dia.
+cache_geocodificacao = CachePersistente(
+    "cache_geocodificacao", ttl=30 * 24 * 3600, ttl_negativo=24 * 3600
+)
+
+# Política de uso do Nominatim: no máximo 1 requisição por segundo
+INTERVALO_NOMINATIM = 1.0
+
+
+# Garante um intervalo mínimo entre chamadas, mesmo com várias threads
+class LimitadorTaxa:
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._proxima = 0.0             # Instante (monotônico) liberado para a próxima chamada
+        self._trava = threading.Lock()
+
+    # Bloqueia até que a próxima chamada seja permitida
+    def aguardar(self):
+        with self._trava:
+            agora = time.monotonic()
+            if self._proxima > agora:
+                time.sleep(self._proxima - agora)
+                agora = self._proxima
+            self._proxima = agora + self.intervalo
+
+
+limitador_nominatim = LimitadorTaxa(INTERVALO_NOMINATIM)
+
+# Geolocalizador criado uma única vez e reaproveitado entre as chamadas
+_geolocator = None
+
+
+# Remove hífen e espaços para que "01001-000" e "01001000" usem a mesma entrada
+def normalizar_cep(cep):
+    return cep.replace("-", "").replace(" ", "").strip()
+
+
+def _obter_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        # O geopy só é importado quando é preciso ir à rede (deixa a inicialização mais rápida)
+        from geopy.geocoders import Nominatim  # Para converter CEP em coordenadas geográficas (lat/lon)
+        from cliente_http import adaptador_geopy  # Requisições pelo cliente HTTP compartilhado
+        # Cria o geolocalizador com o nome do aplicativo (requerido pela API Nominatim)
+        _geolocator = Nominatim(user_agent="pluviometria_app", adapter_factory=adaptador_geopy)
+    return _geolocator
+
+
+# Função para obter latitude e longitude a partir de um CEP (com cache)
+def obter_lat_lon_por_cep(cep):
+    chave = normalizar_cep(cep)
+
+    # Consulta o cache antes de ir à rede
+    encontrado, coordenadas = cache_geocodificacao.obter(chave)
+    if encontrado:
+        if coordenadas is None:
+            print(f"\nErro: CEP {cep} não encontrado ou formato inválido.")
+            return None, None
+        return coordenadas[0], coordenadas[1]
+
+    from geopy.exc import GeocoderTimedOut, GeocoderUnavailable, GeocoderServiceError  # Exceções específicas do geopy
+    try:
+        # Respeita o limite de taxa do Nominatim (só quando vai à rede)
+        limitador_nominatim.aguardar()
+        # Geocodifica o CEP no Brasil (com timeout de 10 segundos)
+        with metricas.etapa("geocodificacao"):
+            location = _obter_geolocator().geocode(f"{cep}, Brazil", timeout=10)
+
+    # Erros de serviço não são guardados no cache: a próxima chamada tenta de novo
+    except (GeocoderTimedOut, GeocoderUnavailable, GeocoderServiceError) as e:
+        print(f"\nErro no serviço de geolocalização: {str(e)}")
+        return None, None
+    except Exception as e:
+        print(f"\nErro inesperado ao geocodificar CEP: {str(e)}")
+        return None, None
+
+    if location:
+        cache_geocodificacao.guardar(chave, [location.latitude, location.longitude])
+        return location.latitude, location.longitude
+
+    # CEP inexistente: guarda o resultado negativo para não repetir a consulta
+    cache_geocodificacao.guardar(chave, None)
+    print(f"\nErro: CEP {cep} não encontrado ou formato inválido.")
+    return None, None
+
+
+# Coordenadas de um CEP só se já estiverem no cache (nunca vai à rede).
+# Retorna (None, None) se o CEP ainda não foi geocodificado ou não existe.
+def coordenadas_em_cache(cep):
+    encontrado, coordenadas = cache_geocodificacao.obter(normalizar_cep(cep))
+    if not encontrado or coordenadas is None:
+        return None, None
+    return coordenadas[0], coordenadas[1]
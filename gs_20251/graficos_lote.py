@@ -0,0 +1,171 @@
+# Geração dos gráficos (diário, mensal e anual) de muitos CEPs de uma vez, sem janela.
+# Cada gráfico é desenhado em uma Figure própria com o backend Agg e salvo em PNG/SVG
+# na pasta de saída. Os CEPs são divididos entre vários processos.
+#
+# Exemplos:
+#   python graficos_lote.py --cadastrados --pasta graficos
+#   python graficos_lote.py 01001000 20040002 --tipos mensal anual --ano 2024 --mes 3 --formatos png svg
+import matplotlib
+matplotlib.use("Agg")  # Sem janela: precisa vir antes de qualquer import do pyplot
+
+import argparse                                      # Para ler os parâmetros da linha de comando
+import os                                            # Para criar as pastas de saída
+import sys                                           # Para o código de saída do programa
+from concurrent.futures import ProcessPoolExecutor, as_completed  # Vários processos de desenho
+from datetime import date                            # Para o período padrão
+
+from matplotlib.figure import Figure                 # Figura própria (sem o estado global do pyplot)
+
+import banco                                         # Banco de dados único
+import metricas                                      # Tempo das etapas (também dos processos filhos)
+from geocodificacao import obter_lat_lon_por_cep     # Geocodificação com cache e limite de taxa
+from lote_anual import ler_ceps                      # Leitura e validação da lista de CEPs
+from graficos_diário import buscar_chuva, desenhar_previsao
+from gráfico_mensal import obter_totais_do_mes, desenhar_grafico_semanal
+from gráfico_anual import obter_totais_do_ano, desenhar_grafico_mensal
+
+# Tipos de gráfico que podem ser gerados
+TIPOS_GRAFICO = ["diario", "mensal", "anual"]
+
+# Formatos de arquivo aceitos
+FORMATOS_GRAFICO = ["png", "svg"]
+
+
+# Salva a figura em cada formato pedido e retorna os caminhos gerados
+def salvar_figura(fig, caminho_base, formatos):
+    arquivos = []
+    for formato in formatos:
+        arquivo = f"{caminho_base}.{formato}"
+        with metricas.etapa("grafico"):  # É no savefig que o matplotlib desenha
+            fig.savefig(arquivo)
+        arquivos.append(arquivo)
+    return arquivos
+
+
+# Gera os gráficos de um CEP (roda dentro de um processo do pool).
+# Retorna (cep, arquivos gerados, mensagens de erro, métricas do processo ou None).
+def renderizar_cep(cep, lat, lon, tipos, ano, mes, pasta, formatos):
+    arquivos, erros = [], []
+
+    if "diario" in tipos:
+        dados = buscar_chuva(lat, lon)
+        if dados:
+            fig = Figure(figsize=(10, 5))
+            desenhar_previsao(fig.subplots(), dados['daily']['time'], dados['daily']['precipitation_sum'], cep)
+            fig.tight_layout()
+            arquivos += salvar_figura(fig, os.path.join(pasta, "diario", f"{cep}_{date.today()}"), formatos)
+        else:
+            erros.append("previsão diária indisponível")
+
+    if "mensal" in tipos:
+        df_semanal = obter_totais_do_mes(lat, lon, ano, mes)
+        if not df_semanal.empty:
+            fig = Figure()
+            desenhar_grafico_semanal(fig.subplots(), df_semanal, mes, ano, cep)
+            arquivos += salvar_figura(fig, os.path.join(pasta, "mensal", f"{cep}_{ano}-{mes:02d}"), formatos)
+        else:
+            erros.append(f"sem dados de {mes:02d}/{ano}")
+
+    if "anual" in tipos:
+        df_mensal = obter_totais_do_ano(lat, lon, ano)
+        if not df_mensal.empty:
+            fig = Figure()
+            desenhar_grafico_mensal(fig.subplots(), df_mensal, ano, cep)
+            arquivos += salvar_figura(fig, os.path.join(pasta, "anual", f"{cep}_{ano}"), formatos)
+        else:
+            erros.append(f"sem dados de {ano}")
+
+    return cep, arquivos, erros, metricas.retirar()
+
+
+# Prepara cada processo do pool: mesmo arquivo de banco do processo principal, métricas zeradas
+def _iniciar_processo(caminho_banco):
+    if caminho_banco:
+        banco.CAMINHO_BANCO = caminho_banco
+    metricas.retirar()  # Descarta as métricas herdadas do processo principal (já contadas lá)
+
+
+# CEPs distintos dos usuários cadastrados
+def ceps_cadastrados(caminho_banco=None):
+    conn = banco.conectar(caminho_banco)
+    try:
+        return [linha[0] for linha in conn.execute("SELECT DISTINCT cep FROM usuarios ORDER BY cep")]
+    finally:
+        conn.close()
+
+
+# Gera os gráficos de todos os CEPs. A geocodificação fica no processo principal
+# (o limite de 1 req/s do Nominatim vale para o programa inteiro); o download e o
+# desenho são divididos entre os processos.
+def executar_lote(ceps, tipos, ano, mes, pasta, formatos, processos=None, caminho_banco=None):
+    for tipo in tipos:
+        os.makedirs(os.path.join(pasta, tipo), exist_ok=True)
+
+    total_arquivos = 0
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                             initargs=(caminho_banco,)) as executor:
+        futuros = []
+        for cep in ceps:
+            lat, lon = obter_lat_lon_por_cep(cep)
+            if lat is None or lon is None:
+                falhas += 1
+                continue
+            futuros.append(executor.submit(renderizar_cep, cep, lat, lon, tipos, ano, mes, pasta, formatos))
+
+        for futuro in as_completed(futuros):
+            try:
+                cep, arquivos, erros, metricas_processo = futuro.result()
+            except Exception as e:
+                print(f"Erro ao gerar gráficos: {str(e)}")
+                falhas += 1
+                continue
+            metricas.somar(metricas_processo)
+            total_arquivos += len(arquivos)
+            if erros:
+                print(f"Aviso: CEP {cep}: {'; '.join(erros)}")
+
+    print(f"\nCEPs processados: {len(ceps) - falhas} de {len(ceps)} | arquivos gerados: {total_arquivos} em {pasta}")
+    return total_arquivos
+
+
+def principal(argv=None):
+    # Período padrão: o mês anterior (e o ano dele)
+    hoje = date.today()
+    ano_padrao, mes_padrao = (hoje.year - 1, 12) if hoje.month == 1 else (hoje.year, hoje.month - 1)
+
+    parser = argparse.ArgumentParser(description="Gera os gráficos de chuva de vários CEPs, sem janela.")
+    parser.add_argument("ceps", nargs="*", help="CEPs a processar (XXXXX-XXX ou XXXXXXXX)")
+    parser.add_argument("--arquivo", help="arquivo texto com um CEP por linha")
+    parser.add_argument("--cadastrados", action="store_true", help="inclui os CEPs dos usuários cadastrados")
+    parser.add_argument("--tipos", nargs="+", choices=TIPOS_GRAFICO, default=TIPOS_GRAFICO,
+                        help="gráficos a gerar (padrão: todos)")
+    parser.add_argument("--ano", type=int, default=ano_padrao, help=f"ano dos gráficos mensal e anual (padrão: {ano_padrao})")
+    parser.add_argument("--mes", type=int, default=mes_padrao, help=f"mês do gráfico mensal (padrão: {mes_padrao})")
+    parser.add_argument("--pasta", default="graficos", help="pasta de saída (padrão: graficos)")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS_GRAFICO, default=["png"],
+                        help="formatos dos arquivos (padrão: png)")
+    parser.add_argument("--processos", type=int, help="processos de desenho (padrão: um por CPU)")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.mes <= 12 or not 1900 <= args.ano <= hoje.year:
+        print(f"Erro: o mês deve estar entre 1 e 12 e o ano entre 1900 e {hoje.year}.")
+        return 1
+
+    lista = list(args.ceps)
+    if args.cadastrados:
+        lista += ceps_cadastrados(args.banco)
+    ceps = ler_ceps(lista, args.arquivo)
+    if not ceps:
+        print("Erro: nenhum CEP válido informado.")
+        return 1
+
+    _iniciar_processo(args.banco)
+    executar_lote(ceps, args.tipos, args.ano, args.mes, args.pasta, args.formatos, args.processos, args.banco)
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
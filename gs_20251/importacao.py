@@ -0,0 +1,163 @@
+# Importação em massa de relatos de alagamento e de usuários a partir de CSV ou JSONL.
+# O arquivo é lido linha a linha (memória constante), cada linha passa pelas mesmas
+# validações do menu, os CEPs são consultados uma única vez (cache) e as linhas válidas
+# são gravadas em lotes grandes, cada um em uma transação. Linhas recusadas vão para
+# um relatório CSV com o número da linha e o motivo.
+#
+# Exemplos:
+#   python importacao.py relatorios relatos_defesa_civil.csv
+#   python importacao.py usuarios cadastros.jsonl --rejeitados recusados.csv --lote 20000
+import argparse          # Para ler os parâmetros da linha de comando
+import csv               # Leitura do CSV e escrita do relatório de recusados
+import json              # Leitura do JSONL
+import sys               # Para o código de saída do programa
+
+import banco             # Banco único (conexões em modo WAL e migrações)
+from cadastro_report import ErroValidacao, validar_usuario, validar_relatorio  # Validações (CPF, vocabulários, CEP)
+from alertas import MotorAlertas, inicio_janela  # Contagens de alerta dos relatos recentes
+
+# Quantidade padrão de linhas gravadas por transação
+TAMANHO_LOTE = 10000
+
+# Máximo de CEPs guardados no dicionário da importação; ao passar, ele é esvaziado e os
+# CEPs já vistos voltam a vir do cache persistente (cadastro_report.cache_endereco)
+MAXIMO_ENDERECOS = 50000
+
+# SQL de inserção de cada tipo de importação
+SQL_USUARIO = '''
+    INSERT OR IGNORE INTO usuarios (nome_completo, cpf, tipo_deficiencia, cep, endereco_completo, necessita_resgate)
+    VALUES (:nome_completo, :cpf, :tipo_deficiencia, :cep, :endereco_completo, :necessita_resgate)
+'''
+SQL_RELATORIO = '''
+    INSERT INTO relatorios_alagamento (nome_reportante, cpf_reportante, cep_local, endereco_alagado,
+    intensidade_chuva, nivel_inundacao, data_hora_registro, registrado_em)
+    VALUES (:nome_reportante, :cpf_reportante, :cep_local, :endereco_alagado,
+    :intensidade_chuva, :nivel_inundacao, :data_hora_registro, :registrado_em)
+'''
+
+
+# Lê o arquivo linha a linha, devolvendo (número da linha, dicionário)
+def ler_linhas(caminho, formato):
+    with open(caminho, encoding='utf-8', newline='') as arquivo:
+        if formato == 'csv':
+            leitor = csv.DictReader(arquivo)
+            for linha in leitor:
+                yield leitor.line_num, linha
+        else:
+            for numero, texto in enumerate(arquivo, start=1):
+                if not texto.strip():
+                    continue
+                try:
+                    dados = json.loads(texto)
+                except ValueError:
+                    dados = None
+                # Linhas que não são objetos JSON seguem para a validação, que as recusa
+                yield numero, dados if isinstance(dados, dict) else {'_linha_invalida': texto.strip()}
+
+
+# Grava o relatório de linhas recusadas à medida que elas aparecem
+class RelatorioRecusados:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.total = 0
+        self._arquivo = None
+        self._escritor = None
+
+    def registrar(self, numero, motivo, dados):
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, 'w', encoding='utf-8', newline='')
+            self._escritor = csv.writer(self._arquivo)
+            self._escritor.writerow(['linha', 'motivo', 'dados'])
+        self._escritor.writerow([numero, motivo, json.dumps(dados, ensure_ascii=False)])
+        self.total += 1
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+
+# Importa o arquivo; retorna (gravadas, ignoradas, recusadas)
+def importar(tipo, caminho, formato='csv', caminho_rejeitados='rejeitados.csv', tamanho_lote=TAMANHO_LOTE,
+             caminho_banco=None):
+    conn = banco.conectar(caminho_banco)
+
+    if tipo == 'usuarios':
+        sql, validar = SQL_USUARIO, validar_usuario
+        motor = None
+    else:
+        sql, validar = SQL_RELATORIO, validar_relatorio
+        # Só relatos das últimas 24 horas entram nas contagens de alerta
+        motor = MotorAlertas(conn)
+        limite_recente = inicio_janela('24h')
+
+    enderecos = {}  # CEP -> endereço (cada CEP é consultado uma única vez; até MAXIMO_ENDERECOS)
+    recusados = RelatorioRecusados(caminho_rejeitados)
+    lote = []
+    gravadas = 0
+
+    # Grava o lote atual em uma única transação
+    def gravar_lote():
+        nonlocal gravadas
+        with conn:
+            antes = conn.total_changes
+            conn.executemany(sql, lote)
+            # total_changes conta só as linhas realmente inseridas (CPF repetido é ignorado)
+            gravadas += conn.total_changes - antes
+            if motor is not None:
+                for relato in lote:
+                    if relato['registrado_em'] >= limite_recente:
+                        motor.registrar(relato['cep_local'], relato['registrado_em'],
+                                        relato['nivel_inundacao'], relato['intensidade_chuva'])
+        lote.clear()
+
+    lidas = 0
+    try:
+        for numero, dados in ler_linhas(caminho, formato):
+            lidas += 1
+            try:
+                if '_linha_invalida' in dados:
+                    raise ErroValidacao("Linha não é um objeto JSON.")
+                if len(enderecos) >= MAXIMO_ENDERECOS:
+                    enderecos.clear()
+                lote.append(validar(dados, enderecos))
+            except ErroValidacao as erro:
+                recusados.registrar(numero, str(erro), dados)
+                continue
+
+            if len(lote) >= tamanho_lote:
+                gravar_lote()
+                print(f"{lidas} linhas lidas, {gravadas} gravadas, {recusados.total} recusadas...")
+
+        if lote:
+            gravar_lote()
+    finally:
+        recusados.fechar()
+        conn.close()
+
+    ignoradas = lidas - gravadas - recusados.total
+    print(f"\nImportação concluída: {lidas} linhas lidas | {gravadas} gravadas | "
+          f"{ignoradas} ignoradas (CPF já cadastrado) | {recusados.total} recusadas")
+    if recusados.total:
+        print(f"Linhas recusadas em: {caminho_rejeitados}")
+    return gravadas, ignoradas, recusados.total
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Importação em massa de relatos de alagamento ou usuários (CSV/JSONL).")
+    parser.add_argument("tipo", choices=["relatorios", "usuarios"], help="o que será importado")
+    parser.add_argument("arquivo", help="arquivo CSV (com cabeçalho) ou JSONL (um objeto por linha)")
+    parser.add_argument("--formato", choices=["csv", "jsonl"],
+                        help="formato do arquivo (padrão: pela extensão)")
+    parser.add_argument("--rejeitados", default="rejeitados.csv", help="relatório das linhas recusadas")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help=f"linhas por transação (padrão: {TAMANHO_LOTE})")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or ('jsonl' if args.arquivo.lower().endswith(('.jsonl', '.json')) else 'csv')
+    importar(args.tipo, args.arquivo, formato, args.rejeitados, args.lote, args.banco)
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
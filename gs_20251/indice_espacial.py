@@ -0,0 +1,69 @@
+# Índice espacial em grade: cada coordenada cai em uma célula (celula_lat, celula_lon)
+# de TAMANHO_CELULA graus. Uma busca por raio só lê as células que cobrem o círculo
+# (índice do banco) e depois confere a distância exata.
+import math                                   # Para a fórmula de haversine
+
+from geocodificacao import obter_lat_lon_por_cep  # CEP -> (lat, lon) com cache
+
+# Lado da célula da grade em graus (0,05° ≈ 5,5 km de latitude)
+TAMANHO_CELULA = 0.05
+
+# Raio médio da Terra em km
+RAIO_TERRA_KM = 6371.0
+
+# Tabelas indexadas: tabela -> coluna com o CEP
+TABELAS_INDEXADAS = {
+    'usuarios': 'cep',
+    'relatorios_alagamento': 'cep_local',
+}
+
+
+# Célula da grade que contém a coordenada
+def celula(lat, lon):
+    return math.floor(lat / TAMANHO_CELULA), math.floor(lon / TAMANHO_CELULA)
+
+
+# Faixa de células (lat_min, lat_max, lon_min, lon_max) que cobre um círculo de raio_km
+def faixa_celulas(lat, lon, raio_km):
+    delta_lat = raio_km / 111.32
+    # Perto dos polos o cosseno tende a zero; limita para não estourar a faixa
+    delta_lon = raio_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+    lat_min, lon_min = celula(lat - delta_lat, lon - delta_lon)
+    lat_max, lon_max = celula(lat + delta_lat, lon + delta_lon)
+    return lat_min, lat_max, lon_min, lon_max
+
+
+# Distância em km entre duas coordenadas (haversine)
+def distancia_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+# Geocodifica os CEPs ainda sem coordenadas e grava lat/lon/célula em lote.
+# Cada CEP distinto é consultado uma vez (e a consulta passa pelo cache).
+def indexar_pendentes(conn):
+    atualizados = 0
+    for tabela, coluna_cep in TABELAS_INDEXADAS.items():
+        ceps = [linha[0] for linha in conn.execute(
+            f"SELECT DISTINCT {coluna_cep} FROM {tabela} WHERE latitude IS NULL AND {coluna_cep} IS NOT NULL"
+        )]
+        linhas = []
+        for cep in ceps:
+            lat, lon = obter_lat_lon_por_cep(cep)
+            if lat is None or lon is None:
+                continue
+            celula_lat, celula_lon = celula(lat, lon)
+            linhas.append((lat, lon, celula_lat, celula_lon, cep))
+
+        with conn:
+            antes = conn.total_changes
+            conn.executemany(
+                f"UPDATE {tabela} SET latitude = ?, longitude = ?, celula_lat = ?, celula_lon = ? "
+                f"WHERE {coluna_cep} = ? AND latitude IS NULL",
+                linhas
+            )
+            atualizados += conn.total_changes - antes
+    return atualizados
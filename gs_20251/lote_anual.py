@@ -0,0 +1,110 @@
+# Modo em lote da análise anual: vários CEPs e vários anos em um único comando.
+# Exemplo:
+#   python lote_anual.py 01001000 20040002 --ano-inicio 1990 --ano-fim 2023
+#   python lote_anual.py --arquivo ceps.txt --ano-inicio 2000 --ano-fim 2020 --trabalhadores 16
+import argparse                                     # Para ler os parâmetros da linha de comando
+import sys                                          # Para o código de saída do programa
+from datetime import date, datetime                 # Para montar o período e validar os anos
+
+from geocodificacao import obter_lat_lon_por_cep, normalizar_cep  # Geocodificação com cache e limite de taxa
+from armazem_precipitacao import garantir_locais, obter_totais_mensais, arredondar_coordenadas  # Armazém local e resumos
+from gráfico_anual import salvar_lote_anual  # Upsert na tabela precipitacao_anual
+import banco                                        # Banco de dados único
+
+# Quantidade padrão de lotes buscados ao mesmo tempo na API de arquivo
+TRABALHADORES_PADRAO = 8
+
+
+# Lê os CEPs passados na linha de comando e/ou em um arquivo (um por linha), sem repetições
+def ler_ceps(ceps, arquivo):
+    todos = list(ceps)
+    if arquivo:
+        with open(arquivo, encoding="utf-8") as f:
+            todos.extend(linha.strip() for linha in f if linha.strip())
+
+    unicos = []
+    vistos = set()
+    for cep in todos:
+        cep = normalizar_cep(cep)
+        if len(cep) != 8 or not cep.isdigit():
+            print(f"Aviso: CEP inválido ignorado: {cep}")
+            continue
+        if cep not in vistos:
+            vistos.add(cep)
+            unicos.append(cep)
+    return unicos
+
+
+# Transforma os totais (ano, mes, precipitacao) da tabela de resumos em linhas (cep, ano, mes, precipitacao, lat, lon)
+def montar_linhas(cep, lat, lon, totais):
+    return [(cep, ano, mes, precipitacao, lat, lon) for ano, mes, precipitacao in totais]
+
+
+# Executa o lote: geocodifica (respeitando o Nominatim), baixa em lotes de vários locais
+# por requisição (em paralelo) e grava tudo de uma vez
+def executar_lote(ceps, ano_inicio, ano_fim, trabalhadores=TRABALHADORES_PADRAO, caminho_banco=None):
+    coordenadas = {}  # cep -> (lat, lon)
+    for cep in ceps:
+        lat, lon = obter_lat_lon_por_cep(cep)
+        if lat is not None and lon is not None:
+            coordenadas[cep] = (lat, lon)
+
+    # CEPs que caem no mesmo ponto arredondado compartilham a mesma busca; locais com
+    # a mesma lacuna vão juntos na mesma requisição
+    locais = {arredondar_coordenadas(lat, lon) for lat, lon in coordenadas.values()}
+    garantir_locais(locais, date(ano_inicio, 1, 1), date(ano_fim, 12, 31), trabalhadores)
+
+    linhas = []
+    falhas = 0
+    totais_por_local = {}  # coordenada arredondada -> totais mensais (lidos dos resumos)
+    for cep, (lat, lon) in coordenadas.items():
+        chave = arredondar_coordenadas(lat, lon)
+        try:
+            if chave not in totais_por_local:
+                totais_por_local[chave] = obter_totais_mensais(lat, lon, ano_inicio, ano_fim)
+        except Exception as e:
+            print(f"Erro ao obter dados meteorológicos do CEP {cep}: {str(e)}")
+            falhas += 1
+            continue
+        linhas.extend(montar_linhas(cep, lat, lon, totais_por_local[chave]))
+
+    # Gravação em lote, em uma única transação
+    conn = banco.conectar(caminho_banco)
+    try:
+        salvar_lote_anual(conn, linhas)
+    finally:
+        conn.close()
+
+    print(f"\nCEPs processados: {len(coordenadas) - falhas} de {len(ceps)} | "
+          f"locais distintos: {len(locais)} | linhas gravadas: {len(linhas)}")
+    return linhas
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Análise anual de precipitação em lote (vários CEPs e anos).")
+    parser.add_argument("ceps", nargs="*", help="CEPs a processar (XXXXX-XXX ou XXXXXXXX)")
+    parser.add_argument("--arquivo", help="arquivo texto com um CEP por linha")
+    parser.add_argument("--ano-inicio", type=int, required=True, help="primeiro ano do período")
+    parser.add_argument("--ano-fim", type=int, required=True, help="último ano do período")
+    parser.add_argument("--trabalhadores", type=int, default=TRABALHADORES_PADRAO,
+                        help=f"buscas simultâneas na API (padrão: {TRABALHADORES_PADRAO})")
+    args = parser.parse_args(argv)
+
+    # Mesma validação de anos do modo interativo
+    ano_atual = datetime.now().year
+    if not (1900 <= args.ano_inicio <= args.ano_fim <= ano_atual):
+        print(f"Erro: os anos devem estar entre 1900 e {ano_atual}, com início <= fim.")
+        return 1
+
+    ceps = ler_ceps(args.ceps, args.arquivo)
+    if not ceps:
+        print("Erro: nenhum CEP válido informado.")
+        return 1
+
+    executar_lote(ceps, args.ano_inicio, args.ano_fim, args.trabalhadores)
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
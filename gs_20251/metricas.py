@@ -0,0 +1,282 @@
+# Métricas das etapas do processamento (geocodificação, busca na API, agregação, gravação
+# no SQLite, desenho dos gráficos): tempo de cada etapa e contadores (acertos de cache,
+# linhas gravadas, bytes baixados). Desligadas por padrão: etapa() devolve um contexto
+# vazio e contar() retorna na hora, sem medir nada.
+#
+# Ligadas pela variável de ambiente CHUVASEGURA_METRICAS (arquivo de saída), em qualquer
+# programa do projeto, ou por ativar(). Ao fim do programa as métricas são gravadas:
+#   - arquivo .prom: texto do Prometheus (sobrescrito; serve ao textfile collector);
+#   - outro arquivo: JSON lines (uma linha acrescentada por execução, para comparar execuções).
+# CHUVASEGURA_PERFIL=arquivo.prof roda o programa sob o cProfile (veja com python -m pstats).
+#
+# Exemplos:
+#   CHUVASEGURA_METRICAS=metricas.jsonl python gráfico_anual.py
+#   python chuvasegura.py --metricas metricas.prom --perfil anual.prof anual 01001000 2023
+#   python metricas.py metricas.jsonl
+import argparse                 # Para ler os parâmetros da linha de comando
+import atexit                   # Gravação das métricas no fim do programa
+import json                     # Saída em JSON lines
+import os                       # Variáveis de ambiente e troca atômica do arquivo .prom
+import sys                      # Nome do comando e módulos já carregados
+import threading                # Contadores seguros entre threads
+import time                     # Medição das etapas
+from contextlib import nullcontext  # Contexto vazio quando desligado
+from datetime import datetime   # Início da execução
+
+# Prefixo dos nomes das métricas no Prometheus
+PREFIXO = "chuvasegura"
+
+# Estado global do processo
+_ativo = False
+_destino = None                 # Arquivo de saída (None = só em memória)
+_perfil = None                  # cProfile.Profile em execução, se houver
+_destino_perfil = None
+_registrado = False             # Se a gravação no fim do programa já foi agendada
+_inicio = time.time()
+_etapas = {}                    # nome -> [quantidade, segundos, maior duração]
+_contadores = {}                # nome -> valor
+_trava = threading.Lock()
+_NULO = nullcontext()
+
+
+# Mede uma ocorrência da etapa `nome` (uso: with etapa("geocodificacao"): ...)
+class _Etapa:
+    __slots__ = ("nome", "_inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        duracao = time.perf_counter() - self._inicio
+        with _trava:
+            dados = _etapas.get(self.nome)
+            if dados is None:
+                _etapas[self.nome] = [1, duracao, duracao]
+            else:
+                dados[0] += 1
+                dados[1] += duracao
+                if duracao > dados[2]:
+                    dados[2] = duracao
+        return False
+
+
+def etapa(nome):
+    if not _ativo:
+        return _NULO
+    return _Etapa(nome)
+
+
+# Soma `valor` ao contador `nome`
+def contar(nome, valor=1):
+    if not _ativo:
+        return
+    with _trava:
+        _contadores[nome] = _contadores.get(nome, 0) + valor
+
+
+def ativo():
+    return _ativo
+
+
+# Liga as métricas; com `destino`, elas são gravadas nele no fim do programa
+def ativar(destino=None):
+    global _ativo, _destino
+    _ativo = True
+    if destino:
+        _destino = destino
+        _agendar_gravacao()
+
+
+# Liga o cProfile até o fim do programa (o resultado vai para `destino`)
+def ativar_perfil(destino):
+    global _perfil, _destino_perfil
+    import cProfile             # Só carregado quando o perfil é pedido
+    if _perfil is None:
+        _perfil = cProfile.Profile()
+        _perfil.enable()
+    _destino_perfil = destino
+    _agendar_gravacao()
+
+
+def _agendar_gravacao():
+    global _registrado
+    if not _registrado:
+        atexit.register(finalizar)
+        _registrado = True
+
+
+# Retira as métricas do processo (e zera): usado para levar as métricas de um processo
+# filho ao principal, que as junta com somar()
+def retirar():
+    if not _ativo:
+        return None
+    with _trava:
+        dados = {'etapas': {nome: list(valores) for nome, valores in _etapas.items()},
+                 'contadores': dict(_contadores)}
+        _etapas.clear()
+        _contadores.clear()
+    return dados
+
+
+def somar(dados):
+    if not _ativo or not dados:
+        return
+    with _trava:
+        for nome, (quantidade, segundos, maior) in dados['etapas'].items():
+            atual = _etapas.setdefault(nome, [0, 0.0, 0.0])
+            atual[0] += quantidade
+            atual[1] += segundos
+            atual[2] = max(atual[2], maior)
+        for nome, valor in dados['contadores'].items():
+            _contadores[nome] = _contadores.get(nome, 0) + valor
+
+
+# Nome do comando executado (programa e subcomando, se houver)
+def _comando():
+    partes = [os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"]
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+        partes.append(sys.argv[1])
+    return " ".join(partes)
+
+
+# Métricas atuais como dicionário (com as latências do cliente HTTP, se ele foi usado)
+def resumo():
+    with _trava:
+        etapas = {nome: {'quantidade': q, 'total_s': round(s, 6), 'maximo_s': round(m, 6)}
+                  for nome, (q, s, m) in sorted(_etapas.items())}
+        contadores = dict(sorted(_contadores.items()))
+    dados = {
+        'inicio': datetime.fromtimestamp(_inicio).isoformat(timespec="seconds"),
+        'comando': _comando(),
+        'duracao_s': round(time.time() - _inicio, 3),
+        'etapas': etapas,
+        'contadores': contadores,
+    }
+    # O cliente HTTP só entra se já foi carregado (não importa o requests à toa)
+    cliente_http = sys.modules.get("cliente_http")
+    if cliente_http is not None:
+        dados['http'] = cliente_http.obter_cliente().estatisticas()['endpoints']
+    return dados
+
+
+# Valor de rótulo no formato do Prometheus
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Métricas no formato de texto do Prometheus
+def texto_prometheus():
+    dados = resumo()
+    linhas = []
+    if dados['etapas']:
+        linhas.append(f"# HELP {PREFIXO}_etapa_segundos Tempo gasto em cada etapa.")
+        linhas.append(f"# TYPE {PREFIXO}_etapa_segundos summary")
+        for nome, dados_etapa in dados['etapas'].items():
+            linhas.append(f'{PREFIXO}_etapa_segundos_sum{{etapa="{_rotulo(nome)}"}} {dados_etapa["total_s"]}')
+            linhas.append(f'{PREFIXO}_etapa_segundos_count{{etapa="{_rotulo(nome)}"}} {dados_etapa["quantidade"]}')
+        linhas.append(f"# TYPE {PREFIXO}_etapa_maximo_segundos gauge")
+        for nome, dados_etapa in dados['etapas'].items():
+            linhas.append(f'{PREFIXO}_etapa_maximo_segundos{{etapa="{_rotulo(nome)}"}} {dados_etapa["maximo_s"]}')
+    for nome, valor in dados['contadores'].items():
+        linhas.append(f"# TYPE {PREFIXO}_{nome}_total counter")
+        linhas.append(f"{PREFIXO}_{nome}_total {valor}")
+
+    # Histogramas de latência do cliente HTTP (faixas acumuladas, como pede o formato).
+    # O cliente mede em ms; a exportação é em segundos, a unidade base do Prometheus.
+    cliente_http = sys.modules.get("cliente_http")
+    if cliente_http is not None:
+        cliente = cliente_http.obter_cliente()
+        endpoints = cliente.estatisticas()['endpoints']
+        if endpoints:
+            linhas.append(f"# HELP {PREFIXO}_http_latencia_segundos Latência das requisições por endpoint.")
+            linhas.append(f"# TYPE {PREFIXO}_http_latencia_segundos histogram")
+        for endpoint in endpoints:
+            histograma = cliente.histograma(endpoint)
+            rotulo = _rotulo(endpoint)
+            acumulado = 0
+            limites = [f"{limite / 1000:g}" for limite in histograma.limites] + ["+Inf"]
+            for limite, contagem in zip(limites, histograma.contagens):
+                acumulado += contagem
+                linhas.append(f'{PREFIXO}_http_latencia_segundos_bucket{{endpoint="{rotulo}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{PREFIXO}_http_latencia_segundos_sum{{endpoint="{rotulo}"}} {round(histograma.soma_ms / 1000, 6)}')
+            linhas.append(f'{PREFIXO}_http_latencia_segundos_count{{endpoint="{rotulo}"}} {histograma.total}')
+        if endpoints:
+            linhas.append(f"# TYPE {PREFIXO}_http_erros_total counter")
+        for endpoint, dados_endpoint in endpoints.items():
+            linhas.append(f'{PREFIXO}_http_erros_total{{endpoint="{_rotulo(endpoint)}"}} {dados_endpoint["erros"]}')
+    linhas.append(f"# TYPE {PREFIXO}_duracao_segundos gauge")
+    linhas.append(f'{PREFIXO}_duracao_segundos{{comando="{_rotulo(dados["comando"])}"}} {dados["duracao_s"]}')
+    return "\n".join(linhas) + "\n"
+
+
+# Grava as métricas em `destino` (.prom = Prometheus, sobrescrito; senão uma linha JSON acrescentada)
+def exportar(destino):
+    pasta = os.path.dirname(destino)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    if destino.endswith(".prom"):
+        # Arquivo temporário + troca: quem lê nunca vê o arquivo pela metade
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto_prometheus())
+        os.replace(temporario, destino)
+    else:
+        with open(destino, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(resumo(), ensure_ascii=False) + "\n")
+
+
+# Fim do programa: para o perfil e grava os arquivos pedidos
+def finalizar():
+    global _perfil
+    if _perfil is not None:
+        _perfil.disable()
+        try:
+            _perfil.dump_stats(_destino_perfil)
+            print(f"Perfil salvo em {_destino_perfil} (veja com: python -m pstats {_destino_perfil})", file=sys.stderr)
+        except OSError as e:
+            print(f"Erro ao salvar o perfil: {str(e)}", file=sys.stderr)
+        _perfil = None
+    if _ativo and _destino:
+        try:
+            exportar(_destino)
+        except OSError as e:
+            print(f"Erro ao salvar as métricas: {str(e)}", file=sys.stderr)
+
+
+# Liga pelo ambiente (vale para qualquer programa que importe este módulo)
+if os.environ.get("CHUVASEGURA_METRICAS"):
+    ativar(os.environ["CHUVASEGURA_METRICAS"])
+if os.environ.get("CHUVASEGURA_PERFIL"):
+    ativar_perfil(os.environ["CHUVASEGURA_PERFIL"])
+
+
+# Mostra um arquivo JSON lines de métricas: tempo por etapa de cada execução
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Resumo de um arquivo de métricas (JSON lines).")
+    parser.add_argument("arquivo", help="arquivo gravado com CHUVASEGURA_METRICAS=<arquivo>.jsonl")
+    parser.add_argument("--ultimas", type=int, default=10, help="quantidade de execuções (padrão: 10)")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.arquivo, encoding="utf-8") as arquivo:
+            execucoes = [json.loads(linha) for linha in arquivo if linha.strip()]
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler {args.arquivo}: {str(e)}")
+        return 1
+
+    for execucao in execucoes[-args.ultimas:]:
+        print(f"\n{execucao['inicio']} | {execucao['comando']} | {execucao['duracao_s']:.2f}s")
+        for nome, dados in sorted(execucao['etapas'].items(), key=lambda item: -item[1]['total_s']):
+            print(f"  {nome:<20}{dados['total_s']:>10.3f}s{dados['quantidade']:>8}x   máx {dados['maximo_s']:.3f}s")
+        if execucao['contadores']:
+            print("  " + " | ".join(f"{nome}: {valor}" for nome, valor in execucao['contadores'].items()))
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,104 @@
+# Requisições à API Open-Meteo com vários locais por vez: a API aceita listas de
+# latitudes/longitudes separadas por vírgula e devolve um resultado por local, na mesma
+# ordem. Os locais são divididos em grupos limitados pela quantidade de locais, pelo
+# tamanho da URL e (no arquivo histórico) pela quantidade de valores da resposta.
+import requests                          # Exceções de rede
+import cliente_http                      # Cliente HTTP compartilhado (pool, tentativas, disjuntor)
+import metricas                          # Tempo da etapa de busca na API
+from datetime import date, timedelta     # Período da previsão
+
+URL_PREVISAO = "https://api.open-meteo.com/v1/forecast"
+URL_ARQUIVO = "https://archive-api.open-meteo.com/v1/archive"
+
+# Máximo de locais por requisição
+MAX_LOCAIS_POR_REQUISICAO = 50
+
+# Tamanho máximo da URL (caracteres), abaixo do limite comum de servidores e proxies
+MAX_TAMANHO_URL = 2000
+
+# Máximo de valores diários (locais x dias) por requisição ao arquivo histórico
+MAX_VALORES_POR_REQUISICAO = 200_000
+
+# Tempo máximo de espera por resposta (s)
+TIMEOUT_PADRAO = 15
+
+
+# Monta a URL de um grupo de locais
+def montar_url(url_base, locais, parametros):
+    latitudes = ",".join(str(lat) for lat, _ in locais)
+    longitudes = ",".join(str(lon) for _, lon in locais)
+    extras = "".join(f"&{chave}={valor}" for chave, valor in parametros.items())
+    return f"{url_base}?latitude={latitudes}&longitude={longitudes}{extras}"
+
+
+# Divide os locais em grupos que respeitam os limites de quantidade e de tamanho da URL
+def dividir_em_grupos(url_base, locais, parametros, max_locais=MAX_LOCAIS_POR_REQUISICAO, max_url=MAX_TAMANHO_URL):
+    tamanho_base = len(montar_url(url_base, [], parametros))
+    grupos, atual, tamanho = [], [], tamanho_base
+    for lat, lon in locais:
+        acrescimo = len(str(lat)) + len(str(lon)) + 2  # Valores e as duas vírgulas
+        if atual and (len(atual) >= max_locais or tamanho + acrescimo > max_url):
+            grupos.append(atual)
+            atual, tamanho = [], tamanho_base
+        atual.append((lat, lon))
+        tamanho += acrescimo
+    if atual:
+        grupos.append(atual)
+    return grupos
+
+
+# Busca os locais em grupos e devolve um resultado (JSON da API) por local, na ordem recebida.
+# Com ignorar_erros=True, os locais de um grupo que falhou ficam None (e o erro é mostrado);
+# senão a exceção é repassada.
+def buscar_lote(url_base, locais, parametros, max_locais=MAX_LOCAIS_POR_REQUISICAO,
+                max_url=MAX_TAMANHO_URL, timeout=TIMEOUT_PADRAO, ignorar_erros=False):
+    resultados = []
+    for grupo in dividir_em_grupos(url_base, locais, parametros, max_locais, max_url):
+        try:
+            with metricas.etapa("busca_api"):
+                resposta = cliente_http.get(montar_url(url_base, grupo, parametros), timeout=timeout)
+                resposta.raise_for_status()  # Levanta exceção se o status HTTP for ruim (4xx/5xx)
+                dados = resposta.json()
+            # Com um único local a API devolve o objeto sem lista
+            if isinstance(dados, dict):
+                dados = [dados]
+            if len(dados) != len(grupo):
+                raise ValueError(f"a API devolveu {len(dados)} resultados para {len(grupo)} locais")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if not ignorar_erros:
+                raise
+            print(f"Erro ao buscar dados da API: {str(e)}")
+            dados = [None] * len(grupo)
+        resultados.extend(dados)
+    return resultados
+
+
+# Previsão diária de precipitação dos próximos `dias` dias: um JSON (ou None) por local
+def previsao_diaria(locais, dias=7):
+    hoje = date.today()
+    parametros = {
+        "daily": "precipitation_sum",
+        "timezone": "America/Sao_Paulo",
+        "start_date": hoje,
+        "end_date": hoje + timedelta(days=dias - 1),
+    }
+    return buscar_lote(URL_PREVISAO, locais, parametros, ignorar_erros=True)
+
+
+# Precipitação diária do arquivo histórico em inicio..fim: (datas, valores) por local
+def arquivo_diario(locais, inicio, fim):
+    parametros = {
+        "start_date": inicio,
+        "end_date": fim,
+        "daily": "precipitation_sum",
+        "timezone": "America/Sao_Paulo",
+    }
+    dias = (fim - inicio).days + 1
+    max_locais = max(1, min(MAX_LOCAIS_POR_REQUISICAO, MAX_VALORES_POR_REQUISICAO // dias))
+    resultados = []
+    for dados in buscar_lote(URL_ARQUIVO, locais, parametros, max_locais=max_locais):
+        if not dados.get("daily") or "time" not in dados["daily"]:
+            resultados.append(([], []))
+        else:
+            resultados.append((dados["daily"]["time"], dados["daily"]["precipitation_sum"]))
+    return resultados
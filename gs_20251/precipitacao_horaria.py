@@ -0,0 +1,250 @@
+# Precipitação horária da Open-Meteo para detectar chuva intensa (30–50 mm em uma hora
+# somem na soma diária). A resposta é lida em pedaços direto para um array float32, um
+# ano por vez (memória limitada mesmo em períodos de vários anos). As horas ficam em
+# séries em disco por ano e os máximos móveis de 1h/3h/6h de cada dia em séries diárias.
+#
+# As horas são do horário de Brasília sem horário de verão (UTC-3).
+#
+# Exemplos:
+#   python precipitacao_horaria.py 01001000 --de 2024-01-01 --ate 2024-12-31
+#   python precipitacao_horaria.py 01001000 --previsao
+import argparse                          # Para ler os parâmetros da linha de comando
+import re                                # Para achar a lista na resposta JSON
+import sys                               # Para o código de saída do programa
+from datetime import date, timedelta     # Para os períodos
+
+import numpy as np                       # Arrays e janelas móveis
+import requests                          # Exceções de rede
+import cliente_http                      # Cliente HTTP compartilhado (pool, tentativas, disjuntor)
+import metricas                          # Tempo da etapa de busca na API
+
+from armazem_precipitacao import arredondar_coordenadas, ATRASO_ARQUIVO_DIAS
+from serie_temporal import abrir_serie   # Séries em disco (memmap)
+
+# Janelas dos máximos móveis (horas)
+JANELAS_HORAS = (1, 3, 6)
+
+# Chuva intensa: pelo menos isso em uma hora
+LIMIAR_INTENSA_1H_MM = 30.0
+
+# Diferença do horário de Brasília para o UTC (a API é consultada em UTC)
+FUSO_HORAS = -3
+
+# Tamanho de cada pedaço lido da resposta (bytes)
+TAMANHO_PEDACO = 64 * 1024
+
+URL_ARQUIVO = "https://archive-api.open-meteo.com/v1/archive"
+URL_PREVISAO = "https://api.open-meteo.com/v1/forecast"
+
+
+# Série horária de um ano (24 valores por dia, ~35 KB por local)
+def serie_horaria(ano):
+    return abrir_serie(f"precipitacao_horaria_{ano}", inicio=date(ano, 1, 1),
+                       fim=date(ano + 1, 1, 1), passos_por_dia=24)
+
+
+# Série diária do máximo móvel de `horas` horas
+def serie_maximo(horas):
+    return abrir_serie(f"precipitacao_max_{horas}h")
+
+
+# Lê os números da lista JSON `"<chave>":[...]` dos pedaços da resposta para `valores`,
+# sem montar a resposta inteira nem listas Python. Retorna quantos valores foram lidos.
+def ler_lista_json(pedacos, chave, valores):
+    marcador = re.compile(rb'"' + re.escape(chave.encode()) + rb'"\s*:\s*\[')
+    buffer = b""
+    dentro = False
+    posicao = 0
+    for pedaco in pedacos:
+        buffer += pedaco
+        if not dentro:
+            encontrado = marcador.search(buffer)
+            if encontrado is None:
+                buffer = buffer[-64:]  # O marcador pode estar cortado entre pedaços
+                continue
+            buffer = buffer[encontrado.end():]
+            dentro = True
+
+        # Converte só até a última vírgula (o número depois dela pode estar incompleto)
+        fim = buffer.find(b"]")
+        if fim >= 0:
+            completo, buffer = buffer[:fim], b""
+        else:
+            corte = buffer.rfind(b",")
+            if corte < 0:
+                continue
+            completo, buffer = buffer[:corte], buffer[corte + 1:]
+
+        if completo.strip():
+            numeros = np.fromstring(completo.replace(b"null", b"nan").decode(), dtype=np.float32, sep=",")
+            if posicao + numeros.size > valores.size:
+                raise ValueError(f"Resposta da API com mais de {valores.size} valores em {chave}")
+            valores[posicao:posicao + numeros.size] = numeros
+            posicao += numeros.size
+        if fim >= 0:
+            return posicao
+
+    if not dentro:
+        raise ValueError(f"Resposta da API sem a lista {chave}")
+    return posicao
+
+
+# Baixa as horas locais de inicio 00h até fim 23h, precedidas das 5 horas anteriores
+# (para as janelas móveis). Horas que a API não devolveu ficam NaN.
+def baixar_horas(url_base, lat, lon, inicio, fim, hoje=None):
+    hoje = hoje or date.today()
+    anteriores = max(JANELAS_HORAS) - 1
+    # Em UTC, o dia local começa FUSO_HORAS depois: pede um dia antes e um depois
+    inicio_utc = inicio - timedelta(days=1)
+    fim_utc = fim + timedelta(days=1)
+    if url_base == URL_ARQUIVO:
+        fim_utc = min(fim_utc, hoje)  # O arquivo histórico não tem dias futuros
+
+    url = (
+        f"{url_base}?latitude={lat}&longitude={lon}"
+        f"&start_date={inicio_utc}&end_date={fim_utc}&hourly=precipitation&timezone=GMT"
+    )
+    dias = (fim - inicio).days + 1
+    horas_utc = np.full((dias + 2) * 24, np.nan, dtype=np.float32)
+    with metricas.etapa("busca_api"), cliente_http.get(url, timeout=30, stream=True) as resposta:
+        resposta.raise_for_status()  # Levanta exceção se o status HTTP for ruim (4xx/5xx)
+        ler_lista_json(resposta.iter_content(TAMANHO_PEDACO), "precipitation", horas_utc)
+
+    primeira = 24 - FUSO_HORAS  # Hora 00 local do dia `inicio` no array em UTC
+    return horas_utc[primeira - anteriores:primeira + dias * 24]
+
+
+# Máximo, em cada dia, da soma móvel de cada janela (terminando em cada hora do dia).
+# `horas` começa com max(JANELAS_HORAS) - 1 horas do dia anterior. Janelas com hora
+# sem dado não contam; o dia sem nenhuma janela completa fica NaN.
+def maximos_moveis(horas, janelas=JANELAS_HORAS):
+    anteriores = max(janelas) - 1
+    validas = ~np.isnan(horas)
+    # Somas e contagens acumuladas: a soma de uma janela é a diferença de dois acumulados
+    acumulada = np.concatenate(([0.0], np.cumsum(np.where(validas, horas, 0.0), dtype=np.float64)))
+    contagem = np.concatenate(([0], np.cumsum(validas)))
+
+    fins = np.arange(anteriores + 1, horas.size + 1)  # Fim (exclusivo) de cada janela
+    maximos = {}
+    for janela in janelas:
+        inicios = fins - janela
+        somas = acumulada[fins] - acumulada[inicios]
+        somas[contagem[fins] - contagem[inicios] < janela] = np.nan
+        maximos[janela] = np.fmax.reduce(somas.reshape(-1, 24), axis=1)
+    return maximos
+
+
+# Busca no arquivo histórico as horas que faltam em inicio..fim (um ano por requisição)
+# e grava as horas e os máximos móveis. Dias recentes incompletos ficam para depois.
+def ingerir(lat, lon, inicio, fim):
+    hoje = date.today()
+    limite_recente = np.datetime64(hoje - timedelta(days=ATRASO_ARQUIVO_DIAS))
+    for ano in range(inicio.year, fim.year + 1):
+        a = max(inicio, date(ano, 1, 1))
+        b = min(fim, date(ano, 12, 31), hoje)
+        if a > b:
+            continue
+
+        # Só o trecho entre o primeiro e o último dia que faltam
+        serie = serie_horaria(ano)
+        faltando = np.flatnonzero(serie.nao_buscados(lat, lon, a, b))
+        if not faltando.size:
+            continue
+        a, b = a + timedelta(days=int(faltando[0])), a + timedelta(days=int(faltando[-1]))
+
+        horas = baixar_horas(URL_ARQUIVO, lat, lon, a, b, hoje)
+        por_dia = horas[max(JANELAS_HORAS) - 1:].reshape(-1, 24)
+        datas = serie.datas(a, b)
+        gravar = (datas < limite_recente) | ~np.isnan(por_dia).any(axis=1)
+        if not gravar.any():
+            continue
+
+        serie.gravar(lat, lon, por_dia[gravar].ravel(), datas=datas[gravar])
+        for janela, maximos in maximos_moveis(horas).items():
+            serie_maximo(janela).gravar(lat, lon, maximos[gravar], datas=datas[gravar])
+
+
+# Máximos móveis diários do período: (datas, {janela: valores em mm}), buscando na API só
+# o que falta. Dias ainda não buscados ficam de fora.
+def obter_maximos_horarios(lat, lon, inicio, fim):
+    lat, lon = arredondar_coordenadas(lat, lon)
+    ingerir(lat, lon, inicio, fim)
+
+    primeira = serie_maximo(JANELAS_HORAS[0])
+    if primeira.ler(lat, lon, inicio, fim) is None:
+        return np.array([], dtype="datetime64[D]"), {janela: np.array([]) for janela in JANELAS_HORAS}
+    buscados = ~primeira.nao_buscados(lat, lon, inicio, fim)
+    maximos = {janela: serie_maximo(janela).ler(lat, lon, inicio, fim)[buscados].astype("float64")
+               for janela in JANELAS_HORAS}
+    return primeira.datas(inicio, fim)[buscados], maximos
+
+
+# Precipitação horária do período: (horas datetime64[h] locais, valores float32).
+# Dentro de um único ano os valores são uma fatia da série em disco, sem cópia.
+def obter_precipitacao_horaria(lat, lon, inicio, fim):
+    lat, lon = arredondar_coordenadas(lat, lon)
+    ingerir(lat, lon, inicio, fim)
+
+    partes = []
+    for ano in range(inicio.year, fim.year + 1):
+        a, b = max(inicio, date(ano, 1, 1)), min(fim, date(ano, 12, 31))
+        valores = serie_horaria(ano).ler(lat, lon, a, b)
+        partes.append(valores if valores is not None
+                      else np.full(((b - a).days + 1) * 24, np.nan, dtype=np.float32))
+    horas = np.arange(np.datetime64(inicio, "h"), np.datetime64(fim + timedelta(days=1), "h"))
+    return horas, partes[0] if len(partes) == 1 else np.concatenate(partes)
+
+
+# Máximos móveis dos próximos `dias` dias pela previsão horária (não gravados: a previsão muda)
+def maximos_previsao(lat, lon, dias=7):
+    hoje = date.today()
+    fim = hoje + timedelta(days=dias - 1)
+    horas = baixar_horas(URL_PREVISAO, lat, lon, hoje, fim)
+    datas = np.arange(np.datetime64(hoje), np.datetime64(fim) + 1)
+    return datas, maximos_moveis(horas)
+
+
+def principal(argv=None):
+    hoje = date.today()
+    parser = argparse.ArgumentParser(description="Máximos de chuva em 1h/3h/6h de um CEP (histórico ou previsão).")
+    parser.add_argument("cep", help="CEP (XXXXX-XXX ou XXXXXXXX)")
+    parser.add_argument("--de", type=date.fromisoformat, default=hoje - timedelta(days=365),
+                        help="primeiro dia (AAAA-MM-DD, padrão: um ano atrás)")
+    parser.add_argument("--ate", type=date.fromisoformat, default=hoje, help="último dia (AAAA-MM-DD, padrão: hoje)")
+    parser.add_argument("--previsao", action="store_true", help="usa a previsão dos próximos 7 dias")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_INTENSA_1H_MM,
+                        help=f"chuva em 1h para listar o dia (padrão: {LIMIAR_INTENSA_1H_MM:g} mm)")
+    args = parser.parse_args(argv)
+
+    if args.de > args.ate:
+        print("Erro: a data inicial deve ser anterior à final.")
+        return 1
+
+    # Importado aqui: a geocodificação carrega o geopy
+    from geocodificacao import obter_lat_lon_por_cep
+    lat, lon = obter_lat_lon_por_cep(args.cep)
+    if lat is None or lon is None:
+        print(f"Erro: CEP {args.cep} não encontrado ou formato inválido.")
+        return 1
+
+    try:
+        if args.previsao:
+            datas, maximos = maximos_previsao(lat, lon)
+        else:
+            datas, maximos = obter_maximos_horarios(lat, lon, args.de, args.ate)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Erro ao buscar a precipitação horária: {str(e)}")
+        return 1
+
+    intensos = np.flatnonzero(maximos[1] >= args.limiar)
+    print(f"{len(datas)} dias | {len(intensos)} com pelo menos {args.limiar:g} mm em 1h")
+    if len(intensos):
+        print(f"{'dia':<12}" + "".join(f"{f'máx {janela}h (mm)':>16}" for janela in JANELAS_HORAS))
+        for i in intensos:
+            print(f"{str(datas[i]):<12}" + "".join(f"{maximos[janela][i]:>16.1f}" for janela in JANELAS_HORAS))
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,224 @@
+# Resumos da precipitação por local (latitude/longitude arredondadas), mantidos a cada
+# gravação na série diária: semanas do mês, meses e anos, além da climatologia de cada
+# mês do calendário (média e percentis dos totais dos meses completos).
+# Só os meses tocados pelos dias novos são recalculados; o ano sai da soma dos meses,
+# então os níveis sempre batem entre si. O nível diário é a própria série em disco.
+#
+# Exemplos:
+#   python resumos.py reconstruir
+#   python resumos.py climatologia -23.55 -46.63
+import argparse                  # Para ler os parâmetros da linha de comando
+import calendar                  # Quantidade de dias de cada mês
+import sys                       # Para o código de saída do programa
+from datetime import date
+
+import numpy as np               # Arrays, bincount e percentis
+
+import banco                     # Banco único (tabelas de resumo)
+import metricas                  # Tempo da agregação e da gravação
+from agregacao import agregar
+
+# Estatísticas guardadas em cada período
+ESTATISTICAS_RESUMO = ("soma", "maximo", "dias_chuvosos", "dias_validos")
+
+# Percentis da climatologia mensal
+PERCENTIS_CLIMATOLOGIA = (10, 50, 90)
+
+# Semanas por mês (dias 1-7, 8-14, 15-21, 22-28, 29-31)
+SEMANAS_POR_MES = 5
+
+
+# Converte um datetime64[M] em (ano, mês)
+def _ano_mes(mes_absoluto):
+    meses = int(mes_absoluto.astype(np.int64))
+    return 1970 + meses // 12, meses % 12 + 1
+
+
+# Recalcula os resumos dos meses de `datas` (dias recém-gravados na série diária)
+def atualizar_resumos(serie, lat, lon, datas, conn=None):
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    if datas.size == 0:
+        return
+
+    # Período inteiro dos meses tocados (os meses entre eles são recalculados junto)
+    primeiro = datas.min().astype("datetime64[M]")
+    ultimo = datas.max().astype("datetime64[M]")
+    inicio = primeiro.astype("datetime64[D]").item()
+    fim = ((ultimo + 1).astype("datetime64[D]") - 1).item()
+
+    valores = serie.ler(lat, lon, inicio, fim)
+    if valores is None:
+        return
+    buscados = ~serie.nao_buscados(lat, lon, inicio, fim)
+    dias = serie.datas(inicio, fim)[buscados]
+    valores = valores[buscados]
+
+    # Índices de grupo: mês relativo ao primeiro e semana dentro do mês
+    quantidade_meses = int((ultimo - primeiro).astype(np.int64)) + 1
+    meses_dias = dias.astype("datetime64[M]")
+    indice_mes = (meses_dias - primeiro).astype(np.int64)
+    indice_semana = indice_mes * SEMANAS_POR_MES + (dias - meses_dias.astype("datetime64[D]")).astype(np.int64) // 7
+
+    with metricas.etapa("agregacao"):
+        meses, por_mes = agregar(indice_mes, valores, quantidade_meses, ESTATISTICAS_RESUMO)
+        semanas, por_semana = agregar(indice_semana, valores, quantidade_meses * SEMANAS_POR_MES, ESTATISTICAS_RESUMO)
+        dias_por_mes = np.bincount(indice_mes, minlength=quantidade_meses)
+
+    linhas_mes = []
+    for i, mes in enumerate(meses.tolist()):
+        ano, numero = _ano_mes(primeiro + mes)
+        completo = int(dias_por_mes[mes] == calendar.monthrange(ano, numero)[1])
+        linhas_mes.append((lat, lon, ano, numero) + tuple(por_mes[e][i].item() for e in ESTATISTICAS_RESUMO)
+                          + (int(dias_por_mes[mes]), completo))
+    linhas_semana = []
+    for i, semana in enumerate(semanas.tolist()):
+        ano, numero = _ano_mes(primeiro + semana // SEMANAS_POR_MES)
+        linhas_semana.append((lat, lon, ano, numero, semana % SEMANAS_POR_MES + 1)
+                             + tuple(por_semana[e][i].item() for e in ESTATISTICAS_RESUMO))
+
+    ano_inicio, mes_inicio = _ano_mes(primeiro)
+    ano_fim, mes_fim = _ano_mes(ultimo)
+    periodo = (lat, lon, ano_inicio * 12 + mes_inicio, ano_fim * 12 + mes_fim)
+    meses_calendario = sorted({linha[3] for linha in linhas_mes})
+
+    fechar = conn is None
+    conn = conn or banco.conectar()
+    try:
+        with metricas.etapa("gravacao_sqlite"), conn:
+            # Semanas e meses do período: apaga e grava de novo
+            for tabela in ("resumo_semanal", "resumo_mensal"):
+                conn.execute(f"DELETE FROM {tabela} WHERE latitude = ? AND longitude = ? "
+                             f"AND ano * 12 + mes BETWEEN ? AND ?", periodo)
+            conn.executemany(
+                "INSERT INTO resumo_semanal (latitude, longitude, ano, mes, semana, soma, maximo, "
+                "dias_chuvosos, dias_validos) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas_semana)
+            conn.executemany(
+                "INSERT INTO resumo_mensal (latitude, longitude, ano, mes, soma, maximo, dias_chuvosos, "
+                "dias_validos, dias, completo) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas_mes)
+
+            # Anos do período: soma dos meses
+            conn.execute("DELETE FROM resumo_anual WHERE latitude = ? AND longitude = ? AND ano BETWEEN ? AND ?",
+                         (lat, lon, ano_inicio, ano_fim))
+            conn.execute(
+                """INSERT INTO resumo_anual (latitude, longitude, ano, soma, maximo, dias_chuvosos, dias_validos, dias)
+                   SELECT latitude, longitude, ano, SUM(soma), MAX(maximo), SUM(dias_chuvosos),
+                          SUM(dias_validos), SUM(dias)
+                   FROM resumo_mensal WHERE latitude = ? AND longitude = ? AND ano BETWEEN ? AND ?
+                   GROUP BY ano""",
+                (lat, lon, ano_inicio, ano_fim))
+
+            # Climatologia só dos meses do calendário que mudaram
+            for mes in meses_calendario:
+                atualizar_climatologia(conn, lat, lon, mes)
+        metricas.contar("linhas_gravadas", len(linhas_semana) + len(linhas_mes))
+    finally:
+        if fechar:
+            conn.close()
+
+
+# Recalcula a climatologia de um mês do calendário (totais dos meses completos)
+def atualizar_climatologia(conn, lat, lon, mes):
+    totais = np.array([linha[0] for linha in conn.execute(
+        "SELECT soma FROM resumo_mensal WHERE latitude = ? AND longitude = ? AND mes = ? AND completo = 1",
+        (lat, lon, mes))], dtype="float64")
+    if totais.size == 0:
+        conn.execute("DELETE FROM climatologia_mensal WHERE latitude = ? AND longitude = ? AND mes = ?",
+                     (lat, lon, mes))
+        return
+    percentis = np.percentile(totais, PERCENTIS_CLIMATOLOGIA)
+    conn.execute(
+        "INSERT OR REPLACE INTO climatologia_mensal (latitude, longitude, mes, anos, media, p10, p50, p90) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (lat, lon, mes, int(totais.size), float(totais.mean())) + tuple(float(p) for p in percentis))
+
+
+# Confere se os resumos de inicio..fim (meses inteiros) cobrem todos os dias buscados da série
+# e recalcula se não cobrirem (outro processo pode ter gravado a série e ainda não os resumos)
+def conferir_resumos(conn, serie, lat, lon, inicio, fim):
+    buscados = int((~serie.nao_buscados(lat, lon, inicio, fim)).sum())
+    resumidos = conn.execute(
+        "SELECT COALESCE(SUM(dias), 0) FROM resumo_mensal WHERE latitude = ? AND longitude = ? "
+        "AND ano * 12 + mes BETWEEN ? AND ?",
+        (lat, lon, inicio.year * 12 + inicio.month, fim.year * 12 + fim.month)).fetchone()[0]
+    if resumidos != buscados:
+        atualizar_resumos(serie, lat, lon, np.array([inicio, fim], dtype="datetime64[D]"), conn)
+
+
+# Consultas (pela chave primária): listas de tuplas
+def consultar_semanal(conn, lat, lon, ano, mes):
+    return conn.execute(
+        "SELECT semana, soma FROM resumo_semanal WHERE latitude = ? AND longitude = ? AND ano = ? AND mes = ? "
+        "ORDER BY semana", (lat, lon, ano, mes)).fetchall()
+
+
+def consultar_mensal(conn, lat, lon, ano_inicio, ano_fim):
+    return conn.execute(
+        "SELECT ano, mes, soma FROM resumo_mensal WHERE latitude = ? AND longitude = ? AND ano BETWEEN ? AND ? "
+        "ORDER BY ano, mes", (lat, lon, ano_inicio, ano_fim)).fetchall()
+
+
+def consultar_anual(conn, lat, lon, ano_inicio, ano_fim):
+    return conn.execute(
+        "SELECT ano, soma, maximo, dias_chuvosos FROM resumo_anual WHERE latitude = ? AND longitude = ? "
+        "AND ano BETWEEN ? AND ? ORDER BY ano", (lat, lon, ano_inicio, ano_fim)).fetchall()
+
+
+def consultar_climatologia(conn, lat, lon):
+    return conn.execute(
+        "SELECT mes, anos, media, p10, p50, p90 FROM climatologia_mensal WHERE latitude = ? AND longitude = ? "
+        "ORDER BY mes", (lat, lon)).fetchall()
+
+
+# Recalcula todos os resumos a partir da série diária (ex.: depois de copiar séries antigas)
+def reconstruir(serie):
+    conn = banco.conectar()
+    try:
+        fim = date.fromordinal(serie.inicio.toordinal() + serie.dias - 1)
+        locais = serie.locais()
+        for lat, lon in locais:
+            buscados = np.flatnonzero(~serie.nao_buscados(lat, lon, serie.inicio, fim))
+            if buscados.size:
+                atualizar_resumos(serie, lat, lon, serie.datas(serie.inicio, fim)[buscados[[0, -1]]], conn)
+        return len(locais)
+    finally:
+        conn.close()
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Resumos (semana, mês, ano) e climatologia da precipitação.")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("reconstruir", help="recalcula os resumos de todos os locais da série diária")
+    climatologia = subparsers.add_parser("climatologia", help="mostra a climatologia mensal de um local")
+    climatologia.add_argument("latitude", type=float)
+    climatologia.add_argument("longitude", type=float)
+    args = parser.parse_args(argv)
+
+    if args.banco:
+        banco.CAMINHO_BANCO = args.banco
+
+    # Importado aqui para evitar import circular (o armazém atualiza estes resumos)
+    from armazem_precipitacao import serie_diaria, arredondar_coordenadas
+
+    if args.comando == "reconstruir":
+        print(f"Resumos recalculados para {reconstruir(serie_diaria())} locais.")
+        return 0
+
+    lat, lon = arredondar_coordenadas(args.latitude, args.longitude)
+    conn = banco.conectar()
+    try:
+        linhas = consultar_climatologia(conn, lat, lon)
+    finally:
+        conn.close()
+    if not linhas:
+        print(f"Nenhum mês completo gravado para ({lat}, {lon}).")
+        return 1
+    print(f"{'mês':>4}{'anos':>6}{'média':>10}" + "".join(f"{f'p{p}':>10}" for p in PERCENTIS_CLIMATOLOGIA))
+    for mes, anos, media, *percentis in linhas:
+        print(f"{mes:>4}{anos:>6}{media:>10.1f}" + "".join(f"{p:>10.1f}" for p in percentis))
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
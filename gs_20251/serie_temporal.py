@@ -0,0 +1,261 @@
+# Série temporal em disco, em colunas: um array float32 de tamanho fixo por local
+# (latitude/longitude arredondadas), indexado pelo dia desde o início da série.
+# O arquivo tem um cabeçalho pequeno seguido das linhas (uma por local); o índice
+# local -> linha fica na tabela serie_locais do banco único. A leitura é feita com
+# numpy.memmap, então qualquer período é uma fatia do arquivo, sem cópia.
+#
+# Dias nunca buscados guardam um NaN com bits próprios (NAO_BUSCADO), diferente do
+# NaN comum gravado quando a API não tem o dado. Para quem só lê, os dois são NaN.
+#
+# Exemplos:
+#   python serie_temporal.py info
+#   python serie_temporal.py ler -23.55 -46.63 --de 2024-01-01 --ate 2024-01-31
+import argparse                  # Para ler os parâmetros da linha de comando
+import os                        # Pasta e tamanho dos arquivos
+import struct                    # Cabeçalho binário
+import sys                       # Para o código de saída do programa
+import threading                 # Trava das gravações (várias threads no mesmo processo)
+from datetime import date, timedelta
+
+import numpy as np               # memmap e arrays
+
+import banco                     # Banco único (índice dos locais)
+
+# Cabeçalho: mágico, versão, passos por dia, início (dias desde 1970), dias por local
+MAGICO = b"CHSV"
+VERSAO = 1
+FORMATO_CABECALHO = "<4sHHii"
+TAMANHO_CABECALHO = 64           # Reservado (o resto do cabeçalho fica zerado)
+
+# Período padrão das séries diárias (o arquivo histórico da Open-Meteo começa em 1940)
+INICIO_PADRAO = date(1940, 1, 1)
+FIM_PADRAO = date(2100, 1, 1)
+
+# NaN "silencioso" com bits próprios: dia ainda não buscado
+BITS_NAO_BUSCADO = 0x7FC00001
+NAO_BUSCADO = np.array([BITS_NAO_BUSCADO], dtype=np.uint32).view(np.float32)[0]
+
+EPOCA = date(1970, 1, 1)
+
+
+# Séries abertas neste processo: (caminho do banco, pid, nome) -> SerieTemporal
+_abertas = {}
+_trava_abertas = threading.Lock()
+
+
+# Pasta das séries: ao lado do arquivo do banco (chuvasegura.db -> chuvasegura_series)
+def pasta_series(caminho_banco=None):
+    return os.path.splitext(caminho_banco or banco.CAMINHO_BANCO)[0] + "_series"
+
+
+class SerieTemporal:
+    def __init__(self, nome, inicio=INICIO_PADRAO, fim=FIM_PADRAO, passos_por_dia=1, caminho_banco=None):
+        self.nome = nome
+        pasta = pasta_series(caminho_banco)
+        os.makedirs(pasta, exist_ok=True)
+        self.caminho = os.path.join(pasta, f"{nome}.f32")
+
+        self._conn = banco.conectar(caminho_banco, check_same_thread=False)
+        self._trava = threading.RLock()
+        self._linhas = {}     # (lat, lon) -> linha do arquivo
+        self._mapa = None     # memmap (linhas x passo)
+
+        # Criação do arquivo dentro de uma transação de escrita: só um processo cria
+        if not os.path.exists(self.caminho):
+            with self._transacao():
+                if not os.path.exists(self.caminho):
+                    cabecalho = struct.pack(FORMATO_CABECALHO, MAGICO, VERSAO, passos_por_dia,
+                                            (inicio - EPOCA).days, (fim - inicio).days)
+                    with open(self.caminho, "wb") as arquivo:
+                        arquivo.write(cabecalho.ljust(TAMANHO_CABECALHO, b"\0"))
+        self._ler_cabecalho()
+
+    # Lê e confere o cabeçalho do arquivo
+    def _ler_cabecalho(self):
+        with open(self.caminho, "rb") as arquivo:
+            dados = arquivo.read(TAMANHO_CABECALHO)
+        magico, versao, passos_por_dia, inicio, dias = struct.unpack_from(FORMATO_CABECALHO, dados)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError(f"{self.caminho}: arquivo de série inválido ou de outra versão")
+        self.passos_por_dia = passos_por_dia
+        self.inicio = EPOCA + timedelta(days=inicio)
+        self.dias = dias
+        self.passo = dias * passos_por_dia  # Valores por local
+
+    # Transação de escrita no banco (serializa a criação de linhas entre processos)
+    def _transacao(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    # Quantidade de linhas que cabem no arquivo hoje
+    def _linhas_no_arquivo(self):
+        return (os.path.getsize(self.caminho) - TAMANHO_CABECALHO) // (self.passo * 4)
+
+    # Mapeia o arquivo de novo se ele cresceu (outro local foi criado)
+    def _mapear(self, linha):
+        if self._mapa is None or linha >= self._mapa.shape[0]:
+            total = self._linhas_no_arquivo()
+            self._mapa = None
+            if total:
+                self._mapa = np.memmap(self.caminho, dtype=np.float32, mode="r+",
+                                       offset=TAMANHO_CABECALHO, shape=(total, self.passo))
+        return self._mapa
+
+    # Linha do local no arquivo (None se não existir e criar=False)
+    def _linha(self, lat, lon, criar=False):
+        chave = (lat, lon)
+        linha = self._linhas.get(chave)
+        if linha is not None:
+            return linha
+
+        consulta = "SELECT linha FROM serie_locais WHERE serie = ? AND latitude = ? AND longitude = ?"
+        resultado = self._conn.execute(consulta, (self.nome, lat, lon)).fetchone()
+        if resultado is None and criar:
+            with self._transacao() as conn:
+                resultado = conn.execute(consulta, (self.nome, lat, lon)).fetchone()
+                if resultado is None:
+                    linha = conn.execute("SELECT COUNT(*) FROM serie_locais WHERE serie = ?",
+                                         (self.nome,)).fetchone()[0]
+                    # Acrescenta a linha nova já preenchida com "não buscado"
+                    if self._linhas_no_arquivo() <= linha:
+                        self._mapa = None  # Solta o mapa antes de crescer o arquivo
+                        with open(self.caminho, "r+b") as arquivo:
+                            arquivo.seek(TAMANHO_CABECALHO + linha * self.passo * 4)
+                            arquivo.write(np.full(self.passo, NAO_BUSCADO, dtype=np.float32).tobytes())
+                    conn.execute("INSERT INTO serie_locais (serie, latitude, longitude, linha) VALUES (?, ?, ?, ?)",
+                                 (self.nome, lat, lon, linha))
+                    resultado = (linha,)
+        if resultado is None:
+            return None
+        self._linhas[chave] = resultado[0]
+        return resultado[0]
+
+    # Posição [a, b) no array do local para os dias inicio..fim (inclusive)
+    def _posicoes(self, inicio, fim):
+        a = (inicio - self.inicio).days
+        b = (fim - self.inicio).days + 1
+        if a < 0 or b > self.dias or a >= b:
+            raise ValueError(f"Período {inicio}..{fim} fora da série {self.nome} "
+                             f"({self.inicio}..{self.inicio + timedelta(days=self.dias - 1)})")
+        return a * self.passos_por_dia, b * self.passos_por_dia
+
+    # Datas (datetime64[D]) dos dias inicio..fim
+    def datas(self, inicio, fim):
+        return np.arange(np.datetime64(inicio, "D"), np.datetime64(fim, "D") + 1)
+
+    # Valores do período como fatia do arquivo (sem cópia; None se o local não existir).
+    # Dias não buscados e dias sem dado aparecem como NaN.
+    def ler(self, lat, lon, inicio, fim):
+        a, b = self._posicoes(inicio, fim)
+        with self._trava:
+            linha = self._linha(lat, lon)
+            if linha is None:
+                return None
+            return self._mapear(linha)[linha, a:b]
+
+    # Máscara dos dias do período que ainda não foram buscados
+    def nao_buscados(self, lat, lon, inicio, fim):
+        valores = self.ler(lat, lon, inicio, fim)
+        if valores is None:
+            return np.ones((fim - inicio).days + 1, dtype=bool)
+        bits = valores.view(np.uint32).reshape(-1, self.passos_por_dia)
+        return (bits == BITS_NAO_BUSCADO).all(axis=1)
+
+    # Grava valores (None/NaN = sem dado) a partir do dia `inicio`, ou nos dias `datas`
+    def gravar(self, lat, lon, valores, inicio=None, datas=None):
+        valores = np.asarray(valores, dtype=np.float32)
+        # Confere o período antes de criar a linha: um índice fora da série (negativo, por
+        # exemplo) gravaria em silêncio em outros dias do local
+        if datas is None:
+            a = self._posicoes(inicio, inicio)[0]
+            if a + valores.size > self.dias * self.passos_por_dia:
+                raise ValueError(f"{valores.size} valores a partir de {inicio} passam do fim da série {self.nome} "
+                                 f"({self.inicio + timedelta(days=self.dias - 1)})")
+        else:
+            datas = np.asarray(datas, dtype="datetime64[D]")
+            dias = (datas - np.datetime64(self.inicio, "D")).astype(np.int64)
+            fora = (dias < 0) | (dias >= self.dias)
+            if fora.any():
+                raise ValueError(f"Data {datas[fora][0]} fora da série {self.nome} "
+                                 f"({self.inicio}..{self.inicio + timedelta(days=self.dias - 1)})")
+        with self._trava:
+            linha = self._linha(lat, lon, criar=True)
+            mapa = self._mapear(linha)
+            if datas is None:
+                mapa[linha, a:a + valores.size] = valores
+            else:
+                posicoes = (dias[:, None] * self.passos_por_dia + np.arange(self.passos_por_dia)).ravel()
+                mapa[linha, posicoes] = valores
+
+    # Locais gravados: lista de (latitude, longitude)
+    def locais(self):
+        return [tuple(linha) for linha in self._conn.execute(
+            "SELECT latitude, longitude FROM serie_locais WHERE serie = ? ORDER BY linha", (self.nome,))]
+
+    # Grava no disco o que está no mapa e fecha a conexão
+    def fechar(self):
+        with self._trava:
+            if self._mapa is not None:
+                self._mapa.flush()
+                self._mapa = None
+            self._conn.close()
+
+
+# Abre a série do banco atual uma vez por processo (a conexão não pode passar por fork).
+# `preparar(serie)` roda só na primeira abertura.
+def abrir_serie(nome, preparar=None, **opcoes):
+    chave = (banco.CAMINHO_BANCO, os.getpid(), nome)
+    with _trava_abertas:
+        serie = _abertas.get(chave)
+        if serie is None:
+            serie = SerieTemporal(nome, **opcoes)
+            if preparar:
+                preparar(serie)
+            _abertas[chave] = serie
+    return serie
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta a série diária de precipitação em disco.")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("info", help="mostra o cabeçalho e os locais da série")
+    ler = subparsers.add_parser("ler", help="mostra os valores de um local")
+    ler.add_argument("latitude", type=float)
+    ler.add_argument("longitude", type=float)
+    ler.add_argument("--de", type=date.fromisoformat, required=True, help="primeiro dia (AAAA-MM-DD)")
+    ler.add_argument("--ate", type=date.fromisoformat, required=True, help="último dia (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+
+    # Importado aqui para evitar import circular (o armazém usa esta série)
+    from armazem_precipitacao import NOME_SERIE_DIARIA, arredondar_coordenadas
+
+    serie = SerieTemporal(NOME_SERIE_DIARIA, caminho_banco=args.banco)
+    try:
+        if args.comando == "info":
+            locais = serie.locais()
+            print(f"Arquivo: {serie.caminho} ({os.path.getsize(serie.caminho) / 2**20:.1f} MB)")
+            print(f"Período: {serie.inicio} .. {serie.inicio + timedelta(days=serie.dias - 1)} "
+                  f"| {serie.passos_por_dia} valor(es) por dia | {len(locais)} locais")
+            return 0
+
+        lat, lon = arredondar_coordenadas(args.latitude, args.longitude)
+        try:
+            valores = serie.ler(lat, lon, args.de, args.ate)
+            nao_buscados = serie.nao_buscados(lat, lon, args.de, args.ate)
+        except ValueError as e:
+            print(f"Erro: {e}")
+            return 1
+        if valores is None:
+            print(f"Nenhum dado gravado para ({lat}, {lon}).")
+            return 1
+        for dia, valor, falta in zip(serie.datas(args.de, args.ate), valores, nao_buscados):
+            print(f"{dia}  {'não buscado' if falta else ('sem dado' if np.isnan(valor) else f'{valor:.1f} mm')}")
+        return 0
+    finally:
+        serie.fechar()
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
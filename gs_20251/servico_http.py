@@ -0,0 +1,265 @@
+# Serviço HTTP/JSON (sem menu interativo) para cadastro, relatos de alagamento e alertas.
+# Todas as gravações passam por uma única thread escritora, que agrupa os pedidos
+# recebidos ao mesmo tempo em uma só transação (group commit) no banco em modo WAL.
+#
+# Rotas:
+#   POST /usuarios          {"nome_completo", "cpf", "cep", "tipo_deficiencia"?, "necessita_resgate"?}
+#   POST /relatorios        um relato ou uma lista de relatos
+#                           {"nome_reportante", "cpf_reportante", "cep_local", "intensidade_chuva", "nivel_inundacao"}
+#   GET  /alertas/<cep>     ?janela=hoje|1h|6h|24h  (&raio=km inclui a soma dos CEPs vizinhos)
+#   GET  /alertas           CEPs acima do limite (?janela=...)
+#
+# Exemplo:
+#   python servico_http.py --porta 8080
+#   python servico_http.py --viacep-url http://127.0.0.1:9000/ws   (ViaCEP local, ex.: em testes)
+import argparse                                   # Para ler os parâmetros da linha de comando
+import json                                       # Para ler e responder em JSON
+import queue                                      # Fila de pedidos de gravação
+import threading                                  # Thread escritora
+from concurrent.futures import Future             # Resultado de cada pedido de gravação
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Servidor HTTP da biblioteca padrão
+from urllib.parse import urlparse, parse_qs       # Para separar caminho e parâmetros da URL
+
+import banco                                      # Banco único (conexões em modo WAL e migrações)
+import cadastro_report                            # Consulta de CEP (URL da ViaCEP)
+from cadastro_report import (ErroValidacao, validar_usuario, validar_relatorio,  # Mesmas regras do menu
+                             inserir_usuario, inserir_relatorio)
+from alertas import MotorAlertas, JANELAS_ALERTA  # Contagens móveis de relatos por CEP
+from vizinhanca import AlertasVizinhanca          # Soma dos relatos de CEPs vizinhos
+
+# Máximo de pedidos gravados em uma mesma transação
+TAMANHO_LOTE = 1000
+
+# Tempo máximo (s) que uma requisição espera a gravação ser confirmada
+TIMEOUT_GRAVACAO = 30
+
+
+# Thread única de gravação: junta tudo o que chegou na fila e grava de uma vez
+class EscritorLote(threading.Thread):
+    def __init__(self, conexao, motor, tamanho_lote=TAMANHO_LOTE):
+        super().__init__(name="escritor-lote", daemon=True)
+        self.conexao = conexao
+        self.motor = motor
+        self.tamanho_lote = tamanho_lote
+        self.fila = queue.Queue()
+
+    # Enfileira um pedido ('usuario' ou 'relatorio') e devolve o Future do resultado
+    def enviar(self, tipo, dados):
+        futuro = Future()
+        self.fila.put((tipo, dados, futuro))
+        return futuro
+
+    # Pede para a thread terminar depois de gravar o que já está na fila
+    def parar(self):
+        self.fila.put(None)
+        self.join()
+
+    def run(self):
+        encerrar = False
+        while not encerrar:
+            item = self.fila.get()
+            if item is None:
+                break
+            lote = [item]
+            # Junta os pedidos que chegaram enquanto o lote anterior era gravado
+            while len(lote) < self.tamanho_lote:
+                try:
+                    item = self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    encerrar = True
+                    break
+                lote.append(item)
+            self._gravar(lote)
+
+    # Grava todos os pedidos do lote em uma única transação. Se o lote falhar, cada pedido é
+    # gravado de novo sozinho: só o pedido com problema recebe o erro.
+    def _gravar(self, lote):
+        try:
+            with self.conexao:
+                resultados = [
+                    self._inserir_usuario(dados) if tipo == 'usuario' else self._inserir_relatorio(dados)
+                    for tipo, dados, _ in lote
+                ]
+        except Exception as erro:
+            if len(lote) == 1:
+                lote[0][2].set_exception(erro)
+            else:
+                for item in lote:
+                    self._gravar([item])
+            return
+        # Depois do commit o motor lê as contagens alteradas pela sua própria conexão
+        # (um lote desfeito não deixa relatos fantasmas); quem consulta o alerta logo
+        # após a resposta já vê o relato
+        if any(tipo == 'relatorio' for tipo, _, _ in lote):
+            self.motor.sincronizar()
+        for (_, _, futuro), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+
+    # Retorna o id do usuário, ou None se o CPF já estava cadastrado
+    def _inserir_usuario(self, dados):
+        return inserir_usuario(self.conexao, dados)
+
+    # Grava o relato e a linha da tabela-resumo (mesma transação)
+    def _inserir_relatorio(self, dados):
+        return inserir_relatorio(self.conexao, None, dados)
+
+
+# Estado do serviço: conexões, motor de alertas e thread escritora
+class ServicoChuvaSegura:
+    def __init__(self, caminho_banco=None):
+        # Conexão usada só pela thread escritora
+        self.conexao = banco.conectar(caminho_banco, check_same_thread=False)
+        # O motor tem a sua própria conexão, só de leitura: as threads das requisições leem
+        # as contagens alteradas (PRAGMA data_version e tabela-resumo) sem esperar o escritor
+        self.conexao_motor = banco.conectar(caminho_banco, check_same_thread=False)
+        self.conexao_motor.execute('PRAGMA query_only = ON')
+        self.motor = MotorAlertas(self.conexao_motor)
+        self.escritor = EscritorLote(self.conexao, self.motor)
+        self.escritor.start()
+        # Vizinhança pelo cache de geocodificação (não usa as conexões do serviço)
+        self.vizinhanca = AlertasVizinhanca(self.motor)
+
+    def cadastrar_usuario(self, dados):
+        if not isinstance(dados, dict):
+            raise ErroValidacao("O cadastro deve ser um objeto JSON.")
+        usuario = validar_usuario(dados)
+        id_usuario = self.escritor.enviar('usuario', usuario).result(TIMEOUT_GRAVACAO)
+        if id_usuario is None:
+            raise ErroValidacao("CPF já cadastrado.", status=409)
+        return {'id': id_usuario, 'endereco_completo': usuario['endereco_completo']}
+
+    def registrar_relatorios(self, dados):
+        lista = dados if isinstance(dados, list) else [dados]
+        enderecos = {}
+        # Valida tudo antes de gravar: um lote inválido não grava nada
+        relatorios = []
+        for posicao, item in enumerate(lista):
+            if not isinstance(item, dict):
+                raise ErroValidacao(f"Relato {posicao}: deve ser um objeto JSON." if isinstance(dados, list)
+                                    else "O relato deve ser um objeto JSON ou uma lista de objetos.")
+            try:
+                relatorios.append(validar_relatorio(item, enderecos))
+            except ErroValidacao as erro:
+                raise ErroValidacao(f"Relato {posicao}: {erro}", erro.status)
+        futuros = [self.escritor.enviar('relatorio', relatorio) for relatorio in relatorios]
+        ids = [futuro.result(TIMEOUT_GRAVACAO) for futuro in futuros]
+        return {'ids': ids} if isinstance(dados, list) else {'id': ids[0]}
+
+    def consultar_alerta(self, cep, janela, raio_km=None):
+        total, peso = self.motor.contar(cep, janela)
+        resposta = {'cep': cep, 'janela': janela, 'total': total, 'peso': peso,
+                    'alerta': total >= self.motor.limite}
+        if raio_km is not None:
+            resposta['vizinhanca'] = self.vizinhanca.consultar(cep, raio_km, janela)
+        return resposta
+
+    def listar_alertas(self, janela):
+        return {'janela': janela, 'ceps': [
+            {'cep': cep, 'total': total, 'peso': peso}
+            for cep, total, peso in self.motor.ceps_em_alerta(janela)
+        ]}
+
+    def fechar(self):
+        self.escritor.parar()
+        self.conexao.close()
+        self.conexao_motor.close()
+
+
+class ManipuladorChuvaSegura(BaseHTTPRequestHandler):
+    servico = None                 # ServicoChuvaSegura (definido em criar_servidor)
+    protocol_version = "HTTP/1.1"  # Mantém a conexão aberta entre requisições (keep-alive)
+
+    # Silencia o log padrão de cada requisição
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(tamanho) or b'null')
+        except ValueError:
+            raise ErroValidacao("JSON inválido.")
+
+    def _executar(self, acao):
+        try:
+            status, corpo = acao()
+        except ErroValidacao as erro:
+            status, corpo = erro.status, {'erro': str(erro)}
+        except Exception as erro:
+            status, corpo = 500, {'erro': f"Erro interno: {erro}"}
+        self._responder(status, corpo)
+
+    def do_POST(self):
+        caminho = urlparse(self.path).path.rstrip('/')
+        if caminho == '/usuarios':
+            self._executar(lambda: (201, self.servico.cadastrar_usuario(self._ler_json() or {})))
+        elif caminho == '/relatorios':
+            self._executar(lambda: (201, self.servico.registrar_relatorios(self._ler_json() or {})))
+        else:
+            self._responder(404, {'erro': 'Rota não encontrada.'})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        partes = [parte for parte in url.path.split('/') if parte]
+        parametros = parse_qs(url.query)
+        janela = parametros.get('janela', ['hoje'])[0]
+        try:
+            raio_km = float(parametros['raio'][0]) if 'raio' in parametros else None
+        except ValueError:
+            raio_km = -1
+        if not partes or partes[0] != 'alertas' or len(partes) > 2:
+            self._responder(404, {'erro': 'Rota não encontrada.'})
+        elif janela not in JANELAS_ALERTA:
+            self._responder(400, {'erro': f"janela deve ser uma de: {', '.join(JANELAS_ALERTA)}"})
+        elif raio_km is not None and not 0 < raio_km <= 50:
+            self._responder(400, {'erro': 'raio deve ser um número de km entre 0 e 50.'})
+        elif len(partes) == 2:
+            self._executar(lambda: (200, self.servico.consultar_alerta(partes[1], janela, raio_km)))
+        else:
+            self._executar(lambda: (200, self.servico.listar_alertas(janela)))
+
+
+# Cria o servidor HTTP (uma thread por conexão) ligado a um serviço
+def criar_servidor(host='127.0.0.1', porta=8080, caminho_banco=None):
+    servico = ServicoChuvaSegura(caminho_banco)
+    manipulador = type('Manipulador', (ManipuladorChuvaSegura,), {'servico': servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor, servico
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON de cadastro, relatos e alertas de alagamento.")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=8080, help="porta de escuta (padrão: 8080)")
+    parser.add_argument("--banco", help=f"arquivo do banco (padrão: {banco.CAMINHO_BANCO})")
+    parser.add_argument("--viacep-url", help="endereço base da ViaCEP (ex.: servidor local de testes)")
+    args = parser.parse_args(argv)
+
+    if args.viacep_url:
+        cadastro_report.URL_VIACEP = args.viacep_url.rstrip('/')
+
+    servidor, servico = criar_servidor(args.host, args.porta, args.banco)
+    print(f"Serviço ChuvaSegura em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando o serviço...")
+    finally:
+        servidor.server_close()
+        servico.fechar()
+
+
+# Executa o serviço só se for o script principal
+if __name__ == "__main__":
+    principal()
@@ -0,0 +1,279 @@
+# Servidores HTTP locais que imitam a ViaCEP, o Nominatim e a Open-Meteo (previsão e
+# arquivo histórico, diário e horário, com vários locais por requisição), para rodar
+# benchmarks e testes sem rede. As respostas seguem o formato das APIs reais, com
+# endereços, coordenadas e chuva de dados_sinteticos.py, e cada requisição pode ter
+# latência (fixa + variação + cauda lenta) e uma taxa de erros 503.
+#
+# Cada serviço ouve em uma porta própria (o cliente HTTP limita conexões por host:porta).
+# apontar_modulos() faz os módulos do projeto usarem os servidores falsos.
+#
+# Exemplos:
+#   python servidores_falsos.py --latencia 50 --variacao 20
+#   python servidores_falsos.py --latencia 200 --cauda 0.05 --cauda-ms 3000 --taxa-erro 0.02
+import argparse                 # Para ler os parâmetros da linha de comando
+import json                     # Respostas em JSON
+import random                   # Latência e erros aleatórios
+import sys                      # Para o código de saída do programa
+import threading                # Uma thread por servidor
+import time                     # Latência simulada
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Servidor HTTP da biblioteca padrão
+from urllib.parse import urlparse, parse_qs  # Caminho e parâmetros da URL
+
+import numpy as np              # Chuva sintética
+
+from dados_sinteticos import (coordenadas_cep, endereco_cep, chuva_diaria, chuva_horaria,
+                              PREFIXO_CEP_INEXISTENTE)
+
+# Serviços imitados
+SERVICOS = ("viacep", "nominatim", "open_meteo")
+
+
+# Configuração da latência e dos erros (compartilhada pelos servidores)
+class Comportamento:
+    def __init__(self, latencia_ms=0.0, variacao_ms=0.0, cauda=0.0, cauda_ms=0.0, taxa_erro=0.0, semente=0):
+        self.latencia_ms = latencia_ms   # Atraso fixo de cada resposta
+        self.variacao_ms = variacao_ms   # Atraso extra aleatório entre 0 e variacao_ms
+        self.cauda = cauda               # Fração das respostas que são lentas
+        self.cauda_ms = cauda_ms         # Atraso extra das respostas lentas
+        self.taxa_erro = taxa_erro       # Fração das respostas com 503
+        self._aleatorio = random.Random(semente)
+        self._trava = threading.Lock()
+
+    # Espera a latência sorteada; retorna True se a resposta deve ser um erro
+    def aplicar(self):
+        with self._trava:
+            atraso = self.latencia_ms + self._aleatorio.uniform(0, self.variacao_ms)
+            if self._aleatorio.random() < self.cauda:
+                atraso += self.cauda_ms
+            erro = self._aleatorio.random() < self.taxa_erro
+        if atraso > 0:
+            time.sleep(atraso / 1000)
+        return erro
+
+
+# Datas de um pedido à Open-Meteo (start_date/end_date, ou os forecast_days a partir de hoje)
+def _periodo(parametros):
+    if "start_date" in parametros:
+        inicio = date.fromisoformat(parametros["start_date"])
+        fim = date.fromisoformat(parametros.get("end_date", parametros["start_date"]))
+    else:
+        inicio = date.today()
+        fim = inicio + timedelta(days=int(parametros.get("forecast_days", 7)) - 1)
+    return inicio, fim
+
+
+# Resposta da Open-Meteo (um objeto por local; lista quando há mais de um local)
+def resposta_open_meteo(parametros, arquivo):
+    latitudes = [float(valor) for valor in parametros["latitude"].split(",")]
+    longitudes = [float(valor) for valor in parametros["longitude"].split(",")]
+    if len(latitudes) != len(longitudes):
+        return 400, {"error": True, "reason": "Parameter 'latitude' and 'longitude' must have the same number of elements"}
+    inicio, fim = _periodo(parametros)
+    if fim < inicio:
+        return 400, {"error": True, "reason": "Parameter 'start_date' must be before 'end_date'"}
+    dias = (fim - inicio).days + 1
+    # O arquivo histórico não tem dias futuros (ficam null, como na API)
+    futuros = max(0, (fim - date.today()).days) if arquivo else 0
+
+    resultados = []
+    for lat, lon in zip(latitudes, longitudes):
+        resultado = {
+            "latitude": round(lat, 4), "longitude": round(lon, 4), "generationtime_ms": 0.5,
+            "utc_offset_seconds": 0 if parametros.get("timezone", "GMT") == "GMT" else -10800,
+            "timezone": parametros.get("timezone", "GMT"), "timezone_abbreviation": "GMT-3", "elevation": 760.0,
+        }
+        if "daily" in parametros:
+            valores = chuva_diaria(lat, lon, inicio, dias).tolist()
+            if futuros:
+                valores[-futuros:] = [None] * min(futuros, dias)
+            resultado["daily_units"] = {"time": "iso8601", "precipitation_sum": "mm"}
+            resultado["daily"] = {
+                "time": [(inicio + timedelta(days=i)).isoformat() for i in range(dias)],
+                "precipitation_sum": valores,
+            }
+        if "hourly" in parametros:
+            valores = chuva_horaria(lat, lon, inicio, dias).tolist()
+            if futuros:
+                valores[-futuros * 24:] = [None] * min(futuros * 24, len(valores))
+            inicio_horas = np.datetime64(inicio, "h")
+            resultado["hourly_units"] = {"time": "iso8601", "precipitation": "mm"}
+            resultado["hourly"] = {
+                "time": [str(inicio_horas + i)[:13] + ":00" for i in range(dias * 24)],
+                "precipitation": valores,
+            }
+        resultados.append(resultado)
+    return 200, resultados[0] if len(resultados) == 1 else resultados
+
+
+# Resposta da ViaCEP para /ws/<cep>/json/
+def resposta_viacep(caminho):
+    partes = [parte for parte in caminho.split("/") if parte]
+    if len(partes) != 3 or partes[0] != "ws" or partes[2] != "json":
+        return 404, {"erro": True}
+    cep = partes[1].replace("-", "")
+    if not cep.isdigit() or len(cep) != 8:
+        return 400, {"erro": True}
+    if cep.startswith(PREFIXO_CEP_INEXISTENTE):
+        return 200, {"erro": "true"}
+    return 200, endereco_cep(cep)
+
+
+# Resposta do Nominatim para /search?q=<CEP>, Brazil
+def resposta_nominatim(parametros):
+    cep = "".join(caractere for caractere in parametros.get("q", "") if caractere.isdigit())[:8]
+    if len(cep) != 8 or cep.startswith(PREFIXO_CEP_INEXISTENTE):
+        return 200, []
+    lat, lon = coordenadas_cep(cep)
+    endereco = endereco_cep(cep)
+    return 200, [{
+        "place_id": int(cep), "licence": "Data © OpenStreetMap contributors, ODbL 1.0.",
+        "osm_type": "relation", "osm_id": int(cep), "lat": f"{lat}", "lon": f"{lon}",
+        "class": "place", "type": "postcode", "place_rank": 21, "importance": 0.12, "addresstype": "postcode",
+        "name": endereco["cep"],
+        "display_name": f"{endereco['cep']}, {endereco['bairro']}, {endereco['localidade']}, {endereco['uf']}, Brasil",
+        "boundingbox": [f"{lat - 0.002}", f"{lat + 0.002}", f"{lon - 0.002}", f"{lon + 0.002}"],
+    }]
+
+
+# Servidor de um serviço; guarda o comportamento e a contagem de requisições
+class ServidorFalso(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, servico, comportamento, porta=0):
+        self.servico = servico
+        self.comportamento = comportamento
+        self.requisicoes = 0
+        self._trava = threading.Lock()
+        super().__init__(("127.0.0.1", porta), _Tratador)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Tratador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, como as APIs reais
+    disable_nagle_algorithm = True  # Cabeçalho e corpo saem juntos (sem os ~40 ms do Nagle + ACK atrasado)
+
+    def log_message(self, formato, *args):
+        pass  # Sem uma linha por requisição no terminal
+
+    def do_GET(self):
+        servidor = self.server
+        with servidor._trava:
+            servidor.requisicoes += 1
+        if servidor.comportamento.aplicar():
+            self._responder(503, {"error": True, "reason": "Service temporarily unavailable"})
+            return
+
+        endereco = urlparse(self.path)
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(endereco.query).items()}
+        try:
+            if servidor.servico == "viacep":
+                status, corpo = resposta_viacep(endereco.path)
+            elif servidor.servico == "nominatim":
+                status, corpo = resposta_nominatim(parametros) if endereco.path == "/search" else (404, [])
+            elif endereco.path in ("/v1/forecast", "/v1/archive"):
+                status, corpo = resposta_open_meteo(parametros, arquivo=endereco.path == "/v1/archive")
+            else:
+                status, corpo = 404, {"error": True, "reason": "Not Found"}
+        except (KeyError, ValueError) as e:
+            status, corpo = 400, {"error": True, "reason": f"Parâmetro inválido: {str(e)}"}
+        self._responder(status, corpo)
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+# Os três serviços, cada um em uma thread
+class ServidoresFalsos:
+    def __init__(self, comportamento=None, portas=None):
+        self.comportamento = comportamento or Comportamento()
+        portas = portas or {}
+        self.servidores = {servico: ServidorFalso(servico, self.comportamento, portas.get(servico, 0))
+                           for servico in SERVICOS}
+        self._threads = []
+
+    def iniciar(self):
+        for servidor in self.servidores.values():
+            thread = threading.Thread(target=servidor.serve_forever, name=f"falso-{servidor.servico}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def parar(self):
+        for servidor in self.servidores.values():
+            servidor.shutdown()
+            servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *erro):
+        self.parar()
+
+    def url(self, servico):
+        return self.servidores[servico].url
+
+    # Requisições recebidas por serviço
+    def requisicoes(self):
+        return {servico: servidor.requisicoes for servico, servidor in self.servidores.items()}
+
+    # Faz os módulos do projeto usarem os servidores falsos (e tira o intervalo de 1 s
+    # entre consultas ao Nominatim, que só vale para o serviço real)
+    def apontar_modulos(self):
+        import open_meteo
+        import precipitacao_horaria
+        import cadastro_report
+        import geocodificacao
+        from geopy.geocoders import Nominatim
+        from cliente_http import adaptador_geopy
+
+        open_meteo_url = self.url("open_meteo")
+        open_meteo.URL_PREVISAO = precipitacao_horaria.URL_PREVISAO = f"{open_meteo_url}/v1/forecast"
+        open_meteo.URL_ARQUIVO = precipitacao_horaria.URL_ARQUIVO = f"{open_meteo_url}/v1/archive"
+        cadastro_report.URL_VIACEP = f"{self.url('viacep')}/ws"
+        geocodificacao._geolocator = Nominatim(user_agent="pluviometria_app", scheme="http",
+                                               domain=self.url("nominatim").split("://", 1)[1],
+                                               adapter_factory=adaptador_geopy)
+        geocodificacao.limitador_nominatim.intervalo = 0
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description="ViaCEP, Nominatim e Open-Meteo falsos (locais, sem rede).")
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso fixo de cada resposta em ms (padrão: 0)")
+    parser.add_argument("--variacao", type=float, default=0.0, help="atraso extra aleatório de até N ms (padrão: 0)")
+    parser.add_argument("--cauda", type=float, default=0.0, help="fração das respostas lentas (padrão: 0)")
+    parser.add_argument("--cauda-ms", type=float, default=0.0, help="atraso extra das respostas lentas em ms")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração das respostas com 503 (padrão: 0)")
+    for servico in SERVICOS:
+        parser.add_argument(f"--porta-{servico.replace('_', '-')}", type=int, default=0,
+                            help=f"porta do serviço {servico} (padrão: livre)")
+    args = parser.parse_args(argv)
+
+    comportamento = Comportamento(args.latencia, args.variacao, args.cauda, args.cauda_ms, args.taxa_erro)
+    portas = {servico: getattr(args, f"porta_{servico}") for servico in SERVICOS}
+    servidores = ServidoresFalsos(comportamento, portas).iniciar()
+    print(f"ViaCEP:     {servidores.url('viacep')}/ws/01001000/json/  (VIACEP_URL={servidores.url('viacep')}/ws)")
+    print(f"Nominatim:  {servidores.url('nominatim')}/search?q=01001000&format=json")
+    print(f"Open-Meteo: {servidores.url('open_meteo')}/v1/forecast e /v1/archive")
+    print("Ctrl+C para parar.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\nRequisições: {servidores.requisicoes()}")
+    finally:
+        servidores.parar()
+    return 0
+
+
+# Executa o programa só se for o script principal
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,145 @@
+# Alertas de vizinhança: soma os relatos de CEPs vizinhos, para que um alagamento
+# espalhado por vários CEPs com poucos relatos cada um também dispare o alerta.
+# Duas formas de vizinhança:
+#   - prefixo do CEP (setor, subsetor e divisor de subsetor), contado pelo motor de alertas;
+#   - raio em km, usando uma grade em memória com as coordenadas dos CEPs que têm
+#     relatos recentes (mesmas células de indice_espacial.py). A grade só usa coordenadas
+#     já conhecidas (relatos indexados ou cache de geocodificação), para que uma consulta
+#     nunca espere o Nominatim por causa dos CEPs vizinhos.
+# As respostas ficam em cache por janela e são descartadas a cada novo relato
+# (versão do motor) ou quando o balde de tempo atual muda.
+import threading                        # O serviço HTTP consulta a partir de várias threads
+import time                             # Para saber o balde de tempo atual
+
+from alertas import JANELAS_ALERTA, PREFIXOS_CEP, TAMANHO_BALDE  # Janelas e prefixos
+from geocodificacao import obter_lat_lon_por_cep, coordenadas_em_cache  # CEP -> (lat, lon)
+from indice_espacial import celula, faixa_celulas, distancia_km  # Grade espacial
+
+# Raio padrão da vizinhança em km
+RAIO_VIZINHANCA_KM = 2.0
+
+# Níveis que entram no alerta geral de "perto de mim" (setor e subsetor são áreas
+# grandes demais e aparecem só como informação)
+NIVEIS_ALERTA_PROXIMO = ('cep', 'divisor_subsetor', 'raio')
+
+
+class AlertasVizinhanca:
+    # conn (opcional) permite usar as coordenadas dos relatos já indexados
+    def __init__(self, motor, conn=None):
+        self.motor = motor
+        self.conn = conn
+        self._coordenadas = {}    # cep -> (lat, lon) dos CEPs na grade
+        self._centros = {}        # cep consultado -> (lat, lon)
+        self._sem_coordenadas = {}  # cep -> balde da última tentativa sem sucesso
+        self._grade = {}          # célula -> conjunto de CEPs com relatos recentes
+        self._versao_grade = None
+        self._cache = {}          # (cep, raio, janela) -> resposta
+        self._chave_cache = None  # (versão do motor, balde) em que o cache foi montado
+        self._trava = threading.Lock()
+
+    # Coordenadas já conhecidas de um CEP, sem ir à rede: relatos indexados e depois o cache
+    def _coordenadas_conhecidas(self, cep):
+        if self.conn is not None:
+            linha = self.conn.execute(
+                "SELECT latitude, longitude FROM relatorios_alagamento "
+                "WHERE cep_local = ? AND latitude IS NOT NULL LIMIT 1", (cep,)
+            ).fetchone()
+            if linha:
+                return linha
+        return coordenadas_em_cache(cep)
+
+    # Coloca na grade os CEPs com relatos recentes que ainda não estão nela. Só roda
+    # quando chegaram relatos novos; CEPs sem coordenadas são tentados de novo a cada balde.
+    def _atualizar_grade(self, balde):
+        versao = self.motor.versao
+        if versao == self._versao_grade:
+            return
+        for cep in self.motor.ceps_ativos():
+            if cep in self._coordenadas or self._sem_coordenadas.get(cep) == balde:
+                continue
+            lat, lon = self._coordenadas_conhecidas(cep)
+            if lat is None or lon is None:
+                self._sem_coordenadas[cep] = balde
+                continue
+            self._sem_coordenadas.pop(cep, None)
+            self._coordenadas[cep] = (lat, lon)
+            self._grade.setdefault(celula(lat, lon), set()).add(cep)
+        self._versao_grade = versao
+
+    # Coordenadas do CEP consultado (este pode ir à rede, uma vez, pela geocodificação)
+    def _coordenadas_do_centro(self, cep):
+        if cep in self._centros:
+            return self._centros[cep]
+        lat, lon = self._coordenadas_conhecidas(cep)
+        if lat is None or lon is None:
+            # CEPs inexistentes ficam no cache negativo da geocodificação; falhas de rede
+            # não são guardadas aqui para a próxima consulta tentar de novo
+            lat, lon = obter_lat_lon_por_cep(cep)
+            if lat is None or lon is None:
+                return None
+        self._centros[cep] = (lat, lon)
+        return self._centros[cep]
+
+    # Soma os relatos dos CEPs ativos a até raio_km da coordenada.
+    # Retorna (total, peso, [(cep, total, distância)]) do mais próximo ao mais distante.
+    def _contar_raio(self, lat, lon, raio_km, janela):
+        lat_min, lat_max, lon_min, lon_max = faixa_celulas(lat, lon, raio_km)
+        total_geral, peso_geral, ceps = 0, 0.0, []
+        for celula_lat in range(lat_min, lat_max + 1):
+            for celula_lon in range(lon_min, lon_max + 1):
+                for cep in self._grade.get((celula_lat, celula_lon), ()):
+                    distancia = distancia_km(lat, lon, *self._coordenadas[cep])
+                    if distancia > raio_km:
+                        continue
+                    total, peso = self.motor.contar(cep, janela)
+                    if total:
+                        total_geral += total
+                        peso_geral += peso
+                        ceps.append((cep, total, distancia))
+        ceps.sort(key=lambda item: item[2])
+        return total_geral, peso_geral, ceps
+
+    def _nivel(self, total, peso):
+        return {'relatos': total, 'gravidade': peso, 'alerta': total >= self.motor.limite}
+
+    # Responde "tem alagamento perto de mim?" para um CEP: contagem do próprio CEP,
+    # de cada prefixo e do raio, com o alerta geral dos níveis mais próximos
+    def consultar(self, cep, raio_km=RAIO_VIZINHANCA_KM, janela='hoje'):
+        if janela not in JANELAS_ALERTA:
+            raise ValueError(f"janela deve ser uma de: {', '.join(JANELAS_ALERTA)}")
+
+        # Fora da trava: a primeira consulta de um CEP pode esperar a geocodificação
+        coordenadas = self._coordenadas_do_centro(cep)
+
+        with self._trava:
+            # Descarta o cache se houve relato novo ou se o tempo andou um balde
+            balde = int(time.time()) // TAMANHO_BALDE
+            chave_cache = (self.motor.versao, balde)
+            if chave_cache != self._chave_cache:
+                self._cache.clear()
+                self._chave_cache = chave_cache
+            resposta = self._cache.get((cep, raio_km, janela))
+            if resposta is not None:
+                return resposta
+
+            niveis = {'cep': self._nivel(*self.motor.contar(cep, janela))}
+            for nome, tamanho in PREFIXOS_CEP.items():
+                niveis[nome] = dict(self._nivel(*self.motor.contar_prefixo(cep[:tamanho], janela)),
+                                    prefixo=cep[:tamanho])
+
+            self._atualizar_grade(balde)
+            if coordenadas is not None:
+                total, peso, ceps = self._contar_raio(coordenadas[0], coordenadas[1], raio_km, janela)
+                niveis['raio'] = dict(self._nivel(total, peso), raio_km=raio_km, ceps=[
+                    {'cep': vizinho, 'relatos': relatos, 'distancia_km': round(distancia, 3)}
+                    for vizinho, relatos, distancia in ceps
+                ])
+
+            resposta = {
+                'cep': cep,
+                'janela': janela,
+                'alerta': any(niveis[nome]['alerta'] for nome in NIVEIS_ALERTA_PROXIMO if nome in niveis),
+                'niveis': niveis,
+            }
+            self._cache[(cep, raio_km, janela)] = resposta
+            return resposta